@@ -33,7 +33,43 @@ OUTPUT_CSV_FILE_PATH = os.environ.get(
 )
 OUTPUT_IMAGE_FOLDER = os.environ.get("OUTPUT_IMAGE_FOLDER", "flipkart_images")
 
+# Output sink: a single CSV file, or a (optionally partitioned) Parquet dataset
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "csv")
+PARQUET_COMPRESSION = os.environ.get("PARQUET_COMPRESSION", "snappy")
+PARQUET_ROW_GROUP_SIZE = (
+    int(os.environ["PARQUET_ROW_GROUP_SIZE"])
+    if os.environ.get("PARQUET_ROW_GROUP_SIZE")
+    else None
+)
+PARTITION_COLS = [
+    col.strip()
+    for col in os.environ.get("PARTITION_COLS", "").split(",")
+    if col.strip()
+]
+
+# Incremental reruns: skip images already uploaded to OUTPUT_IMAGE_FOLDER
+INCREMENTAL_IMAGES = os.environ.get("INCREMENTAL_IMAGES", "false").lower() == "true"
+REVALIDATE_IMAGES = os.environ.get("REVALIDATE_IMAGES", "false").lower() == "true"
+IMAGE_MANIFEST_PATH = os.environ.get("IMAGE_MANIFEST_PATH")
+# Download every unique image URL once in a pre-pass stage
+DEDUPE_IMAGES = os.environ.get("DEDUPE_IMAGES", "false").lower() == "true"
+# Larger catalogs skip the pre-pass, it plans the downloads in driver memory
+DEDUPE_MAX_CANDIDATES = int(os.environ.get("DEDUPE_MAX_CANDIDATES", "1000000"))
+
+# Block-level checkpoints for resuming runs interrupted by preemptions
+CHECKPOINT_URI = os.environ.get("CHECKPOINT_URI")
+RUN_ID = os.environ.get("RUN_ID")
+RESUME = os.environ.get("RESUME", "false").lower() == "true"
+
+# Per-stage profiling: wall time, rows/sec, downloaded bytes and latency histograms
+PROFILE = os.environ.get("PROFILE", "false").lower() == "true"
+PROFILE_URI = os.environ.get("PROFILE_URI")
+PROFILE_FORMAT = os.environ.get("PROFILE_FORMAT", "json")
+BATCH_FORMAT = os.environ.get("BATCH_FORMAT", "pandas")
+
 RAY_CLUSTER_HOST = os.environ.get("RAY_CLUSTER_HOST", "local")
+# Size the actor pools from the cluster and split image downloads into their own stage
+AUTOTUNE_ACTOR_POOLS = os.environ.get("AUTOTUNE_ACTOR_POOLS", "false").lower() == "true"
 
 # Configure logging at the module level safely
 try:
@@ -71,8 +107,11 @@ def preprocess_finetuning():
             "./datapreprocessing"
         ],  # Dynamically zips and ships local modules to workers
         "pip": [
+            "aiohttp==3.11.11",
             "google-cloud-storage==2.19.0",
             "spacy==3.7.6",
+            # Installed once per node with the runtime env instead of downloaded by every worker
+            "en_core_web_sm @ https://github.com/explosion/spacy-models/releases/download/en_core_web_sm-3.7.1/en_core_web_sm-3.7.1-py3-none-any.whl",
             "jsonpickle==4.0.1",
             "pandas==2.2.3",
             "pydantic==2.10.5",
@@ -87,7 +126,9 @@ def preprocess_finetuning():
     logger.info("Starting Ray Data Streaming Infrastructure Pipeline")
 
     # Initialize the modern streaming pipeline wrapper orchestrator
-    pipeline = RayDataPipelineOrchestrator(RAY_CLUSTER_HOST, ray_runtime_env)
+    pipeline = RayDataPipelineOrchestrator(
+        RAY_CLUSTER_HOST, ray_runtime_env, autotune=AUTOTUNE_ACTOR_POOLS
+    )
 
     # Execute lazy loading, parallel computing blocks, and concurrent writing streams
     try:
@@ -97,6 +138,22 @@ def preprocess_finetuning():
             output_bucket=OUTPUT_BUCKET,
             output_path=OUTPUT_CSV_FILE_PATH,
             output_image_folder=OUTPUT_IMAGE_FOLDER,
+            incremental_images=INCREMENTAL_IMAGES,
+            revalidate_images=REVALIDATE_IMAGES,
+            image_manifest_path=IMAGE_MANIFEST_PATH,
+            dedupe_images=DEDUPE_IMAGES,
+            dedupe_max_candidates=DEDUPE_MAX_CANDIDATES,
+            output_format=OUTPUT_FORMAT,
+            parquet_compression=PARQUET_COMPRESSION,
+            parquet_row_group_size=PARQUET_ROW_GROUP_SIZE,
+            partition_cols=PARTITION_COLS or None,
+            checkpoint_uri=CHECKPOINT_URI,
+            run_id=RUN_ID,
+            resume=RESUME,
+            profile=PROFILE,
+            profile_uri=PROFILE_URI,
+            profile_format=PROFILE_FORMAT,
+            batch_format=BATCH_FORMAT,
         )
     except Exception as e:
         logger.error(f"Ray Data Pipeline execution failed: {e}", exc_info=True)
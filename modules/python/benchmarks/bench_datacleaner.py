@@ -0,0 +1,184 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of the DataPreprocessor and DataPrepForRag transformations."""
+
+import re
+
+import jsonpickle
+import pandas as pd
+import pytest
+from datapreprocessing.datacleaner import DataPrepForRag, DataPreprocessor
+from datapreprocessing.image_fetcher import AsyncImageFetcher
+
+BUCKET = "bench-bucket"
+FOLDER = "images"
+
+
+@pytest.fixture(scope="module")
+def preprocessor(fake_gcs):
+    preprocessor = DataPreprocessor(nlp_batch_size=256)
+    # All images come from one local host, so requests queue behind its per-host
+    # connection limit; the default 5s budget includes that wait
+    preprocessor.image_fetcher = AsyncImageFetcher(
+        preprocessor.storage_client, timeout=60
+    )
+    yield preprocessor
+    preprocessor.image_fetcher.close()
+
+
+def _fresh_copy(df):
+    """pedantic() setup passing an unmodified copy of df to every round."""
+    return lambda: ((df.copy(),), {})
+
+
+def prep_cat_row_wise(preprocessor, df):
+    """Reference row-wise implementation prep_cat replaced."""
+    df["product_category_tree"] = df["product_category_tree"].apply(
+        preprocessor.reformat
+    )
+    splits = df["product_category_tree"].str.split(">>")
+    for i in range(6):
+        df[f"c{i}_name"] = splits.apply(
+            lambda x: x[i].strip() if isinstance(x, list) and len(x) > i else ""
+        )
+    return df.drop("product_category_tree", axis=1)
+
+
+def parse_attributes_original(specification):
+    """Reference implementation parse_attributes replaced."""
+    spec_match_one = re.compile("(.*?)\\[(.*)\\](.*)")
+    spec_match_two = re.compile('(.*?)=>"(.*?)"(.*?)=>"(.*?)"(.*)')
+    if pd.isna(specification):
+        return jsonpickle.encode({})
+
+    m = spec_match_one.match(str(specification))
+    out = {}
+    if m is not None and m.group(2) is not None:
+        phrase = ""
+        for c in m.group(2):
+            if c == "}":
+                m2 = spec_match_two.match(phrase)
+                if m2 and m2.group(2) is not None and m2.group(4) is not None:
+                    out[m2.group(2)] = m2.group(4)
+                phrase = ""
+            else:
+                phrase += c
+    return jsonpickle.encode(out)
+
+
+@pytest.mark.benchmark(group="prep_cat")
+def test_prep_cat(benchmark, preprocessor, product_datasets, rows):
+    df = product_datasets(rows)
+
+    result = benchmark.pedantic(preprocessor.prep_cat, setup=_fresh_copy(df), rounds=3)
+
+    assert len(result) == rows
+
+
+@pytest.mark.benchmark(group="prep_cat")
+def test_prep_cat_row_wise(benchmark, preprocessor, product_datasets, rows):
+    df = product_datasets(rows)
+
+    result = benchmark.pedantic(
+        prep_cat_row_wise,
+        setup=lambda: ((preprocessor, df.copy()), {}),
+        rounds=3,
+    )
+
+    pd.testing.assert_frame_equal(preprocessor.prep_cat(df.copy()), result)
+
+
+@pytest.mark.benchmark(group="parse_attributes")
+def test_parse_attributes(benchmark, preprocessor, product_datasets, rows):
+    specifications = product_datasets(rows)["product_specifications"]
+
+    result = benchmark.pedantic(
+        preprocessor.parse_attributes_column, args=(specifications,), rounds=3
+    )
+
+    assert len(result) == rows
+
+
+@pytest.mark.benchmark(group="parse_attributes")
+def test_parse_attributes_apply(benchmark, preprocessor, product_datasets, rows):
+    specifications = product_datasets(rows)["product_specifications"]
+
+    result = benchmark.pedantic(
+        specifications.apply, args=(preprocessor.parse_attributes,), rounds=3
+    )
+
+    pd.testing.assert_series_equal(
+        result, preprocessor.parse_attributes_column(specifications)
+    )
+
+
+@pytest.mark.benchmark(group="parse_attributes")
+def test_parse_attributes_original(benchmark, preprocessor, product_datasets, rows):
+    specifications = product_datasets(rows)["product_specifications"]
+
+    result = benchmark.pedantic(
+        specifications.apply, args=(parse_attributes_original,), rounds=3
+    )
+
+    pd.testing.assert_series_equal(
+        result, preprocessor.parse_attributes_column(specifications)
+    )
+
+
+@pytest.mark.benchmark(group="prep_product_desc")
+@pytest.mark.parametrize("nlp_batch_size", [None, 256], ids=["per_row", "batched"])
+def test_prep_product_desc(benchmark, fake_gcs, product_datasets, rows, nlp_batch_size):
+    pytest.importorskip("spacy")
+    preprocessor = DataPreprocessor(nlp_batch_size=nlp_batch_size)
+    # Load the spaCy model outside of the measured rounds
+    preprocessor.nlp
+    df = product_datasets(rows)[["description"]]
+
+    result = benchmark.pedantic(
+        preprocessor.prep_product_desc, setup=_fresh_copy(df), rounds=1
+    )
+
+    assert len(result) == rows
+
+
+@pytest.mark.benchmark(group="process_data")
+def test_process_data(benchmark, preprocessor, product_datasets, fake_gcs, rows):
+    pytest.importorskip("spacy")
+    df = product_datasets(rows)
+
+    result = benchmark.pedantic(
+        preprocessor.process_data,
+        setup=lambda: ((df.copy(), "bench-node", BUCKET, FOLDER), {}),
+        rounds=1,
+    )
+
+    assert result["image_uri"].notna().all()
+    assert (BUCKET, result["image_uri"].iloc[0].split("/", 3)[3]) in fake_gcs
+
+
+@pytest.mark.benchmark(group="process_rag_input")
+def test_process_rag_input(benchmark, preprocessor, product_datasets, rows):
+    # RAG input is the cleaned output; image_uri is set so no images are fetched
+    df = product_datasets(rows).assign(image_uri="gs://bench-bucket/images/0.jpg")
+    cleaned = preprocessor.prep_cat(df)
+    cleaned["attributes"] = preprocessor.parse_attributes_column(
+        cleaned.pop("product_specifications")
+    )
+
+    result = benchmark.pedantic(
+        DataPrepForRag().process_rag_input, setup=_fresh_copy(cleaned), rounds=3
+    )
+
+    assert 0 < len(result) < rows
@@ -0,0 +1,99 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""End-to-end benchmark of a local RayDataPipelineOrchestrator run.
+
+The dataset CSV lives in a temporary directory standing in for the input and output
+buckets: the driver-side read_csv and write_csv calls are redirected from 'gs://' to it,
+while images still go through the image stub and the fake GCS server.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+import ray
+from datapreprocessing.ray_data_pipeline import RayDataPipelineOrchestrator
+
+# Description parsing needs the real spaCy pipeline
+pytest.importorskip("spacy")
+
+
+@pytest.fixture
+def local_buckets(tmp_path, monkeypatch):
+    """Maps 'gs://<bucket>/<path>' to '<tmp_path>/<bucket>/<path>' for Ray Data I/O."""
+    read_csv, write_csv = ray.data.read_csv, ray.data.Dataset.write_csv
+
+    def local(uri):
+        return str(tmp_path / uri.removeprefix("gs://"))
+
+    monkeypatch.setattr(
+        ray.data, "read_csv", lambda uri, **kwargs: read_csv(local(uri), **kwargs)
+    )
+    monkeypatch.setattr(
+        ray.data.Dataset,
+        "write_csv",
+        lambda self, uri, **kwargs: write_csv(self, local(uri), **kwargs),
+    )
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def ray_session(fake_gcs):
+    """Local Ray session the orchestrator reuses instead of starting its own.
+
+    At least 4 logical CPUs are declared so the read tasks are never starved by the
+    preprocessing actors on small CI runners.
+    """
+    # DataPreprocessor probes the runtime context, which may have started a default session
+    ray.shutdown()
+    ray.init(
+        num_cpus=max(4, os.cpu_count() or 1),
+        include_dashboard=False,
+        runtime_env={
+            "env_vars": {
+                "STORAGE_EMULATOR_HOST": os.environ["STORAGE_EMULATOR_HOST"],
+                "PYTHONPATH": os.environ.get("PYTHONPATH", ""),
+            }
+        },
+    )
+    yield
+    ray.shutdown()
+
+
+@pytest.mark.benchmark(group="pipeline")
+@pytest.mark.parametrize("batch_format", ["pandas", "pyarrow"])
+def test_orchestrator_end_to_end(
+    benchmark, ray_session, local_buckets, product_datasets, rows, batch_format
+):
+    input_file = local_buckets / "bench-input" / "flipkart_raw.csv"
+    input_file.parent.mkdir()
+    product_datasets(rows).to_csv(input_file, index=False)
+
+    orchestrator = RayDataPipelineOrchestrator("local")
+    benchmark.pedantic(
+        orchestrator.execute,
+        kwargs={
+            "input_bucket": "bench-input",
+            "input_path": "flipkart_raw.csv",
+            "output_bucket": "bench-output",
+            "output_path": "flipkart.csv",
+            "output_image_folder": "images",
+            "batch_format": batch_format,
+        },
+        rounds=1,
+    )
+
+    output = pd.read_csv(local_buckets / "bench-output" / "flipkart.csv")
+    assert 0 < len(output) < rows
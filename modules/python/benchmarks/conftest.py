@@ -0,0 +1,244 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shared fixtures of the datapreprocessing benchmark suite.
+
+Image I/O never leaves the machine: product images are served by a local HTTP stub and
+uploads go to a fake Cloud Storage JSON API server, which the storage client picks up
+through STORAGE_EMULATOR_HOST (also inherited by local Ray workers).
+"""
+
+import contextlib
+import json
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+import pytest
+
+DEFAULT_ROWS = "1000"
+IMAGE_BYTES = b"\xff\xd8\xff" + b"0" * 20_000
+
+BRANDS = ["Alisha", "FabHomeDecor", "Sicons", "Kenneth Cole", "Rorschach"]
+CATEGORY_TREES = [
+    '["Clothing >> Women\'s Clothing >> Western Wear >> Tops >> Printed Tops"]',
+    '["Clothing >> Women\'s Clothing >> Lingerie, Sleep & Swimwear >> Shorts"]',
+    '["Clothing >> Men\'s Clothing >> T-Shirts >> Round Neck >> Solid"]',
+    '["Clothing >> Kids\' Clothing >> Girls Wear >> Dresses & Skirts >> Dresses"]',
+    '["Footwear >> Women\'s Footwear >> Ballerinas"]',
+    '["Home Furnishing >> Bed Linen >> Blankets, Quilts & Dohars"]',
+]
+SPEC_KEYS = {
+    "Fabric": ["Cotton", "Polyester", "Viscose", "Linen"],
+    "Pattern": ["Solid", "Printed", "Striped", "Checkered"],
+    "Sleeve": ["Full Sleeve", "Half Sleeve", "Sleeveless"],
+    "Ideal For": ["Women's", "Men's", "Girl's", "Boy's"],
+    "Occasion": ["Casual", "Formal", "Party"],
+}
+DESCRIPTION_WORDS = (
+    "key features of this stylish cotton top include a soft breathable fabric "
+    "perfect fit machine wash regular collar printed pattern for casual wear "
+    "buy online at best price with free shipping and cash on delivery"
+).split()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-rows",
+        default=DEFAULT_ROWS,
+        help="Comma-separated dataset sizes to benchmark, e.g. '1000,100000,1000000'.",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "rows" in metafunc.fixturenames:
+        sizes = [
+            int(size) for size in metafunc.config.getoption("bench_rows").split(",")
+        ]
+        metafunc.parametrize("rows", sizes, ids=[f"{size}rows" for size in sizes])
+
+
+def make_products(rows: int, image_base_url: str, seed: int = 0) -> pd.DataFrame:
+    """Generates a Flipkart-shaped raw product dataset.
+
+    Roughly one in four rows shares its primary image with another row and one in ten
+    lists a missing image first, so fallbacks and duplicate URLs are both exercised.
+
+    Args:
+        rows: Number of product rows.
+        image_base_url: Base URL of the image stub server.
+        seed: Random seed.
+
+    Returns:
+        DataFrame with the raw input columns of the preprocessing pipeline.
+    """
+    rng = random.Random(seed)
+    unique_images = max(1, rows * 3 // 4)
+    records = []
+    for i in range(rows):
+        spec_entries = [
+            f'{{"key"=>"{key}", "value"=>"{rng.choice(values)}"}}'
+            for key, values in rng.sample(list(SPEC_KEYS.items()), rng.randint(2, 5))
+        ]
+        images = [f"{image_base_url}/images/{rng.randrange(unique_images)}.jpg"]
+        if rng.random() < 0.1:
+            images.insert(0, f"{image_base_url}/missing/{i}.jpg")
+        records.append(
+            {
+                "uniq_id": f"{i:032x}",
+                "product_name": f"Product {i}",
+                "description": " ".join(rng.choices(DESCRIPTION_WORDS, k=40)),
+                "brand": rng.choice(BRANDS),
+                "image": json.dumps(images),
+                "product_specifications": '{"product_specification"=>['
+                + ", ".join(spec_entries)
+                + "]}",
+                "product_category_tree": rng.choice(CATEGORY_TREES),
+            }
+        )
+    return pd.DataFrame.from_records(records)
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, with_body: bool) -> None:
+        if not self.path.startswith("/images/"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(IMAGE_BYTES)))
+        self.send_header("ETag", '"bench"')
+        self.end_headers()
+        if with_body:
+            self.wfile.write(IMAGE_BYTES)
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FakeGcsHandler(BaseHTTPRequestHandler):
+    """Implements the multipart upload and object listing calls of the GCS JSON API."""
+
+    protocol_version = "HTTP/1.1"
+    objects: Dict[Tuple[str, str], Dict] = {}
+    lock = threading.Lock()
+
+    def _send_json(self, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        match = re.fullmatch(r"/upload/storage/v1/b/([^/]+)/o", url.path)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        boundary = re.search(r'boundary="?([^";]+)', self.headers["Content-Type"])
+        if match is None or boundary is None:
+            self.send_error(400)
+            return
+        # multipart/related: JSON object metadata, then the media
+        parts = body.split(b"--" + boundary.group(1).encode("utf-8"))
+        metadata = json.loads(parts[1].split(b"\r\n\r\n", 1)[1])
+        media = parts[2].split(b"\r\n\r\n", 1)[1][: -len(b"\r\n")]
+        resource = {
+            "bucket": match.group(1),
+            "name": metadata["name"],
+            "size": str(len(media)),
+            "generation": "1",
+            "metadata": metadata.get("metadata") or {},
+        }
+        with self.lock:
+            self.objects[(resource["bucket"], resource["name"])] = resource
+        self._send_json(resource)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        match = re.fullmatch(r"/storage/v1/b/([^/]+)/o", url.path)
+        if match is None:
+            self.send_error(404)
+            return
+        prefix = unquote(parse_qs(url.query).get("prefix", [""])[0])
+        with self.lock:
+            items = [
+                resource
+                for (bucket, name), resource in self.objects.items()
+                if bucket == match.group(1) and name.startswith(prefix)
+            ]
+        self._send_json({"kind": "storage#objects", "items": items})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept the image fetcher's full connection pool without resetting connections
+    request_queue_size = 256
+
+
+@contextlib.contextmanager
+def _serve(handler: type) -> Iterator[str]:
+    server = _StubServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="session")
+def image_server() -> Iterator[str]:
+    """Base URL of the local product image stub."""
+    with _serve(_ImageHandler) as url:
+        yield url
+
+
+@pytest.fixture(scope="session")
+def fake_gcs() -> Iterator[Dict[Tuple[str, str], Dict]]:
+    """Routes Cloud Storage clients to an in-memory fake and yields its objects."""
+    with _serve(_FakeGcsHandler) as url, pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("STORAGE_EMULATOR_HOST", url)
+        yield _FakeGcsHandler.objects
+
+
+@pytest.fixture(scope="session")
+def product_datasets(image_server):
+    """Caches generated product datasets by row count."""
+    datasets = {}
+
+    def get(rows: int) -> pd.DataFrame:
+        if rows not in datasets:
+            datasets[rows] = make_products(rows, image_server)
+        return datasets[rows]
+
+    return get
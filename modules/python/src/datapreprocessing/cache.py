@@ -0,0 +1,219 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-hash keyed memoization cache for expensive per-row text transformations."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ContentHashCache:
+    """Bounded in-process LRU cache with an optional SQLite tier shared on a node.
+
+    Entries are keyed by a namespace plus a hash of the input text, so the memory
+    footprint does not grow with the length of the cached inputs. When `sqlite_path`
+    is set, misses in memory are looked up on disk and new results are written back,
+    which lets every actor on the same node reuse work across batches and reruns.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        sqlite_path: Optional[str] = None,
+        flush_every: int = 500,
+    ):
+        """Initializes the ContentHashCache.
+
+        Args:
+            max_entries: Maximum number of entries held in the in-process LRU.
+            sqlite_path: Optional path of a SQLite file used as a shared on-disk tier.
+            flush_every: Number of pending disk writes buffered before they are committed.
+        """
+        self.max_entries = max_entries
+        self.sqlite_path = sqlite_path
+        self.flush_every = flush_every
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._pending: List[Tuple[str, str, str]] = []
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Returns the content hash used as the cache key for a text.
+
+        Args:
+            text: Input text.
+
+        Returns:
+            Hex digest of the text.
+        """
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, namespace: str, text: str) -> Optional[str]:
+        """Looks up a cached value, checking memory first and then the disk tier.
+
+        Args:
+            namespace: Logical cache partition (e.g. 'description').
+            text: Input text the value was computed from.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        key = (namespace, self.hash_text(text))
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM cache WHERE namespace = ? AND key = ?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, namespace: str, text: str, value: str) -> None:
+        """Stores a value computed from a text.
+
+        Args:
+            namespace: Logical cache partition (e.g. 'description').
+            text: Input text the value was computed from.
+            value: Value to cache.
+        """
+        key = (namespace, self.hash_text(text))
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._pending.append((key[0], key[1], value))
+                if len(self._pending) >= self.flush_every:
+                    self._flush_locked()
+
+    def get_or_compute(
+        self, namespace: str, text: str, compute: Callable[[str], str]
+    ) -> str:
+        """Returns the cached value for a text, computing and storing it on a miss.
+
+        Args:
+            namespace: Logical cache partition (e.g. 'description').
+            text: Input text.
+            compute: Function producing the value from the text.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        value = self.get(namespace, text)
+        if value is None:
+            value = compute(text)
+            self.put(namespace, text, value)
+        return value
+
+    def get_many(
+        self, namespace: str, texts: Iterable[str]
+    ) -> Tuple[Dict[str, str], List[str]]:
+        """Looks up many texts at once.
+
+        Args:
+            namespace: Logical cache partition (e.g. 'description').
+            texts: Input texts, possibly containing duplicates.
+
+        Returns:
+            Tuple of (mapping of found text to value, unique missing texts in first-seen order).
+        """
+        found = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            value = self.get(namespace, text)
+            if value is None:
+                missing.append(text)
+            else:
+                found[text] = value
+        return found, missing
+
+    def flush(self) -> None:
+        """Commits buffered writes to the disk tier."""
+        with self._lock:
+            self._flush_locked()
+
+    def stats(self) -> Dict[str, float]:
+        """Returns hit/miss counters for the cache.
+
+        Returns:
+            Dictionary with memory hits, disk hits, misses, hit rate and current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def close(self) -> None:
+        """Flushes pending writes and closes the disk tier."""
+        with self._lock:
+            self._flush_locked()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: Tuple[str, str], value: str) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _flush_locked(self) -> None:
+        if self._db is None or not self._pending:
+            return
+        try:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value) VALUES (?, ?, ?)",
+                    self._pending,
+                )
+        except sqlite3.Error as err:
+            logger.warning(
+                f"Failed to persist {len(self._pending)} cache entries: {err}"
+            )
+        self._pending = []
@@ -0,0 +1,120 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Block-level checkpoints of preprocessed batches on GCS or local storage."""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Iterable, List, Set, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+
+def new_run_id() -> str:
+    """Generates a sortable, unique pipeline run identifier."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class CheckpointStore:
+    """Persists completed output batches of one pipeline run.
+
+    Every batch is written as `<root>/<run_id>/blocks/<key>.parquet`, followed by a
+    `<root>/<run_id>/done/<key>.json` marker listing the input uniq_ids it covers. The
+    marker is only written once the data file is complete, so a batch interrupted midway
+    is simply reprocessed on resume. Keys are content hashes of the batch's uniq_ids, so
+    rewriting the same batch is idempotent.
+    """
+
+    def __init__(self, root_uri: str, run_id: str):
+        """Initializes the CheckpointStore.
+
+        Args:
+            root_uri: Local directory or 'gs://bucket/path' URI holding all runs.
+            run_id: Identifier of the run whose checkpoints are read and written.
+        """
+        self.root_uri = root_uri.rstrip("/")
+        self.run_id = run_id
+        self.run_uri = f"{self.root_uri}/{run_id}"
+        self._fs, self._run_path = pafs.FileSystem.from_uri(self.run_uri)
+        self._fs.create_dir(f"{self._run_path}/blocks", recursive=True)
+        self._fs.create_dir(f"{self._run_path}/done", recursive=True)
+
+    @staticmethod
+    def block_key(uniq_ids: Iterable) -> str:
+        """Returns the content hash identifying a batch by its input uniq_ids."""
+        digest = hashlib.blake2b(digest_size=16)
+        for uniq_id in uniq_ids:
+            digest.update(str(uniq_id).encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def write_block(self, uniq_ids: List, df: Union[pd.DataFrame, pa.Table]) -> str:
+        """Persists one processed batch and marks its input rows as completed.
+
+        Args:
+            uniq_ids: uniq_id values of the batch's input rows.
+            df: Processed output batch, as a DataFrame or Arrow table.
+
+        Returns:
+            The block key.
+        """
+        uniq_ids = [str(uniq_id) for uniq_id in uniq_ids]
+        key = self.block_key(uniq_ids)
+        data_file = None
+        if len(df):
+            table = (
+                df
+                if isinstance(df, pa.Table)
+                else pa.Table.from_pandas(df, preserve_index=False)
+            )
+            data_file = f"blocks/{key}.parquet"
+            with self._fs.open_output_stream(f"{self._run_path}/{data_file}") as f:
+                pq.write_table(table, f)
+
+        marker = json.dumps({"uniq_ids": uniq_ids, "data": data_file})
+        with self._fs.open_output_stream(f"{self._run_path}/done/{key}.json") as f:
+            f.write(marker.encode("utf-8"))
+        return key
+
+    def completed(self) -> Tuple[Set[str], List[str]]:
+        """Lists the completed blocks of the run.
+
+        Returns:
+            Tuple of (completed input uniq_ids, URIs of their checkpointed data files).
+        """
+        completed_ids = set()
+        data_uris = []
+        selector = pafs.FileSelector(f"{self._run_path}/done", allow_not_found=True)
+        for info in self._fs.get_file_info(selector):
+            if not info.path.endswith(".json"):
+                continue
+            with self._fs.open_input_stream(info.path) as f:
+                marker = json.loads(f.read().decode("utf-8"))
+            completed_ids.update(marker["uniq_ids"])
+            if marker["data"]:
+                data_uris.append(f"{self.run_uri}/{marker['data']}")
+
+        logger.info(
+            f"Run {self.run_id} has {len(completed_ids)} completed rows "
+            f"in {len(data_uris)} checkpointed blocks"
+        )
+        return completed_ids, sorted(data_uris)
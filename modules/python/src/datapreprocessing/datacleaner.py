@@ -14,18 +14,28 @@
 
 """Data cleaning and preprocessing routines for Ray data processing workflows."""
 
+import contextlib
+import fcntl
+import importlib
+import json
 import logging
 import os
 import re
 import socket
+import tempfile
+import time
 import urllib.error
 import urllib.request
 from concurrent.futures import ThreadPoolExecutor
-from typing import List
+from typing import ContextManager, Dict, Iterable, List, Optional, Sequence, Tuple
 
-import jsonpickle
+import numpy as np
 import pandas as pd
 import ray
+from datapreprocessing.cache import ContentHashCache
+from datapreprocessing.image_fetcher import AsyncImageFetcher
+from datapreprocessing.image_index import UploadedImageIndex, source_metadata
+from datapreprocessing.profiling import PipelineProfile
 from google.cloud import storage
 from google.cloud.storage.retry import DEFAULT_RETRY
 
@@ -35,6 +45,81 @@ except ImportError:
     from unittest.mock import MagicMock
 
     spacy = MagicMock()
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+SPACY_MODEL = "en_core_web_sm"
+# Node-wide lock serializing model downloads between the worker processes of a node
+SPACY_DOWNLOAD_LOCK = os.path.join(
+    tempfile.gettempdir(), "datapreprocessing_spacy.lock"
+)
+
+# Outer "[...]" block of a raw product_specifications string
+SPEC_BLOCK_PATTERN = re.compile("(.*?)\\[(.*)\\](.*)")
+# First two '=>"..."' values of one '{...}' entry inside that block (key, value)
+SPEC_PAIR_PATTERN = re.compile('(.*?)=>"(.*?)"(.*?)=>"(.*?)"(.*)')
+
+logger = logging.getLogger(__name__)
+
+
+def load_spacy_model(name: str, exclude: Iterable[str] = ()):
+    """Loads a spaCy model, downloading it at most once per node when it is missing.
+
+    Pipeline components listed in `exclude` are never loaded, which shortens the load and
+    shrinks the per-process model. Concurrent workers on a node serialize on a file lock,
+    so only the first one runs `spacy.cli.download` and the others load its result.
+
+    Args:
+        name: spaCy model package name.
+        exclude: Pipeline components to leave out.
+
+    Returns:
+        The loaded spaCy Language pipeline.
+    """
+    exclude = list(exclude)
+    try:
+        return spacy.load(name, exclude=exclude)
+    except OSError:
+        pass
+
+    with open(SPACY_DOWNLOAD_LOCK, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            # Another worker of the node may have finished the download meanwhile
+            return spacy.load(name, exclude=exclude)
+        except OSError:
+            logger.info(f"Downloading spacy model '{name}' on worker process...")
+            spacy.cli.download(name)
+            importlib.invalidate_caches()
+            return spacy.load(name, exclude=exclude)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def parse_specification(specification: str) -> str:
+    """Parses a raw product specification string into JSON-encoded key-value attributes.
+
+    Every '}'-terminated entry inside the outer brackets is matched once against the
+    precompiled SPEC_PAIR_PATTERN; text after the last '}' is ignored.
+
+    Args:
+        specification: Raw, non-null product specification string.
+
+    Returns:
+        JSON-encoded string representing the key-value attribute dictionary.
+    """
+    out = {}
+    m = SPEC_BLOCK_PATTERN.match(specification)
+    if m is not None:
+        for phrase in m.group(2).split("}")[:-1]:
+            m2 = SPEC_PAIR_PATTERN.match(phrase)
+            if m2:
+                out[m2.group(2)] = m2.group(4)
+    return json.dumps(out)
 
 
 class DataPreprocessor:
@@ -42,8 +127,53 @@ class DataPreprocessor:
 
     logger = logging.getLogger(__name__)
 
-    def __init__(self):
-        """Initializes the DataPreprocessor instance, GCS client, thread pool, and spaCy NLP pipeline."""
+    # spaCy components the description filter never reads (it only needs lemma_, is_stop, is_alpha);
+    # they are excluded when the model is loaded and disabled on injected pipelines
+    NLP_UNUSED_PIPES = ["parser", "ner"]
+
+    def __init__(
+        self,
+        nlp_batch_size: Optional[int] = None,
+        nlp_n_process: int = 1,
+        cache: Optional[ContentHashCache] = None,
+        image_fetcher: Optional[AsyncImageFetcher] = None,
+        incremental_images: bool = False,
+        revalidate_images: bool = False,
+        image_manifest_path: Optional[str] = None,
+        profile: Optional[PipelineProfile] = None,
+    ):
+        """Initializes the DataPreprocessor instance, GCS client and thread pool sizing.
+
+        The spaCy NLP pipeline is only loaded on first use of `nlp`.
+
+        Args:
+            nlp_batch_size: When set, descriptions are streamed through `nlp.pipe` in batches
+                of this size instead of being parsed one row at a time.
+            nlp_n_process: Number of processes `nlp.pipe` may use in batched mode.
+            cache: Optional content-hash cache memoizing description and attribute parsing.
+            image_fetcher: Optional asynchronous, connection-pooled image fetcher. When set it
+                replaces the urllib/thread pool download path in get_product_image.
+            incremental_images: Skip images already present in the destination folder.
+                The folder is listed once per instance and kept as an UploadedImageIndex.
+            revalidate_images: In incremental mode, issue a HEAD request for each present
+                image and refetch it when its ETag or size changed at the source.
+            image_manifest_path: Optional local or 'gs://' JSON manifest to build the
+                incremental index from instead of listing the destination folder.
+            profile: Optional profile recording per-stage wall time, downloaded bytes and
+                download/upload latencies.
+        """
+        self.nlp_batch_size = nlp_batch_size
+        self.nlp_n_process = nlp_n_process
+        self.cache = cache
+        self.image_fetcher = image_fetcher
+        self.last_image_fetch_stats = None
+        self.incremental_images = incremental_images
+        self.revalidate_images = revalidate_images
+        self.image_manifest_path = image_manifest_path
+        self.image_index = None
+        self._image_index_location = None
+        self.profile = profile
+
         # 1. Instantiate the storage client ONCE per worker process initialization
         self.storage_client = storage.Client()
 
@@ -66,19 +196,25 @@ class DataPreprocessor:
                 f"Fallback context: Initialized {self.max_workers} threads based on system CPU core count ({cores})."
             )
 
-        # 3. Load or download the spaCy model ONCE per worker process initialization
-        self.nlp = None
-        if spacy is not None:
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-            except OSError:
-                self.logger.info(
-                    "Downloading spacy model 'en_core_web_sm' on worker process..."
-                )
-                spacy.cli.download("en_core_web_sm")
-                self.nlp = spacy.load("en_core_web_sm")
-
-    def extract_url(self, image_list: str) -> List[str]:
+        # 3. The spaCy model is loaded on first NLP use, so image-only workers never pay for it
+        self._nlp = None
+        self._nlp_loaded = False
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first use."""
+        if not self._nlp_loaded:
+            self._nlp = load_spacy_model(SPACY_MODEL, exclude=self.NLP_UNUSED_PIPES)
+            self._nlp_loaded = True
+        return self._nlp
+
+    @nlp.setter
+    def nlp(self, nlp) -> None:
+        self._nlp = nlp
+        self._nlp_loaded = True
+
+    @staticmethod
+    def extract_url(image_list: str) -> List[str]:
         """Extracts individual image URLs from a formatted string or list representation.
 
         Args:
@@ -118,8 +254,17 @@ class DataPreprocessor:
         # 1. Attempt Download
         try:
             socket.setdefaulttimeout(5)
-            urllib.request.urlretrieve(image_url, download_file)
+            start = time.perf_counter()
+            _, headers = urllib.request.urlretrieve(image_url, download_file)
+            source_etag = headers.get("ETag")
+            if self.profile is not None:
+                self.profile.observe(
+                    "download_latency_seconds", time.perf_counter() - start
+                )
+                self.profile.add("bytes_downloaded", os.path.getsize(download_file))
         except Exception as err:
+            if self.profile is not None:
+                self.profile.add("download_failures")
             self.logger.warning(
                 f"ray_worker_node_id:{ray_worker_node_id} Failed to download image {image_url}: {err}"
             )
@@ -131,8 +276,24 @@ class DataPreprocessor:
         try:
             bucket = self.storage_client.bucket(gcs_bucket)
             blob = bucket.blob(destination_blob_name)
+            blob.metadata = source_metadata(image_url, source_etag)
+            start = time.perf_counter()
             blob.upload_from_filename(download_file, retry=DEFAULT_RETRY)
+            if self.profile is not None:
+                self.profile.observe(
+                    "upload_latency_seconds", time.perf_counter() - start
+                )
+                self.profile.add("images_uploaded")
+            if self.image_index is not None:
+                self.image_index.record(
+                    destination_blob_name,
+                    image_url,
+                    source_etag,
+                    os.path.getsize(download_file),
+                )
         except Exception as err:
+            if self.profile is not None:
+                self.profile.add("upload_failures")
             self.logger.warning(
                 f"ray_worker_node_id:{ray_worker_node_id} Failed to upload image {destination_blob_name} to GCS: {err}"
             )
@@ -148,37 +309,114 @@ class DataPreprocessor:
 
         return True
 
-    def _process_single_row_image(
-        self, row: dict, ray_worker_node_id: str, gcs_bucket: str, gcs_folder: str
-    ) -> str:
-        """Helper processing callback targeted by the asynchronous thread pool.
+    @staticmethod
+    def image_candidates(
+        prod_id: str, image_list: str, gcs_folder: str
+    ) -> List[Tuple[str, str]]:
+        """Lists the ordered image URLs of a row with their destination blob names.
 
         Args:
-            row: Dictionary representing a single record/row in the dataset.
-            ray_worker_node_id: Identifier of the current Ray worker node.
-            gcs_bucket: Destination GCS bucket name.
+            prod_id: Unique product identifier of the row.
+            image_list: Raw string representation of the row's image URL list.
             gcs_folder: Destination directory path inside the GCS bucket.
 
         Returns:
-            The GCS URI (gs://...) of the first successfully uploaded image, or None.
+            List of (image URL, destination blob name) tuples.
         """
-        prod_id = row.get("uniq_id")
-        image_list = row.get("image")
-
         if pd.isnull(image_list):
-            return None
+            return []
 
-        image_urls = self.extract_url(image_list)
-        for index, url in enumerate(image_urls):
+        candidates = []
+        for index, url in enumerate(DataPreprocessor.extract_url(image_list)):
             url_clean = url.strip()
-            if not url_clean:
-                continue
+            if url_clean:
+                candidates.append((url_clean, f"{gcs_folder}/{prod_id}_{index}.jpg"))
+        return candidates
+
+    def _get_image_index(
+        self, gcs_bucket: str, gcs_folder: str
+    ) -> Optional[UploadedImageIndex]:
+        """Returns the index of already uploaded images, building it on first use.
+
+        Args:
+            gcs_bucket: Destination GCS bucket name.
+            gcs_folder: Destination directory path inside the GCS bucket.
+
+        Returns:
+            The UploadedImageIndex, or None when incremental mode is disabled.
+        """
+        if not self.incremental_images:
+            return None
+        if self.image_index is None or self._image_index_location != (
+            gcs_bucket,
+            gcs_folder,
+        ):
+            if self.image_manifest_path:
+                self.image_index = UploadedImageIndex.from_manifest(
+                    self.image_manifest_path, self.storage_client
+                )
+            else:
+                self.image_index = UploadedImageIndex.from_listing(
+                    self.storage_client, gcs_bucket, gcs_folder
+                )
+            self._image_index_location = (gcs_bucket, gcs_folder)
+        return self.image_index
+
+    def _is_already_uploaded(self, image_url: str, destination_blob_name: str) -> bool:
+        """Checks the incremental index for an up-to-date copy of an image.
+
+        Args:
+            image_url: Source URL of the image.
+            destination_blob_name: Target path/blob name in the GCS bucket.
+
+        Returns:
+            True if the image can be skipped, False if it has to be (re)fetched.
+        """
+        if self.image_index is None:
+            return False
+        record = self.image_index.lookup(destination_blob_name, image_url)
+        if record is None:
+            return False
+        if not self.revalidate_images:
+            return True
+        try:
+            request = urllib.request.Request(image_url, method="HEAD")
+            with urllib.request.urlopen(request, timeout=5) as response:
+                source_etag = response.headers.get("ETag")
+                content_length = response.headers.get("Content-Length")
+        except Exception as err:
+            # Keep the existing copy when the source cannot be revalidated
+            self.logger.debug(f"Failed to revalidate image {image_url}: {err}")
+            return True
+        return record.is_unchanged(
+            source_etag, int(content_length) if content_length else None
+        )
+
+    def _upload_first_image(
+        self,
+        candidates: List[Tuple[str, str]],
+        ray_worker_node_id: str,
+        gcs_bucket: str,
+    ) -> Optional[str]:
+        """Helper processing callback targeted by the asynchronous thread pool.
 
-            image_file_name = f"{prod_id}_{index}.jpg"
-            destination_blob_name = f"{gcs_folder}/{prod_id}_{index}.jpg"
+        Args:
+            candidates: Ordered (image URL, destination blob name) tuples of one row.
+            ray_worker_node_id: Identifier of the current Ray worker node.
+            gcs_bucket: Destination GCS bucket name.
 
+        Returns:
+            The GCS URI (gs://...) of the first successfully uploaded image, or None.
+        """
+        for url, destination_blob_name in candidates:
+            if self._is_already_uploaded(url, destination_blob_name):
+                self.logger.debug(
+                    f"ray_worker_node_id:{ray_worker_node_id} Skipping already uploaded image {destination_blob_name}"
+                )
+                return f"gs://{gcs_bucket}/{destination_blob_name}"
+            image_file_name = os.path.basename(destination_blob_name)
             success = self.download_image(
-                url_clean,
+                url,
                 image_file_name,
                 destination_blob_name,
                 ray_worker_node_id,
@@ -188,69 +426,228 @@ class DataPreprocessor:
                 return f"gs://{gcs_bucket}/{destination_blob_name}"
         return None
 
-    def get_product_image(
+    def fetch_images(
         self,
-        df: pd.DataFrame,
+        candidates: List[List[Tuple[str, str]]],
         ray_worker_node_id: str,
         gcs_bucket: str,
         gcs_folder: str,
-    ) -> pd.DataFrame:
-        """Downloads product images in parallel for a batch and appends GCS image URIs.
+    ) -> List[Optional[str]]:
+        """Uploads the first available image of every candidate list to GCS.
 
         Args:
-            df: Input DataFrame containing product records.
+            candidates: Per row, the ordered (image URL, destination blob name) tuples.
             ray_worker_node_id: Identifier of the current Ray worker node.
             gcs_bucket: Name of the destination GCS bucket.
             gcs_folder: Destination subfolder in the GCS bucket.
 
         Returns:
-            DataFrame with an added 'image_uri' column containing GCS image paths.
+            GCS URI of the first uploaded image of every row, or None.
         """
-        # Convert the batch chunks cleanly to records for thread-safe isolation
-        records = df.to_dict(orient="records")
+        image_index = self._get_image_index(gcs_bucket, gcs_folder)
+
+        if self.image_fetcher is not None:
+            gcs_image_urls, self.last_image_fetch_stats = self.image_fetcher.fetch_rows(
+                candidates,
+                gcs_bucket,
+                ray_worker_node_id,
+                image_index=image_index,
+                revalidate=self.revalidate_images,
+            )
+            return gcs_image_urls
 
         # Parallelize downloading across the dynamic, calculated thread limits
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = [
                 executor.submit(
-                    self._process_single_row_image,
-                    row,
+                    self._upload_first_image,
+                    row_candidates,
                     ray_worker_node_id,
                     gcs_bucket,
-                    gcs_folder,
                 )
-                for row in records
+                for row_candidates in candidates
             ]
-            gcs_image_urls = [f.result() for f in futures]
+            return [f.result() for f in futures]
 
-        df["image_uri"] = gcs_image_urls
+    def get_product_image(
+        self,
+        df: pd.DataFrame,
+        ray_worker_node_id: str,
+        gcs_bucket: str,
+        gcs_folder: str,
+    ) -> pd.DataFrame:
+        """Downloads product images in parallel for a batch and appends GCS image URIs.
+
+        Args:
+            df: Input DataFrame containing product records.
+            ray_worker_node_id: Identifier of the current Ray worker node.
+            gcs_bucket: Name of the destination GCS bucket.
+            gcs_folder: Destination subfolder in the GCS bucket.
+
+        Returns:
+            DataFrame with an added 'image_uri' column containing GCS image paths.
+        """
+        candidates = [
+            self.image_candidates(prod_id, image_list, gcs_folder)
+            for prod_id, image_list in zip(df["uniq_id"], df["image"])
+        ]
+        df["image_uri"] = self.fetch_images(
+            candidates, ray_worker_node_id, gcs_bucket, gcs_folder
+        )
         return df
 
+    def get_product_image_table(
+        self,
+        table: "pa.Table",
+        ray_worker_node_id: str,
+        gcs_bucket: str,
+        gcs_folder: str,
+    ) -> "pa.Table":
+        """Arrow-native get_product_image: appends GCS image URIs to a product table.
+
+        Only the 'uniq_id' and 'image' columns are converted to Python objects, since
+        building the download requests needs them anyway.
+
+        Args:
+            table: Input Arrow table containing product records.
+            ray_worker_node_id: Identifier of the current Ray worker node.
+            gcs_bucket: Name of the destination GCS bucket.
+            gcs_folder: Destination subfolder in the GCS bucket.
+
+        Returns:
+            Table with an added 'image_uri' string column.
+        """
+        candidates = [
+            self.image_candidates(prod_id, image_list, gcs_folder)
+            for prod_id, image_list in zip(
+                table.column("uniq_id").to_pylist(), table.column("image").to_pylist()
+            )
+        ]
+        image_uris = self.fetch_images(
+            candidates, ray_worker_node_id, gcs_bucket, gcs_folder
+        )
+        return table.append_column("image_uri", pa.array(image_uris, pa.string()))
+
+    @staticmethod
+    def _join_lemmas(doc: Iterable) -> str:
+        """Joins the unique, non-stop-word alphabetic lemmas of a parsed spaCy document.
+
+        Args:
+            doc: Parsed spaCy document (or any iterable of tokens).
+
+        Returns:
+            Space separated lemmas in first-seen order.
+        """
+        lemmas = [token.lemma_ for token in doc if not token.is_stop and token.is_alpha]
+        return " ".join(dict.fromkeys(lemmas))
+
+    def _parse_nlp_text(self, text: str) -> str:
+        """Runs the spaCy pipeline on an already lower-cased description."""
+        try:
+            return self._join_lemmas(self.nlp(text))
+        except Exception:
+            return "None"
+
+    def parse_nlp_description(self, description: str) -> str:
+        """Cleans a single product description with the spaCy NLP pipeline.
+
+        Args:
+            description: Raw product description.
+
+        Returns:
+            Cleaned/lemmatized description, or "None" when it cannot be parsed.
+        """
+        if not description or pd.isna(description) or not self.nlp:
+            return "None"
+        text = str(description).lower()
+        if self.cache is not None:
+            return self.cache.get_or_compute("description", text, self._parse_nlp_text)
+        return self._parse_nlp_text(text)
+
+    def _parse_nlp_descriptions_batched(self, descriptions: Sequence) -> List[str]:
+        """Streams a description column through `nlp.pipe`, preserving row order.
+
+        Each distinct description is parsed once per call, and descriptions already in
+        the cache are not parsed at all.
+
+        Args:
+            descriptions: Series (or list) of raw product descriptions.
+
+        Returns:
+            Cleaned descriptions in the same order as the input.
+        """
+        if not self.nlp:
+            return ["None"] * len(descriptions)
+
+        texts = [
+            (
+                None
+                if not description or pd.isna(description)
+                else str(description).lower()
+            )
+            for description in descriptions
+        ]
+        unique_texts = [text for text in dict.fromkeys(texts) if text is not None]
+        if self.cache is not None:
+            parsed, unique_texts = self.cache.get_many("description", unique_texts)
+        else:
+            parsed = {}
+
+        if not unique_texts:
+            return ["None" if text is None else parsed[text] for text in texts]
+
+        disabled_pipes = [
+            pipe for pipe in self.NLP_UNUSED_PIPES if pipe in self.nlp.pipe_names
+        ]
+        try:
+            docs = self.nlp.pipe(
+                unique_texts,
+                batch_size=self.nlp_batch_size,
+                n_process=self.nlp_n_process,
+                disable=disabled_pipes,
+            )
+            for text, doc in zip(unique_texts, docs):
+                parsed[text] = self._join_lemmas(doc)
+            # zip stops at the shorter side, parse the texts a short stream skipped
+            missing_texts = [text for text in unique_texts if text not in parsed]
+            if missing_texts:
+                self.logger.warning(
+                    f"nlp.pipe returned {len(unique_texts) - len(missing_texts)} of "
+                    f"{len(unique_texts)} documents, parsing the others per row"
+                )
+                for text in missing_texts:
+                    parsed[text] = self._parse_nlp_text(text)
+        except Exception as err:
+            # A single bad document aborts the whole stream, so fall back to per-row parsing
+            self.logger.warning(
+                f"Batched spaCy parsing failed, falling back to per-row parsing: {err}"
+            )
+            for text in unique_texts:
+                parsed[text] = self._parse_nlp_text(text)
+
+        if self.cache is not None:
+            for text in unique_texts:
+                self.cache.put("description", text, parsed[text])
+            self.cache.flush()
+
+        return ["None" if text is None else parsed[text] for text in texts]
+
     def prep_product_desc(self, df: pd.DataFrame) -> pd.DataFrame:
         """Cleans product description text using spaCy NLP lemmatization and stop-word removal.
 
+        Descriptions are parsed in batches via `nlp.pipe` when `nlp_batch_size` is configured,
+        otherwise one row at a time.
+
         Args:
             df: Input DataFrame containing a 'description' column.
 
         Returns:
             DataFrame with cleaned/lemmatized 'description' column.
         """
-
-        def parse_nlp_description(description: str) -> str:
-            if not description or pd.isna(description) or not self.nlp:
-                return "None"
-            try:
-                doc = self.nlp(str(description).lower())
-                lemmas = [
-                    token.lemma_
-                    for token in doc
-                    if not token.is_stop and token.is_alpha
-                ]
-                return " ".join(dict.fromkeys(lemmas))
-            except Exception:
-                return "None"
-
-        df["description"] = df["description"].apply(parse_nlp_description)
+        if self.nlp_batch_size:
+            df["description"] = self._parse_nlp_descriptions_batched(df["description"])
+        else:
+            df["description"] = df["description"].apply(self.parse_nlp_description)
         return df
 
     def parse_attributes(self, specification: str) -> str:
@@ -262,24 +659,50 @@ class DataPreprocessor:
         Returns:
             JSON-encoded string representing the key-value attribute dictionary.
         """
-        spec_match_one = re.compile("(.*?)\\[(.*)\\](.*)")
-        spec_match_two = re.compile('(.*?)=>"(.*?)"(.*?)=>"(.*?)"(.*)')
         if pd.isna(specification):
-            return jsonpickle.encode({})
-
-        m = spec_match_one.match(str(specification))
-        out = {}
-        if m is not None and m.group(2) is not None:
-            phrase = ""
-            for c in m.group(2):
-                if c == "}":
-                    m2 = spec_match_two.match(phrase)
-                    if m2 and m2.group(2) is not None and m2.group(4) is not None:
-                        out[m2.group(2)] = m2.group(4)
-                    phrase = ""
-                else:
-                    phrase += c
-        return jsonpickle.encode(out)
+            return json.dumps({})
+        if self.cache is not None:
+            return self.cache.get_or_compute(
+                "attributes", str(specification), parse_specification
+            )
+        return parse_specification(str(specification))
+
+    def parse_attributes_column(self, specifications: pd.Series) -> pd.Series:
+        """Parses a whole product_specifications column, parsing each distinct value once.
+
+        Args:
+            specifications: Series of raw product specification strings.
+
+        Returns:
+            Series of JSON-encoded attribute dictionaries aligned with the input index.
+        """
+        codes, uniques = pd.factorize(specifications)
+        # Missing values are coded -1, which selects the trailing empty dictionary
+        parsed = np.array(
+            [self.parse_attributes(spec) for spec in uniques] + [json.dumps({})],
+            dtype=object,
+        )
+        return pd.Series(
+            parsed[codes], index=specifications.index, name=specifications.name
+        )
+
+    def parse_attributes_array(self, specifications: "pa.ChunkedArray") -> "pa.Array":
+        """Arrow-native parse_attributes_column: parses each distinct value once.
+
+        Args:
+            specifications: Arrow column of raw product specification strings.
+
+        Returns:
+            String array of JSON-encoded attribute dictionaries aligned with the input.
+        """
+        specifications = pc.cast(specifications, pa.string())
+        uniques = pc.drop_null(pc.unique(specifications))
+        parsed = pa.array(
+            [self.parse_attributes(spec) for spec in uniques.to_pylist()], pa.string()
+        )
+        # Missing values have no index and get the empty dictionary
+        codes = pc.index_in(specifications, value_set=uniques)
+        return pc.fill_null(pc.take(parsed, codes), json.dumps({}))
 
     def reformat(self, text: str) -> str:
         """Strips bracket and quote formatting characters from raw category strings.
@@ -294,6 +717,61 @@ class DataPreprocessor:
             return ""
         return str(text).replace("[", "").replace("]", "").replace('"', "")
 
+    def _split_category_levels(self, trees: pd.Series, max_levels: int) -> pd.DataFrame:
+        """Vectorized equivalent of reformatting and splitting every category tree row by row.
+
+        Uses Arrow compute kernels when pyarrow is available, since pandas string accessors
+        on object columns still loop in Python; otherwise falls back to those accessors.
+
+        Args:
+            trees: Series of raw category tree strings.
+            max_levels: Number of category levels to return.
+
+        Returns:
+            DataFrame with columns 0..max_levels-1 of stripped level names ('' when absent).
+        """
+        trees = trees.where(trees.notna(), "").astype(str)
+        if pc is None:
+            levels = (
+                trees.str.replace(r'[\[\]"]', "", regex=True)
+                .str.split(">>", expand=True)
+                .reindex(columns=range(max_levels))
+            )
+            return pd.DataFrame(
+                {i: levels[i].fillna("").astype(str).str.strip() for i in levels},
+                index=trees.index,
+            )
+
+        levels = self._split_category_arrays(
+            pa.array(trees.to_numpy(), type=pa.string()), max_levels
+        )
+        return pd.DataFrame(
+            {i: level.to_numpy(zero_copy_only=False) for i, level in enumerate(levels)},
+            index=trees.index,
+        )
+
+    @staticmethod
+    def _split_category_arrays(trees: "pa.Array", max_levels: int) -> List["pa.Array"]:
+        """Splits non-null category tree strings into per-level Arrow string arrays.
+
+        Args:
+            trees: Arrow string array (or chunked array) of raw category trees.
+            max_levels: Number of category levels to return.
+
+        Returns:
+            One array of stripped level names ('' when absent) per level.
+        """
+        cleaned = pc.replace_substring_regex(trees, r'[\[\]"]', "")
+        splits = pc.split_pattern(cleaned, ">>")
+        levels = []
+        for i in range(max_levels):
+            # Fixed-size slices pad trees with fewer levels with nulls
+            level = pc.list_flatten(
+                pc.list_slice(splits, i, i + 1, return_fixed_size_list=True)
+            )
+            levels.append(pc.fill_null(pc.utf8_trim_whitespace(level), ""))
+        return levels
+
     def prep_cat(self, df: pd.DataFrame) -> pd.DataFrame:
         """Splits category hierarchy trees into static categorical columns (c0_name .. c5_name).
 
@@ -303,19 +781,47 @@ class DataPreprocessor:
         Returns:
             DataFrame with split category columns and original tree dropped.
         """
-        df["product_category_tree"] = df["product_category_tree"].apply(self.reformat)
-        splits = df["product_category_tree"].str.split(">>")
-
         # Enforce exactly 6 static categorical dimensions to prevent cross-batch schema errors
         max_levels = 6
+        levels = self._split_category_levels(df["product_category_tree"], max_levels)
         for i in range(max_levels):
-            df[f"c{i}_name"] = splits.apply(
-                lambda x: x[i].strip() if isinstance(x, list) and len(x) > i else ""
-            )
+            df[f"c{i}_name"] = levels[i]
 
         df = df.drop("product_category_tree", axis=1)
         return df
 
+    def prep_cat_table(self, table: "pa.Table") -> "pa.Table":
+        """Arrow-native prep_cat, appending the category columns as Arrow arrays.
+
+        Args:
+            table: Input Arrow table with a 'product_category_tree' column.
+
+        Returns:
+            Table with split category columns and original tree dropped.
+        """
+        max_levels = 6
+        trees = pc.fill_null(
+            pc.cast(table.column("product_category_tree"), pa.string()), ""
+        )
+        table = table.drop_columns("product_category_tree")
+        for i, level in enumerate(self._split_category_arrays(trees, max_levels)):
+            table = table.append_column(f"c{i}_name", level)
+        return table
+
+    def profile_stage(self, name: str, rows: int) -> ContextManager:
+        """Times the enclosed block as a profile stage when profiling is enabled.
+
+        Args:
+            name: Stage name.
+            rows: Number of rows the block processes.
+
+        Returns:
+            Context manager timing the block, or a no-op one without a profile.
+        """
+        if self.profile is None:
+            return contextlib.nullcontext()
+        return self.profile.stage(name, rows)
+
     def process_data(
         self,
         df: pd.DataFrame,
@@ -334,17 +840,183 @@ class DataPreprocessor:
         Returns:
             Fully cleaned and preprocessed DataFrame.
         """
-        df_processed = self.get_product_image(
-            df, ray_worker_node_id, gcs_bucket, gcs_folder
-        )
-        df_processed = self.prep_product_desc(df_processed)
-        df_processed["attributes"] = df_processed["product_specifications"].apply(
-            self.parse_attributes
-        )
-        df_processed = df_processed.drop("product_specifications", axis=1)
-        df_processed = self.prep_cat(df_processed)
+        rows = len(df)
+        if "image_uri" in df.columns:
+            # Images were already resolved by the orchestrator's deduplicating pre-pass
+            df_processed = df
+        else:
+            with self.profile_stage("image_download", rows):
+                df_processed = self.get_product_image(
+                    df, ray_worker_node_id, gcs_bucket, gcs_folder
+                )
+        with self.profile_stage("description_nlp", rows):
+            df_processed = self.prep_product_desc(df_processed)
+        with self.profile_stage("attributes", rows):
+            df_processed["attributes"] = self.parse_attributes_column(
+                df_processed["product_specifications"]
+            )
+            df_processed = df_processed.drop("product_specifications", axis=1)
+        with self.profile_stage("categories", rows):
+            df_processed = self.prep_cat(df_processed)
+
+        if self.cache is not None:
+            self.cache.flush()
+            self.logger.info(
+                f"ray_worker_node_id:{ray_worker_node_id} Parse cache stats: {self.cache.stats()}"
+            )
         return df_processed
 
+    def process_table(
+        self,
+        table: "pa.Table",
+        ray_worker_node_id: str,
+        gcs_bucket: str,
+        gcs_folder: str,
+    ) -> "pa.Table":
+        """Arrow-native process_data for `batch_format="pyarrow"` Ray Data batches.
+
+        Columns are transformed with Arrow compute kernels and replaced or appended as
+        Arrow arrays. Only the columns that need Python code (image lists and descriptions)
+        are converted to Python objects, and distinct specifications are parsed once.
+
+        Args:
+            table: Raw input Arrow table.
+            ray_worker_node_id: Current Ray worker node identifier.
+            gcs_bucket: Destination GCS bucket name for image storage.
+            gcs_folder: Subfolder path in the GCS bucket.
+
+        Returns:
+            Fully cleaned and preprocessed Arrow table, with the columns of process_data.
+        """
+        rows = table.num_rows
+        if "image_uri" not in table.column_names:
+            with self.profile_stage("image_download", rows):
+                table = self.get_product_image_table(
+                    table, ray_worker_node_id, gcs_bucket, gcs_folder
+                )
+        with self.profile_stage("description_nlp", rows):
+            descriptions = table.column("description").to_pylist()
+            if self.nlp_batch_size:
+                parsed = self._parse_nlp_descriptions_batched(descriptions)
+            else:
+                parsed = [self.parse_nlp_description(text) for text in descriptions]
+            table = table.set_column(
+                table.schema.get_field_index("description"),
+                "description",
+                pa.array(parsed, pa.string()),
+            )
+        with self.profile_stage("attributes", rows):
+            attributes = self.parse_attributes_array(
+                table.column("product_specifications")
+            )
+            table = table.drop_columns("product_specifications").append_column(
+                "attributes", attributes
+            )
+        with self.profile_stage("categories", rows):
+            table = self.prep_cat_table(table)
+
+        if self.cache is not None:
+            self.cache.flush()
+            self.logger.info(
+                f"ray_worker_node_id:{ray_worker_node_id} Parse cache stats: {self.cache.stats()}"
+            )
+        return table
+
+
+RAG_COLUMNS = [
+    "Id",
+    "Name",
+    "Description",
+    "Brand",
+    "image",
+    "image_uri",
+    "c1_name",
+    "Specifications",
+]
+# Cleaned product columns renamed to their RAG schema names
+RAG_RENAMES = {
+    "uniq_id": "Id",
+    "product_name": "Name",
+    "description": "Description",
+    "brand": "Brand",
+    "attributes": "Specifications",
+}
+RAG_CATEGORIES = ["Women's Clothing", "Men's Clothing", "Kids' Clothing"]
+# Null fill values of the RAG output columns
+RAG_FILL_VALUES = {"image_uri": "", "image": "", "Description": "None"}
+# Category levels filtered in sequence by the number of RAG rows sharing their value
+RAG_MIN_COUNTS = [("c2_name", 10), ("c3_name", 10)]
+
+
+def frequent_value_sets(
+    counts: pd.DataFrame, min_counts: List[Tuple[str, int]]
+) -> Dict[str, List]:
+    """Resolves sequential value-frequency filters from grouped row counts.
+
+    Filtering by the first column changes the counts seen by the second one, so each
+    filter is evaluated on the groups that survived the previous ones.
+
+    Args:
+        counts: One row per distinct combination of the filtered columns, with the
+            number of rows in a 'count()' column (Ray Data groupby().count() output).
+        min_counts: (column, minimum count) filters, applied in order.
+
+    Returns:
+        Mapping of each column to the values whose rows are kept.
+    """
+    frequent_values = {}
+    for column_name, min_count in min_counts:
+        totals = counts.groupby(column_name, sort=False)["count()"].sum()
+        frequent_values[column_name] = totals[totals >= min_count].index.tolist()
+        counts = counts[counts[column_name].isin(frequent_values[column_name])]
+    return frequent_values
+
+
+def keep_frequent_values(
+    df: pd.DataFrame, frequent_values: Dict[str, List]
+) -> pd.DataFrame:
+    """Keeps the rows whose values are frequent in every filtered column.
+
+    Args:
+        df: Input DataFrame batch.
+        frequent_values: Mapping of column to kept values, from frequent_value_sets.
+
+    Returns:
+        Filtered DataFrame.
+    """
+    mask = pd.Series(True, index=df.index)
+    for column_name, values in frequent_values.items():
+        mask &= df[column_name].isin(values)
+    return df[mask]
+
+
+def keep_frequent_values_table(
+    table: "pa.Table", frequent_values: Dict[str, List]
+) -> "pa.Table":
+    """Arrow-native keep_frequent_values.
+
+    Args:
+        table: Input Arrow table batch.
+        frequent_values: Mapping of column to kept values, from frequent_value_sets.
+
+    Returns:
+        Filtered table.
+    """
+    mask = pa.array([True] * table.num_rows, pa.bool_())
+    for column_name, values in frequent_values.items():
+        column = table.column(column_name)
+        mask = pc.and_(
+            mask, pc.is_in(column, value_set=pa.array(values, type=column.type))
+        )
+    return table.filter(mask)
+
+
+def first_row(batch):
+    """Returns the first row of a pandas or Arrow batch, e.g. of one map_groups group."""
+    if pa is not None and isinstance(batch, pa.Table):
+        return batch.slice(0, 1)
+    return batch.head(1)
+
 
 class DataPrepForRag:
     """Filters and structures pipeline inputs explicitly for RAG vectorization formats."""
@@ -374,68 +1046,202 @@ class DataPrepForRag:
         filtered_values = value_counts[value_counts >= min_count].index
         return df[df[column_name].isin(filtered_values)].copy()
 
+    def select_rag_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Renames cleaned product records to the RAG schema and keeps clothing products.
+
+        This is the row-local part of process_rag_input, so it can run batch by batch.
+        The category columns filtered by value frequency are kept alongside RAG_COLUMNS.
+
+        Args:
+            df: Preprocessed DataFrame output from DataPreprocessor.
+
+        Returns:
+            DataFrame of clothing products with RAG_COLUMNS and the RAG_MIN_COUNTS columns.
+        """
+        working_df = df.rename(columns=RAG_RENAMES)
+
+        clothing_filter = (working_df["c0_name"] == "Clothing") & working_df[
+            "c1_name"
+        ].isin(RAG_CATEGORIES)
+        count_columns = [column for column, _ in RAG_MIN_COUNTS]
+        return working_df.loc[clothing_filter, RAG_COLUMNS + count_columns].copy()
+
+    def select_rag_table(self, table: "pa.Table") -> "pa.Table":
+        """Arrow-native select_rag_rows.
+
+        Args:
+            table: Preprocessed Arrow table output from DataPreprocessor.process_table.
+
+        Returns:
+            Table of clothing products with RAG_COLUMNS and the RAG_MIN_COUNTS columns.
+        """
+        table = table.rename_columns(
+            [RAG_RENAMES.get(name, name) for name in table.column_names]
+        )
+        c1_names = table.column("c1_name")
+        clothing_filter = pc.and_(
+            pc.equal(table.column("c0_name"), "Clothing"),
+            pc.is_in(c1_names, value_set=pa.array(RAG_CATEGORIES, c1_names.type)),
+        )
+        count_columns = [column for column, _ in RAG_MIN_COUNTS]
+        return table.filter(clothing_filter).select(RAG_COLUMNS + count_columns)
+
+    def format_rag_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Projects filtered rows onto RAG_COLUMNS, dropping duplicates and filling nulls.
+
+        Args:
+            df: Rows returned by select_rag_rows that passed the frequency filters.
+
+        Returns:
+            DataFrame with exactly RAG_COLUMNS.
+        """
+        if df.empty:
+            return pd.DataFrame(columns=RAG_COLUMNS)
+
+        rag_df = df[RAG_COLUMNS].copy()
+
+        rag_df.drop_duplicates(inplace=True)
+
+        for column_name, fill_value in RAG_FILL_VALUES.items():
+            rag_df[column_name] = rag_df[column_name].fillna(fill_value)
+
+        return rag_df
+
+    def format_rag_table(self, table: "pa.Table") -> "pa.Table":
+        """Arrow-native format_rag_rows.
+
+        Duplicates are dropped with a single-threaded Arrow group by, which keeps the
+        first-seen row order like pandas drop_duplicates.
+
+        Args:
+            table: Rows returned by select_rag_table that passed the frequency filters.
+
+        Returns:
+            Table with exactly RAG_COLUMNS.
+        """
+        table = (
+            table.select(RAG_COLUMNS)
+            .group_by(RAG_COLUMNS, use_threads=False)
+            .aggregate([])
+            .select(RAG_COLUMNS)
+        )
+        for column_name, fill_value in RAG_FILL_VALUES.items():
+            index = table.schema.get_field_index(column_name)
+            table = table.set_column(
+                index,
+                column_name,
+                pc.fill_null(pc.cast(table.column(index), pa.string()), fill_value),
+            )
+        return table
+
     def process_rag_input(self, df: pd.DataFrame) -> pd.DataFrame:
         """Transforms cleaned product records into standardized schema for RAG pipeline ingestion.
 
+        Value frequencies are counted within `df`; use process_rag_dataset to count them
+        across a whole Ray Dataset.
+
         Args:
             df: Preprocessed DataFrame output from DataPreprocessor.
 
         Returns:
             DataFrame schema-formatted and filtered specifically for RAG retrieval tasks.
         """
-        working_df = df.rename(
-            columns={
-                "uniq_id": "Id",
-                "product_name": "Name",
-                "description": "Description",
-                "brand": "Brand",
-                "attributes": "Specifications",
-            }
-        ).copy()
-
-        filtered_df = working_df[working_df["c0_name"] == "Clothing"]
-        values_to_filter = ["Women's Clothing", "Men's Clothing", "Kids' Clothing"]
-        clothing_filtered_df = filtered_df[
-            filtered_df["c1_name"].isin(values_to_filter)
-        ].copy()
-
+        filtered_df = self.select_rag_rows(df)
         # Sequence data transformations safely to clean memory pointers
-        c2_filtered_df = self.filter_low_value_count_rows(
-            clothing_filtered_df, "c2_name", 10
+        for column_name, min_count in RAG_MIN_COUNTS:
+            filtered_df = self.filter_low_value_count_rows(
+                filtered_df, column_name, min_count
+            )
+        return self.format_rag_rows(filtered_df)
+
+    def filter_low_value_count_rows_dataset(
+        self, dataset: "ray.data.Dataset", column_name: str, min_count: int = 10
+    ) -> "ray.data.Dataset":
+        """Distributed filter_low_value_count_rows over a Ray Dataset.
+
+        The first pass counts values with a distributed groupby; only the (small) set of
+        frequent values is collected on the driver. The second pass filters batches
+        against that set, so rows stream to the next operator without being collected.
+
+        Args:
+            dataset: Input Ray Dataset. Materialize it first if it is expensive to
+                recompute, since it is read once per pass.
+            column_name: Target column to compute value counts on.
+            min_count: Minimum frequency threshold required to retain rows.
+
+        Returns:
+            Lazily filtered Ray Dataset.
+        """
+        counts = dataset.groupby(column_name).count().to_pandas()
+        frequent_values = frequent_value_sets(counts, [(column_name, min_count)])
+        return dataset.map_batches(
+            keep_frequent_values,
+            fn_kwargs={"frequent_values": frequent_values},
+            batch_format="pandas",
         )
-        c3_filtered_df = self.filter_low_value_count_rows(c2_filtered_df, "c3_name", 10)
 
-        if c3_filtered_df.empty:
-            return pd.DataFrame(
-                columns=[
-                    "Id",
-                    "Name",
-                    "Description",
-                    "Brand",
-                    "image",
-                    "image_uri",
-                    "c1_name",
-                    "Specifications",
-                ]
+    def drop_duplicates_dataset(
+        self, dataset: "ray.data.Dataset", batch_format: str = "pandas"
+    ) -> "ray.data.Dataset":
+        """Distributed drop_duplicates of RAG rows over a Ray Dataset.
+
+        format_rag_rows only drops the duplicates within one batch, so rows are grouped
+        by all of RAG_COLUMNS with a distributed groupby and the first row of every group
+        is kept. The output is ordered by the group keys instead of first-seen order.
+
+        Args:
+            dataset: Ray Dataset with exactly RAG_COLUMNS.
+            batch_format: 'pandas' or 'pyarrow' groups.
+
+        Returns:
+            Ray Dataset without duplicate rows.
+        """
+        return dataset.groupby(RAG_COLUMNS).map_groups(
+            first_row, batch_format=batch_format
+        )
+
+    def process_rag_dataset(
+        self, dataset: "ray.data.Dataset", batch_format: str = "pandas"
+    ) -> "ray.data.Dataset":
+        """Applies the RAG frequency filters and formatting across a whole Ray Dataset.
+
+        All RAG_MIN_COUNTS filters are resolved from a single groupby pass over their
+        columns, then one streaming pass filters and formats every batch, and a last
+        groupby pass drops the duplicates that span batches.
+
+        Args:
+            dataset: Ray Dataset of select_rag_rows output. Materialize it first if it is
+                expensive to recompute, since it is read twice.
+            batch_format: 'pandas', or 'pyarrow' to filter and format Arrow batches
+                without converting them to pandas.
+
+        Returns:
+            Ray Dataset with RAG_COLUMNS and no duplicate rows.
+        """
+        count_columns = [column for column, _ in RAG_MIN_COUNTS]
+        counts = dataset.groupby(count_columns).count().to_pandas()
+        frequent_values = frequent_value_sets(counts, RAG_MIN_COUNTS)
+        self.logger.info(
+            "Keeping RAG rows with "
+            + ", ".join(
+                f"{len(values)} frequent {column} values"
+                for column, values in frequent_values.items()
             )
+        )
 
-        rag_df = c3_filtered_df[
-            [
-                "Id",
-                "Name",
-                "Description",
-                "Brand",
-                "image",
-                "image_uri",
-                "c1_name",
-                "Specifications",
-            ]
-        ].copy()
+        if batch_format == "pyarrow":
 
-        rag_df.drop_duplicates(inplace=True)
+            def filter_and_format(table: "pa.Table") -> "pa.Table":
+                return self.format_rag_table(
+                    keep_frequent_values_table(table, frequent_values)
+                )
 
-        rag_df["image_uri"] = rag_df["image_uri"].fillna("")
-        rag_df["image"] = rag_df["image"].fillna("")
-        rag_df["Description"] = rag_df["Description"].fillna("None")
+        else:
 
-        return rag_df
+            def filter_and_format(df: pd.DataFrame) -> pd.DataFrame:
+                return self.format_rag_rows(keep_frequent_values(df, frequent_values))
+
+        return self.drop_duplicates_dataset(
+            dataset.map_batches(filter_and_format, batch_format=batch_format),
+            batch_format=batch_format,
+        )
@@ -0,0 +1,162 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Dataset-wide image URL deduplication planning for the Ray Data pipeline.
+
+Rows are exploded into (uniq_id, rank, url, blob_name) candidates. Downloads then run in
+rounds: each round fetches, once per unique URL, the first not-yet-failed candidate of
+every unresolved row, which preserves the per-row "first image that uploads" semantics of
+DataPreprocessor.get_product_image while never requesting the same URL twice.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import pandas as pd
+from datapreprocessing.datacleaner import DataPreprocessor
+
+CANDIDATE_COLUMNS = ["uniq_id", "rank", "url", "blob_name"]
+
+
+@dataclass
+class ImageDedupReport:
+    """Savings of the deduplicated image download pre-pass."""
+
+    rows: int = 0
+    candidate_urls: int = 0
+    unique_urls: int = 0
+    rounds: int = 0
+    requests: int = 0
+    baseline_requests: int = 0
+    bytes_downloaded: int = 0
+    baseline_bytes: int = 0
+
+    @property
+    def requests_saved(self) -> int:
+        """Downloads avoided compared to fetching every row independently."""
+        return self.baseline_requests - self.requests
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes avoided compared to fetching every row independently."""
+        return self.baseline_bytes - self.bytes_downloaded
+
+
+def explode_image_candidates(df: pd.DataFrame, gcs_folder: str) -> pd.DataFrame:
+    """Explodes a batch of product rows into one record per image candidate.
+
+    Args:
+        df: Input DataFrame batch with 'uniq_id' and 'image' columns.
+        gcs_folder: Destination subfolder in the GCS bucket.
+
+    Returns:
+        DataFrame with CANDIDATE_COLUMNS, ordered by row and candidate rank.
+    """
+    records = [
+        (prod_id, rank, url, blob_name)
+        for prod_id, image_list in zip(df["uniq_id"], df["image"])
+        for rank, (url, blob_name) in enumerate(
+            DataPreprocessor.image_candidates(prod_id, image_list, gcs_folder)
+        )
+    ]
+    return pd.DataFrame.from_records(records, columns=CANDIDATE_COLUMNS)
+
+
+def _first_per_row(candidates: pd.DataFrame) -> pd.DataFrame:
+    """Keeps the lowest-ranked candidate of every row."""
+    if candidates.empty:
+        return candidates
+    return candidates.loc[candidates.groupby("uniq_id", sort=False)["rank"].idxmin()]
+
+
+def pending_image_requests(
+    candidates: pd.DataFrame, resolved: Dict[str, Optional[str]]
+) -> pd.DataFrame:
+    """Plans the next download round.
+
+    Args:
+        candidates: Exploded candidates with a unique index.
+        resolved: GCS URI (or None on failure) of every URL downloaded so far.
+
+    Returns:
+        DataFrame of unique 'url' values to download with their 'blob_name'. The blob
+        name is the smallest one among the rows sharing the URL, so reruns are stable.
+    """
+    failed = [url for url, uri in resolved.items() if uri is None]
+    firsts = _first_per_row(candidates[~candidates["url"].isin(failed)])
+    pending = firsts[~firsts["url"].isin(list(resolved))]
+    return pending.groupby("url", sort=False)["blob_name"].min().reset_index()
+
+
+def resolve_image_uris(
+    candidates: pd.DataFrame, resolved: Dict[str, Optional[str]]
+) -> Dict[str, str]:
+    """Joins downloaded URLs back to rows.
+
+    Args:
+        candidates: Exploded candidates with a unique index.
+        resolved: GCS URI (or None on failure) of every downloaded URL.
+
+    Returns:
+        Mapping of uniq_id to the GCS URI of its first successfully uploaded image.
+        Rows without any uploaded image are left out.
+    """
+    uploaded = candidates.assign(image_uri=candidates["url"].map(resolved)).dropna(
+        subset=["image_uri"]
+    )
+    firsts = _first_per_row(uploaded)
+    return dict(zip(firsts["uniq_id"], firsts["image_uri"]))
+
+
+def summarize_image_dedup(
+    candidates: pd.DataFrame,
+    resolved: Dict[str, Optional[str]],
+    image_bytes: Dict[str, int],
+    rounds: int,
+) -> ImageDedupReport:
+    """Compares the deduplicated downloads with fetching every row independently.
+
+    Per row, an independent fetch would have requested each candidate up to and including
+    the first one that uploaded (or all of them), and downloaded that image's bytes.
+
+    Args:
+        candidates: Exploded candidates with a unique index.
+        resolved: GCS URI (or None on failure) of every downloaded URL.
+        image_bytes: Bytes downloaded per URL.
+        rounds: Number of download rounds that ran.
+
+    Returns:
+        ImageDedupReport of the pre-pass.
+    """
+    sizes = candidates["url"].map(image_bytes).fillna(0)
+    uploaded = candidates["url"].map(resolved).notna()
+
+    candidates_per_row = candidates.groupby("uniq_id", sort=False)["rank"].size()
+    first_uploaded = _first_per_row(candidates.assign(size=sizes)[uploaded])
+    attempts = (
+        (first_uploaded.set_index("uniq_id")["rank"] + 1)
+        .reindex(candidates_per_row.index)
+        .fillna(candidates_per_row)
+    )
+
+    return ImageDedupReport(
+        rows=len(candidates_per_row),
+        candidate_urls=len(candidates),
+        unique_urls=candidates["url"].nunique(),
+        rounds=rounds,
+        requests=len(resolved),
+        baseline_requests=int(attempts.sum()),
+        bytes_downloaded=int(sum(image_bytes.get(url, 0) for url in resolved)),
+        baseline_bytes=int(first_uploaded["size"].sum()),
+    )
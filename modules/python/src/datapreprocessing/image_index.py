@@ -0,0 +1,203 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index of product images already materialized in Cloud Storage for incremental runs."""
+
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Custom blob metadata keys recording where an uploaded image was downloaded from
+SOURCE_URL_METADATA_KEY = "source_url"
+SOURCE_ETAG_METADATA_KEY = "source_etag"
+
+
+def source_metadata(image_url: str, source_etag: Optional[str]) -> Dict[str, str]:
+    """Builds the custom blob metadata stored alongside an uploaded image.
+
+    Args:
+        image_url: URL the image was downloaded from.
+        source_etag: ETag response header of the download, if the source sent one.
+
+    Returns:
+        Dictionary of custom metadata to assign to the blob before uploading.
+    """
+    metadata = {SOURCE_URL_METADATA_KEY: image_url}
+    if source_etag:
+        metadata[SOURCE_ETAG_METADATA_KEY] = source_etag
+    return metadata
+
+
+@dataclass
+class ImageRecord:
+    """What is known about one uploaded image blob."""
+
+    source_url: Optional[str] = None
+    source_etag: Optional[str] = None
+    size: Optional[int] = None
+
+    def is_unchanged(self, source_etag: Optional[str], size: Optional[int]) -> bool:
+        """Compares the record against freshly fetched source response headers.
+
+        ETags are compared when both sides have one, sizes otherwise. When neither can
+        be compared the image is assumed unchanged.
+
+        Args:
+            source_etag: Current ETag header of the source image.
+            size: Current Content-Length of the source image.
+
+        Returns:
+            False if the source image is known to have changed, True otherwise.
+        """
+        if self.source_etag and source_etag:
+            return self.source_etag == source_etag
+        if self.size is not None and size is not None:
+            return self.size == size
+        return True
+
+
+class UploadedImageIndex:
+    """Maps destination blob names to the source images they were uploaded from.
+
+    The index is built once per actor, either from a single prefix listing of the
+    destination folder or from a JSON manifest, and lets reruns skip images that are
+    already in the bucket. Images uploaded by this pipeline carry their source URL and
+    ETag as custom blob metadata; blobs without it are trusted on presence alone.
+    """
+
+    def __init__(self, records: Optional[Dict[str, ImageRecord]] = None):
+        """Initializes the UploadedImageIndex.
+
+        Args:
+            records: Optional initial mapping of blob name to ImageRecord.
+        """
+        self.records = dict(records or {})
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def from_listing(
+        cls, storage_client: Any, gcs_bucket: str, gcs_folder: str
+    ) -> "UploadedImageIndex":
+        """Builds the index from one listing of the destination folder.
+
+        Args:
+            storage_client: Cloud Storage client used for the listing.
+            gcs_bucket: Name of the destination GCS bucket.
+            gcs_folder: Destination subfolder in the GCS bucket.
+
+        Returns:
+            UploadedImageIndex holding every blob under the folder.
+        """
+        records = {}
+        for blob in storage_client.list_blobs(
+            gcs_bucket,
+            prefix=f"{gcs_folder.rstrip('/')}/",
+            fields="items(name,size,metadata),nextPageToken",
+        ):
+            metadata = blob.metadata or {}
+            records[blob.name] = ImageRecord(
+                source_url=metadata.get(SOURCE_URL_METADATA_KEY),
+                source_etag=metadata.get(SOURCE_ETAG_METADATA_KEY),
+                size=int(blob.size) if blob.size is not None else None,
+            )
+        logger.info(
+            f"Indexed {len(records)} existing images under gs://{gcs_bucket}/{gcs_folder}"
+        )
+        return cls(records)
+
+    @classmethod
+    def from_manifest(
+        cls, manifest_path: str, storage_client: Any = None
+    ) -> "UploadedImageIndex":
+        """Loads the index from a JSON manifest written by `to_manifest`.
+
+        Args:
+            manifest_path: Local path or 'gs://bucket/path' URI of the manifest.
+            storage_client: Cloud Storage client, required for 'gs://' manifests.
+
+        Returns:
+            UploadedImageIndex holding the manifest entries.
+        """
+        if manifest_path.startswith("gs://"):
+            bucket_name, blob_name = manifest_path[len("gs://") :].split("/", 1)
+            content = (
+                storage_client.bucket(bucket_name).blob(blob_name).download_as_text()
+            )
+        else:
+            with open(manifest_path, "r") as f:
+                content = f.read()
+
+        records = {
+            name: ImageRecord(**record) for name, record in json.loads(content).items()
+        }
+        logger.info(f"Loaded {len(records)} image records from {manifest_path}")
+        return cls(records)
+
+    def to_manifest(self, manifest_path: str, storage_client: Any = None) -> None:
+        """Writes the index as a JSON manifest.
+
+        Args:
+            manifest_path: Local path or 'gs://bucket/path' URI of the manifest.
+            storage_client: Cloud Storage client, required for 'gs://' manifests.
+        """
+        content = json.dumps(
+            {name: asdict(record) for name, record in self.records.items()}
+        )
+        if manifest_path.startswith("gs://"):
+            bucket_name, blob_name = manifest_path[len("gs://") :].split("/", 1)
+            storage_client.bucket(bucket_name).blob(blob_name).upload_from_string(
+                content, content_type="application/json"
+            )
+        else:
+            with open(manifest_path, "w") as f:
+                f.write(content)
+
+    def lookup(self, blob_name: str, image_url: str) -> Optional[ImageRecord]:
+        """Returns the record of a blob if it was materialized from the given URL.
+
+        Args:
+            blob_name: Destination blob name of the image.
+            image_url: Source URL the image would be downloaded from.
+
+        Returns:
+            The ImageRecord, or None if the blob is missing or came from another URL.
+        """
+        record = self.records.get(blob_name)
+        if record is None:
+            return None
+        if record.source_url is not None and record.source_url != image_url:
+            return None
+        return record
+
+    def record(
+        self,
+        blob_name: str,
+        image_url: str,
+        source_etag: Optional[str],
+        size: Optional[int],
+    ) -> None:
+        """Records a freshly uploaded image.
+
+        Args:
+            blob_name: Destination blob name of the image.
+            image_url: URL the image was downloaded from.
+            source_etag: ETag response header of the download.
+            size: Number of bytes uploaded.
+        """
+        self.records[blob_name] = ImageRecord(image_url, source_etag, size)
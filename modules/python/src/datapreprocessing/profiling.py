@@ -0,0 +1,344 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Lightweight per-stage timing, throughput counters and latency histograms."""
+
+import bisect
+import contextlib
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pyarrow.fs as pafs
+import ray
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+PROFILE_FORMATS = ("json", "prometheus")
+
+
+@dataclass
+class StageTiming:
+    """Accumulated wall time and row throughput of one pipeline stage."""
+
+    calls: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows processed per second of stage wall time."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class LatencyHistogram:
+    """Fixed-bucket latency histogram that can be merged across workers."""
+
+    bounds: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS
+    # Per-bucket (non-cumulative) counts; the last bucket is +Inf
+    counts: List[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+
+    def __post_init__(self):
+        self.bounds = tuple(self.bounds)
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, seconds: float) -> None:
+        """Records one latency sample."""
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Adds the samples of another histogram with the same buckets."""
+        if other.bounds != self.bounds:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile as the upper bound of the bucket containing it.
+
+        Args:
+            q: Quantile in [0, 1].
+
+        Returns:
+            Bucket upper bound in seconds, `inf` when it lies in the overflow bucket,
+            or 0.0 for an empty histogram.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+def _finite_or_none(value: float) -> Optional[float]:
+    return None if math.isinf(value) else value
+
+
+class PipelineProfile:
+    """Per-stage wall time, counters and latency histograms of one or more workers.
+
+    Every actor records into its own profile; the orchestrator merges them into a single
+    run-wide profile that is exported as JSON or Prometheus text exposition format.
+    Recording is thread-safe, since image downloads run on thread pools.
+    """
+
+    def __init__(self):
+        """Initializes an empty PipelineProfile."""
+        self.stages: Dict[str, StageTiming] = {}
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: int) -> Iterator[None]:
+        """Times the enclosed block as one call of a stage.
+
+        Args:
+            name: Stage name (e.g. 'description_nlp').
+            rows: Number of rows the block processes.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, rows, time.perf_counter() - start)
+
+    def record_stage(self, name: str, rows: int, seconds: float) -> None:
+        """Adds one call of a stage."""
+        with self._lock:
+            timing = self.stages.setdefault(name, StageTiming())
+            timing.calls += 1
+            timing.rows += rows
+            timing.seconds += seconds
+
+    def add(self, name: str, value: float = 1) -> None:
+        """Increments a counter (e.g. 'bytes_downloaded')."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Records a latency sample (e.g. 'upload_latency_seconds')."""
+        with self._lock:
+            self.histograms.setdefault(name, LatencyHistogram()).observe(seconds)
+
+    def merge(self, other: "PipelineProfile") -> None:
+        """Adds the stages, counters and histograms of another profile."""
+        with self._lock:
+            for name, timing in other.stages.items():
+                merged = self.stages.setdefault(name, StageTiming())
+                merged.calls += timing.calls
+                merged.rows += timing.rows
+                merged.seconds += timing.seconds
+            for name, value in other.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, histogram in other.histograms.items():
+                self.histograms.setdefault(
+                    name, LatencyHistogram(bounds=histogram.bounds)
+                ).merge(histogram)
+
+    def drain(self) -> "PipelineProfile":
+        """Moves everything recorded so far into a new profile and resets this one."""
+        drained = PipelineProfile()
+        with self._lock:
+            drained.stages, self.stages = self.stages, {}
+            drained.counters, self.counters = self.counters, {}
+            drained.histograms, self.histograms = self.histograms, {}
+        return drained
+
+    def is_empty(self) -> bool:
+        """Returns True when nothing was recorded."""
+        return not (self.stages or self.counters or self.histograms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the profile as a JSON-serializable dictionary."""
+        return {
+            "stages": {
+                name: {**asdict(timing), "rows_per_second": timing.rows_per_second}
+                for name, timing in sorted(self.stages.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": {
+                name: {
+                    "bounds": list(histogram.bounds),
+                    "counts": histogram.counts,
+                    "count": histogram.count,
+                    "sum": histogram.total,
+                    # Quantiles in the overflow bucket are unbounded and exported as null
+                    "p50": _finite_or_none(histogram.quantile(0.5)),
+                    "p99": _finite_or_none(histogram.quantile(0.99)),
+                }
+                for name, histogram in sorted(self.histograms.items())
+            },
+        }
+
+    def to_json(self) -> str:
+        """Renders the profile as indented JSON."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "datapreprocessing") -> str:
+        """Renders the profile in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix.
+
+        Returns:
+            Exposition text with stage, counter and histogram metric families.
+        """
+        lines = []
+
+        def family(name: str, metric_type: str, help_text: str) -> str:
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            return metric
+
+        stages = sorted(self.stages.items())
+        for name, metric_type, help_text, value in (
+            ("stage_seconds_total", "counter", "Wall time spent per stage.", "seconds"),
+            ("stage_rows_total", "counter", "Rows processed per stage.", "rows"),
+            ("stage_calls_total", "counter", "Batches processed per stage.", "calls"),
+            (
+                "stage_rows_per_second",
+                "gauge",
+                "Rows per second of stage wall time.",
+                "rows_per_second",
+            ),
+        ):
+            if not stages:
+                break
+            metric = family(name, metric_type, help_text)
+            for stage, timing in stages:
+                lines.append(
+                    f'{metric}{{stage="{stage}"}} {getattr(timing, value):.6g}'
+                )
+
+        for name, value in sorted(self.counters.items()):
+            metric = family(f"{name}_total", "counter", f"Total {name}.")
+            lines.append(f"{metric} {value:.6g}")
+
+        for name, histogram in sorted(self.histograms.items()):
+            metric = family(name, "histogram", f"Distribution of {name}.")
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.total:.6g}")
+            lines.append(f"{metric}_count {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, uri: str, profile_format: str = "json") -> None:
+        """Writes the profile to a local path or 'gs://' URI.
+
+        Args:
+            uri: Destination file.
+            profile_format: 'json' or 'prometheus'.
+        """
+        if profile_format not in PROFILE_FORMATS:
+            raise ValueError(
+                f"Unsupported profile_format '{profile_format}', expected one of {PROFILE_FORMATS}"
+            )
+        text = self.to_json() if profile_format == "json" else self.to_prometheus()
+        fs, path = pafs.FileSystem.from_uri(uri)
+        with fs.open_output_stream(path) as f:
+            f.write(text.encode("utf-8"))
+        logger.info(f"Wrote {profile_format} pipeline profile to {uri}")
+
+    def summary(self) -> str:
+        """Returns a one-line-per-stage human readable summary, slowest stage first."""
+        lines = [
+            f"{name}: {timing.seconds:.2f}s over {timing.calls} batches, "
+            f"{timing.rows} rows ({timing.rows_per_second:.1f} rows/sec)"
+            for name, timing in sorted(
+                self.stages.items(), key=lambda item: -item[1].seconds
+            )
+        ]
+        lines += [f"{name}: {value:g}" for name, value in sorted(self.counters.items())]
+        lines += [
+            f"{name}: n={histogram.count} p50<={histogram.quantile(0.5):g}s "
+            f"p99<={histogram.quantile(0.99):g}s"
+            for name, histogram in sorted(self.histograms.items())
+        ]
+        return "\n".join(lines)
+
+
+class ProfileAggregator:
+    """Collects the profiles pushed by pipeline actors; run as a Ray actor."""
+
+    def __init__(self):
+        """Initializes the ProfileAggregator with an empty run-wide profile."""
+        self.profile = PipelineProfile()
+
+    def merge(self, profile: PipelineProfile) -> None:
+        """Merges one worker profile into the run-wide profile."""
+        self.profile.merge(profile)
+
+    def snapshot(self) -> PipelineProfile:
+        """Returns the run-wide profile."""
+        return self.profile
+
+
+def flush_profile(profile: PipelineProfile, aggregator: Any) -> None:
+    """Pushes what a worker recorded since the last flush to the aggregator actor.
+
+    The push waits for the aggregator, so everything a batch recorded is merged before
+    the batch is handed downstream and the orchestrator's final snapshot is complete.
+
+    Args:
+        profile: Worker profile, reset in place.
+        aggregator: ProfileAggregator actor handle.
+    """
+    recorded = profile.drain()
+    if not recorded.is_empty():
+        ray.get(aggregator.merge.remote(recorded))
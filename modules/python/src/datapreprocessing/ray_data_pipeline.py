@@ -14,20 +14,26 @@
 
 """Ray Data pipeline orchestrator module for distributed, streaming data preprocessing."""
 
+import inspect
 import logging
 import os
 import time
-from typing import Any, Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pandas as pd
 import ray
 
 try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
     from pyarrow import csv
 except ImportError:
     from unittest.mock import MagicMock
 
     csv = MagicMock()
+    pa = None
+    pc = None
 try:
     from ray.data.datasource import FilenameProvider
 except (ImportError, ModuleNotFoundError):
@@ -40,6 +46,149 @@ except (ImportError, ModuleNotFoundError):
 
 logger = logging.getLogger(__name__)
 
+# Batch formats the pipeline stages can run on end to end
+BATCH_FORMATS = ("pandas", "pyarrow")
+# Image candidates the dedupe pre-pass collects on the driver before it falls back to
+# per-row downloads, about 300 MB of driver memory at the default
+DEDUPE_MAX_CANDIDATES = 1_000_000
+
+
+def parquet_datasink_options_supported() -> bool:
+    """Checks that Dataset.write_parquet honors row group sizes and partition columns.
+
+    Ray 2.40 passes extra `write_parquet` arguments to `pyarrow.parquet.ParquetWriter`,
+    which rejects both `row_group_size` and `partition_cols`. Newer releases (e.g. Ray
+    2.54, as pinned by the data processing container image) take `partition_cols` as a
+    parameter and turn `row_group_size` into row group limits.
+    """
+    return (
+        "partition_cols" in inspect.signature(ray.data.Dataset.write_parquet).parameters
+    )
+
+
+@dataclass
+class ActorPoolConfig:
+    """Sizing of one `map_batches` actor pool stage."""
+
+    min_size: int = 1
+    max_size: int = 8
+    batch_size: int = 200
+    num_cpus: Optional[float] = None
+    max_tasks_in_flight_per_actor: Optional[int] = None
+
+    def map_batches_kwargs(self) -> Dict[str, Any]:
+        """Builds the `map_batches` keyword arguments for this stage.
+
+        Returns:
+            Dictionary with the actor pool compute strategy, batch size and, when set,
+            per-actor CPU reservation.
+        """
+        strategy_kwargs = {"min_size": self.min_size, "max_size": self.max_size}
+        if self.max_tasks_in_flight_per_actor is not None:
+            strategy_kwargs["max_tasks_in_flight_per_actor"] = (
+                self.max_tasks_in_flight_per_actor
+            )
+        kwargs = {
+            "compute": ray.data.ActorPoolStrategy(**strategy_kwargs),
+            "batch_size": self.batch_size,
+        }
+        if self.num_cpus is not None:
+            kwargs["num_cpus"] = self.num_cpus
+        return kwargs
+
+
+def autotune_actor_pools(
+    cluster_resources: Dict[str, float],
+    nlp_cpu_share: float = 0.75,
+    image_actor_cpus: float = 0.25,
+) -> Tuple[ActorPoolConfig, ActorPoolConfig]:
+    """Sizes the CPU-bound and I/O-bound actor pools from the cluster's resources.
+
+    The NLP stage gets one CPU per actor over `nlp_cpu_share` of the cluster. The image
+    stage spends the remaining CPUs on many fractional-CPU actors, each keeping several
+    batches in flight since they mostly wait on the network. Pools start at a quarter of
+    their maximum size and autoscale up with the backlog.
+
+    Args:
+        cluster_resources: Output of `ray.cluster_resources()`.
+        nlp_cpu_share: Share of the cluster's CPUs reserved for the NLP stage.
+        image_actor_cpus: CPUs reserved by each image stage actor.
+
+    Returns:
+        Tuple of (NLP preprocessing pool, image download pool) configurations.
+    """
+    total_cpus = max(1.0, float(cluster_resources.get("CPU", 1)))
+
+    nlp_actors = max(1, int(total_cpus * nlp_cpu_share))
+    image_actors = max(1, int(total_cpus * (1 - nlp_cpu_share) / image_actor_cpus))
+
+    preprocess_pool = ActorPoolConfig(
+        min_size=max(1, nlp_actors // 4),
+        max_size=nlp_actors,
+        batch_size=200,
+        num_cpus=1,
+    )
+    image_pool = ActorPoolConfig(
+        min_size=max(1, image_actors // 4),
+        max_size=image_actors,
+        batch_size=100,
+        num_cpus=image_actor_cpus,
+        max_tasks_in_flight_per_actor=4,
+    )
+    logger.info(
+        f"Auto-tuned actor pools for {total_cpus:g} cluster CPUs: "
+        f"preprocessing {preprocess_pool}, images {image_pool}"
+    )
+    return preprocess_pool, image_pool
+
+
+def is_arrow_batch(batch: Any) -> bool:
+    """Returns True for `batch_format="pyarrow"` batches."""
+    return pa is not None and isinstance(batch, pa.Table)
+
+
+def drop_completed_rows(df: pd.DataFrame, completed_ids: Set[str]) -> pd.DataFrame:
+    """Drops rows whose uniq_id was already checkpointed by a previous attempt of the run.
+
+    Args:
+        df: Input pandas batch or Arrow table.
+        completed_ids: Stringified uniq_ids of completed rows.
+
+    Returns:
+        The batch without completed rows.
+    """
+    if is_arrow_batch(df):
+        uniq_ids = pc.cast(df.column("uniq_id"), pa.string())
+        completed = pc.is_in(
+            uniq_ids, value_set=pa.array(list(completed_ids), pa.string())
+        )
+        return df.filter(pc.invert(completed))
+    return df[~df["uniq_id"].astype(str).isin(completed_ids)]
+
+
+def keep_batch(batch: Any) -> Any:
+    """Returns the batch unchanged, converting its block to the map's batch_format."""
+    return batch
+
+
+def read_checkpointed_blocks(data_uris: List[str], batch_format: str) -> Any:
+    """Reads checkpointed output blocks with the block type of the processed batches.
+
+    `read_parquet` yields Arrow blocks, while pandas batches are returned as pandas
+    blocks, and Ray cannot shuffle a union mixing both block types. The checkpoints are
+    therefore passed through an identity `map_batches` in the run's batch format.
+
+    Args:
+        data_uris: URIs of the checkpointed Parquet data files.
+        batch_format: 'pandas' or 'pyarrow' batch format of the processing stages.
+
+    Returns:
+        Ray Dataset of the checkpointed RAG rows.
+    """
+    return ray.data.read_parquet(data_uris).map_batches(
+        keep_batch, batch_format=batch_format
+    )
+
 
 def handle_invalid_row(row: Any) -> str:
     """Callback hook to skip malformed rows inside raw datasets safely during CSV parsing.
@@ -95,46 +244,297 @@ class SingleFilenameProvider(FilenameProvider):
 class PreprocessingActor:
     """Stateful worker pool for batch transformation in Ray Data pipeline."""
 
-    def __init__(self, output_bucket: str, output_image_folder: str):
+    def __init__(
+        self,
+        output_bucket: str,
+        output_image_folder: str,
+        nlp_batch_size: Optional[int] = 256,
+        nlp_n_process: int = 1,
+        cache_max_entries: int = 100_000,
+        cache_path: Optional[str] = None,
+        async_image_fetch: bool = True,
+        image_max_connections: int = 64,
+        image_max_connections_per_host: int = 8,
+        incremental_images: bool = False,
+        revalidate_images: bool = False,
+        image_manifest_path: Optional[str] = None,
+        image_uris: Optional[Any] = None,
+        checkpoint_uri: Optional[str] = None,
+        run_id: Optional[str] = None,
+        profile_aggregator: Optional[Any] = None,
+    ):
         """Initializes worker actors with DataPreprocessor and DataPrepForRag transformers.
 
         Args:
             output_bucket: Destination GCS bucket name.
             output_image_folder: Destination GCS subfolder for images.
+            nlp_batch_size: Batch size for streaming descriptions through `nlp.pipe`.
+                Set to None to parse descriptions one row at a time.
+            nlp_n_process: Number of processes `nlp.pipe` may use per actor.
+            cache_max_entries: Size of the in-process parse cache. Set to 0 to disable caching.
+            cache_path: Optional SQLite file shared by all actors on a node as an on-disk
+                parse cache tier (e.g. '/tmp/datapreprocessing_cache.sqlite').
+            async_image_fetch: Download images with the pooled aiohttp engine instead of
+                urllib and a thread pool.
+            image_max_connections: Global concurrent connection limit of the image fetcher.
+            image_max_connections_per_host: Per-host concurrent connection limit of the
+                image fetcher.
+            incremental_images: Skip images already uploaded to the output image folder,
+                based on one listing of the folder per actor.
+            revalidate_images: Refetch already uploaded images whose ETag or size
+                changed at the source.
+            image_manifest_path: Optional JSON manifest of uploaded images to use instead
+                of listing the output image folder.
+            image_uris: Optional mapping (or object reference to one) of uniq_id to GCS
+                image URI resolved by the deduplicating image pre-pass. When set, batches
+                are not downloaded again.
+            checkpoint_uri: Optional local directory or 'gs://' URI to checkpoint every
+                processed batch under `run_id`.
+            run_id: Identifier of the pipeline run, required with checkpoint_uri.
+            profile_aggregator: Optional ProfileAggregator actor handle. When set, every
+                batch is profiled per stage and pushed to it.
         """
+        from datapreprocessing.cache import ContentHashCache
         from datapreprocessing.datacleaner import DataPrepForRag, DataPreprocessor
-
-        self.preprocessor = DataPreprocessor()
+        from datapreprocessing.image_fetcher import AsyncImageFetcher
+        from datapreprocessing.profiling import PipelineProfile
+
+        self.profile_aggregator = profile_aggregator
+        profile = PipelineProfile() if profile_aggregator is not None else None
+
+        cache = None
+        if cache_max_entries:
+            cache = ContentHashCache(
+                max_entries=cache_max_entries, sqlite_path=cache_path
+            )
+
+        self.preprocessor = DataPreprocessor(
+            nlp_batch_size=nlp_batch_size,
+            nlp_n_process=nlp_n_process,
+            cache=cache,
+            incremental_images=incremental_images,
+            revalidate_images=revalidate_images,
+            image_manifest_path=image_manifest_path,
+            profile=profile,
+        )
+        if async_image_fetch:
+            # Reuse the preprocessor's storage client so each actor holds a single one
+            self.preprocessor.image_fetcher = AsyncImageFetcher(
+                self.preprocessor.storage_client,
+                max_connections=image_max_connections,
+                max_connections_per_host=image_max_connections_per_host,
+                profile=profile,
+            )
         self.rag_transformer = DataPrepForRag()
 
         self.output_bucket = output_bucket
         self.output_image_folder = output_image_folder
+        self.image_uris = (
+            ray.get(image_uris) if isinstance(image_uris, ray.ObjectRef) else image_uris
+        )
+
+        self.checkpoint = None
+        if checkpoint_uri:
+            from datapreprocessing.checkpoint import CheckpointStore
+
+            self.checkpoint = CheckpointStore(checkpoint_uri, run_id)
 
     def __call__(self, batch: pd.DataFrame) -> pd.DataFrame:
-        """Processes a pandas DataFrame batch through clean and RAG transformation stages.
+        """Processes a batch through clean and RAG transformation stages.
+
+        Arrow batches (`batch_format="pyarrow"`) are transformed column by column with
+        Arrow kernels and never converted to pandas.
 
         Args:
-            batch: Input DataFrame batch from Ray Data.
+            batch: Input DataFrame or Arrow table batch from Ray Data.
 
         Returns:
-            Processed and formatted DataFrame batch.
+            Clothing products in the RAG schema, before the dataset-wide frequency
+            filters of DataPrepForRag.process_rag_dataset.
         """
         try:
             worker_node_id = ray.get_runtime_context().get_node_id()
         except Exception:
             worker_node_id = "local-worker"
 
-        cleaned_df = self.preprocessor.process_data(
+        rows = len(batch)
+        profile_stage = self.preprocessor.profile_stage
+        arrow_batch = is_arrow_batch(batch)
+        if arrow_batch:
+            uniq_ids = batch.column("uniq_id").to_pylist()
+        else:
+            uniq_ids = batch["uniq_id"].tolist()
+        if self.image_uris is not None:
+            with profile_stage("image_join", rows):
+                image_uris = [self.image_uris.get(uid) for uid in uniq_ids]
+                if arrow_batch:
+                    batch = batch.append_column(
+                        "image_uri", pa.array(image_uris, pa.string())
+                    )
+                else:
+                    batch["image_uri"] = image_uris
+
+        process = (
+            self.preprocessor.process_table
+            if arrow_batch
+            else self.preprocessor.process_data
+        )
+        cleaned_df = process(
             batch,
             ray_worker_node_id=worker_node_id,
             gcs_bucket=self.output_bucket,
             gcs_folder=self.output_image_folder,
         )
 
-        rag_df = self.rag_transformer.process_rag_input(cleaned_df)
+        with profile_stage("rag_transform", rows):
+            if arrow_batch:
+                rag_df = self.rag_transformer.select_rag_table(cleaned_df)
+            else:
+                rag_df = self.rag_transformer.select_rag_rows(cleaned_df)
+        if self.checkpoint is not None:
+            with profile_stage("checkpoint", len(rag_df)):
+                self.checkpoint.write_block(uniq_ids, rag_df)
+
+        if self.profile_aggregator is not None:
+            from datapreprocessing.profiling import flush_profile
+
+            flush_profile(self.preprocessor.profile, self.profile_aggregator)
         return rag_df
 
 
+class ImageDownloadActor:
+    """Stateful worker pool uploading deduplicated image URLs to GCS."""
+
+    def __init__(
+        self,
+        output_bucket: str,
+        output_image_folder: str,
+        async_image_fetch: bool = True,
+        image_max_connections: int = 64,
+        image_max_connections_per_host: int = 8,
+        incremental_images: bool = False,
+        revalidate_images: bool = False,
+        image_manifest_path: Optional[str] = None,
+        profile_aggregator: Optional[Any] = None,
+    ):
+        """Initializes worker actors with a DataPreprocessor used for image uploads.
+
+        Args:
+            output_bucket: Destination GCS bucket name.
+            output_image_folder: Destination GCS subfolder for images.
+            async_image_fetch: Download images with the pooled aiohttp engine instead of
+                urllib and a thread pool.
+            image_max_connections: Global concurrent connection limit of the image fetcher.
+            image_max_connections_per_host: Per-host concurrent connection limit of the
+                image fetcher.
+            incremental_images: Skip images already uploaded to the output image folder.
+            revalidate_images: Refetch already uploaded images whose ETag or size
+                changed at the source.
+            image_manifest_path: Optional JSON manifest of uploaded images to use instead
+                of listing the output image folder.
+            profile_aggregator: Optional ProfileAggregator actor handle. When set, every
+                batch's downloads are profiled and pushed to it.
+        """
+        from datapreprocessing.datacleaner import DataPreprocessor
+        from datapreprocessing.image_fetcher import AsyncImageFetcher
+        from datapreprocessing.profiling import PipelineProfile
+
+        self.profile_aggregator = profile_aggregator
+        profile = PipelineProfile() if profile_aggregator is not None else None
+
+        self.preprocessor = DataPreprocessor(
+            incremental_images=incremental_images,
+            revalidate_images=revalidate_images,
+            image_manifest_path=image_manifest_path,
+            profile=profile,
+        )
+        if async_image_fetch:
+            self.preprocessor.image_fetcher = AsyncImageFetcher(
+                self.preprocessor.storage_client,
+                max_connections=image_max_connections,
+                max_connections_per_host=image_max_connections_per_host,
+                profile=profile,
+            )
+
+        self.output_bucket = output_bucket
+        self.output_image_folder = output_image_folder
+
+    def __call__(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Uploads every unique URL of a batch to its blob name.
+
+        Args:
+            batch: DataFrame batch with 'url' and 'blob_name' columns.
+
+        Returns:
+            DataFrame with 'url', 'image_uri' (None on failure) and 'image_bytes' columns.
+        """
+        try:
+            worker_node_id = ray.get_runtime_context().get_node_id()
+        except Exception:
+            worker_node_id = "local-worker"
+
+        with self.preprocessor.profile_stage("image_download", len(batch)):
+            image_uris = self.preprocessor.fetch_images(
+                [
+                    [(url, blob_name)]
+                    for url, blob_name in zip(batch["url"], batch["blob_name"])
+                ],
+                worker_node_id,
+                self.output_bucket,
+                self.output_image_folder,
+            )
+        self._flush_profile()
+        # Per-image sizes are only measured by the async fetcher
+        if self.preprocessor.image_fetcher is not None:
+            image_bytes = self.preprocessor.last_image_fetch_stats.image_bytes
+        else:
+            image_bytes = [0] * len(batch)
+        return pd.DataFrame(
+            {
+                "url": batch["url"].to_numpy(),
+                "image_uri": image_uris,
+                "image_bytes": image_bytes,
+            }
+        )
+
+    def _flush_profile(self) -> None:
+        """Pushes the batch's profile to the aggregator when profiling is enabled."""
+        if self.profile_aggregator is not None:
+            from datapreprocessing.profiling import flush_profile
+
+            flush_profile(self.preprocessor.profile, self.profile_aggregator)
+
+
+class ProductImageActor(ImageDownloadActor):
+    """Stateful worker pool running the I/O-bound image stage on product rows."""
+
+    def __call__(self, batch: pd.DataFrame) -> pd.DataFrame:
+        """Downloads the images of a product batch and appends their GCS URIs.
+
+        Args:
+            batch: Input DataFrame or Arrow table batch from Ray Data.
+
+        Returns:
+            The batch with an added 'image_uri' column.
+        """
+        try:
+            worker_node_id = ray.get_runtime_context().get_node_id()
+        except Exception:
+            worker_node_id = "local-worker"
+
+        get_product_image = (
+            self.preprocessor.get_product_image_table
+            if is_arrow_batch(batch)
+            else self.preprocessor.get_product_image
+        )
+        with self.preprocessor.profile_stage("image_download", len(batch)):
+            batch = get_product_image(
+                batch, worker_node_id, self.output_bucket, self.output_image_folder
+            )
+        self._flush_profile()
+        return batch
+
+
 class RayDataPipelineOrchestrator:
     """Orchestrates streaming data pipelines using Ray Data engine."""
 
@@ -142,15 +542,41 @@ class RayDataPipelineOrchestrator:
         self,
         ray_cluster_host: Optional[str] = None,
         ray_runtime_env: Optional[Dict[str, Any]] = None,
+        preprocess_pool: Optional[ActorPoolConfig] = None,
+        image_pool: Optional[ActorPoolConfig] = None,
+        autotune: bool = False,
     ):
         """Initializes RayDataPipelineOrchestrator with cluster host and runtime environment.
 
         Args:
             ray_cluster_host: Address of Ray cluster endpoint (e.g. 'ray://...' or 'local').
             ray_runtime_env: Runtime environment configuration passed to Ray tasks and actors.
+            preprocess_pool: Actor pool of the preprocessing stage. Defaults to 1-8 actors
+                with batches of 200 rows.
+            image_pool: Actor pool of a separate, I/O-bound image download stage. When
+                unset, images are downloaded inside the preprocessing stage.
+            autotune: Size both pools from `ray.cluster_resources()` and always split
+                image downloads into their own stage. Explicit pool configs take precedence.
         """
         self.ray_cluster_host = ray_cluster_host
         self.ray_runtime_env = ray_runtime_env
+        self.preprocess_pool = preprocess_pool
+        self.image_pool = image_pool
+        self.autotune = autotune
+        self.last_profile = None
+
+    def _resolve_actor_pools(
+        self,
+    ) -> Tuple[ActorPoolConfig, Optional[ActorPoolConfig]]:
+        """Returns the (preprocessing, image) pool configs for the connected cluster."""
+        preprocess_pool, image_pool = self.preprocess_pool, self.image_pool
+        if self.autotune:
+            tuned_preprocess_pool, tuned_image_pool = autotune_actor_pools(
+                ray.cluster_resources()
+            )
+            preprocess_pool = preprocess_pool or tuned_preprocess_pool
+            image_pool = image_pool or tuned_image_pool
+        return preprocess_pool or ActorPoolConfig(), image_pool
 
     def execute(
         self,
@@ -159,8 +585,24 @@ class RayDataPipelineOrchestrator:
         output_bucket: str,
         output_path: str,
         output_image_folder: str,
+        incremental_images: bool = False,
+        revalidate_images: bool = False,
+        image_manifest_path: Optional[str] = None,
+        dedupe_images: bool = False,
+        dedupe_max_candidates: int = DEDUPE_MAX_CANDIDATES,
+        output_format: str = "csv",
+        parquet_compression: str = "snappy",
+        parquet_row_group_size: Optional[int] = None,
+        partition_cols: Optional[List[str]] = None,
+        checkpoint_uri: Optional[str] = None,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+        profile: bool = False,
+        profile_uri: Optional[str] = None,
+        profile_format: str = "json",
+        batch_format: str = "pandas",
     ) -> None:
-        """Executes zero-copy GCS lazy reading, batch map transformation, and single-file CSV export.
+        """Executes zero-copy GCS lazy reading, batch map transformation, and CSV or Parquet export.
 
         How Ray initialization is handled:
         - If Ray is already initialized in current context (e.g. Ray Job driver), it reuses session.
@@ -173,7 +615,71 @@ class RayDataPipelineOrchestrator:
             output_bucket: Destination GCS bucket for processed dataset.
             output_path: Destination path for output dataset.
             output_image_folder: Folder name in output_bucket for extracted images.
+            incremental_images: Skip images that a previous run already uploaded.
+            revalidate_images: Refetch already uploaded images that changed at the source.
+            image_manifest_path: Optional JSON manifest of uploaded images, used instead
+                of listing output_image_folder in incremental mode.
+            dedupe_images: Download every unique image URL of the dataset once in a
+                pre-pass stage and join the resulting URIs back to the rows. The pre-pass
+                plans downloads on the driver and hands every actor the full uniq_id to
+                image URI mapping, so both grow with the catalog.
+            dedupe_max_candidates: Maximum number of image candidates (one per row and
+                image URL) of the dedupe pre-pass. Larger datasets fall back to
+                downloading the images of every row independently.
+            output_format: 'csv' coalesces the output into a single CSV file. 'parquet'
+                writes one Parquet file per block in parallel into a dataset directory
+                named after output_path without its extension.
+            parquet_compression: Parquet compression codec (e.g. 'snappy', 'zstd').
+            parquet_row_group_size: Optional maximum number of rows per Parquet row group.
+            partition_cols: Optional columns to Hive-partition the Parquet output by.
+                Row group sizing and partitioning need Ray's newer Parquet datasink
+                (Ray 2.54, as pinned by the data processing container image), older
+                releases raise a ValueError before the run starts.
+            checkpoint_uri: Optional local directory or 'gs://' URI under which every
+                processed batch is checkpointed, grouped by run ID.
+            run_id: Identifier of the run. Generated when checkpointing a new run;
+                required to resume one.
+            resume: Skip rows completed by an earlier attempt of `run_id` and merge their
+                checkpointed output into the final result.
+            profile: Record per-stage wall time, rows/sec, downloaded bytes and
+                download/upload latency histograms in every actor, aggregate them at the
+                end of the run into `last_profile` and log a summary. CSV parsing runs
+                inside Ray's read operator and is covered by Ray Data's own stats.
+            profile_uri: Optional local path or 'gs://' URI to export the aggregated
+                profile to. Implies profile=True.
+            profile_format: Export format of profile_uri, 'json' or 'prometheus'.
+            batch_format: 'pandas', or 'pyarrow' to hand the Arrow blocks read from the
+                CSV to every stage as zero-copy Arrow tables and transform them with
+                Arrow compute kernels instead of converting them to pandas per batch.
         """
+        if output_format not in ("csv", "parquet"):
+            raise ValueError(
+                f"Unsupported output_format '{output_format}', expected 'csv' or 'parquet'"
+            )
+        if (
+            output_format == "parquet"
+            and (parquet_row_group_size is not None or partition_cols)
+            and not parquet_datasink_options_supported()
+        ):
+            raise ValueError(
+                f"parquet_row_group_size and partition_cols are not supported by "
+                f"Dataset.write_parquet in Ray {ray.__version__}, they need a release "
+                f"whose write_parquet takes partition_cols (e.g. Ray 2.54)"
+            )
+        if resume and not (checkpoint_uri and run_id):
+            raise ValueError("resume=True requires both checkpoint_uri and run_id")
+        if batch_format not in BATCH_FORMATS:
+            raise ValueError(
+                f"Unsupported batch_format '{batch_format}', expected one of {BATCH_FORMATS}"
+            )
+        from datapreprocessing.profiling import PROFILE_FORMATS
+
+        if profile_format not in PROFILE_FORMATS:
+            raise ValueError(
+                f"Unsupported profile_format '{profile_format}', expected one of {PROFILE_FORMATS}"
+            )
+        profile = profile or bool(profile_uri)
+
         initialized_by_orchestrator = False
 
         if self.ray_cluster_host and self.ray_cluster_host != "local":
@@ -203,7 +709,10 @@ class RayDataPipelineOrchestrator:
         input_uri = f"gs://{input_bucket}/{input_path.lstrip('/')}"
 
         target_output_path = output_path.lstrip("/")
-        if target_output_path.endswith(".csv"):
+        if output_format == "parquet":
+            directory_path = os.path.splitext(target_output_path)[0]
+            target_filename = None
+        elif target_output_path.endswith(".csv"):
             directory_path = os.path.dirname(target_output_path)
             target_filename = os.path.basename(target_output_path)
         else:
@@ -239,41 +748,244 @@ class RayDataPipelineOrchestrator:
             "product_category_tree",
         ]
 
+        profile_aggregator = None
+        if profile:
+            from datapreprocessing.profiling import ProfileAggregator
+
+            profile_aggregator = ray.remote(num_cpus=0)(ProfileAggregator).remote()
+
         def drop_null_records(df: pd.DataFrame) -> pd.DataFrame:
-            """Filters required non-null columns from pandas batch."""
-            valid_cols = [col for col in required_cols if col in df.columns]
-            valid_filter_cols = [col for col in filter_null_cols if col in df.columns]
-            return df[valid_cols].dropna(subset=valid_filter_cols).copy()
+            """Filters required non-null columns from pandas batch or Arrow table."""
+            batch_start, batch_rows = time.perf_counter(), len(df)
+            if is_arrow_batch(df):
+                valid_cols = [col for col in required_cols if col in df.column_names]
+                df = df.select(valid_cols)
+                for col in filter_null_cols:
+                    if col in valid_cols:
+                        df = df.filter(pc.is_valid(df.column(col)))
+            else:
+                valid_cols = [col for col in required_cols if col in df.columns]
+                valid_filter_cols = [
+                    col for col in filter_null_cols if col in df.columns
+                ]
+                df = df[valid_cols].dropna(subset=valid_filter_cols).copy()
+            if profile_aggregator is not None:
+                from datapreprocessing.profiling import PipelineProfile, flush_profile
+
+                batch_profile = PipelineProfile()
+                batch_profile.record_stage(
+                    "null_drop", batch_rows, time.perf_counter() - batch_start
+                )
+                flush_profile(batch_profile, profile_aggregator)
+            return df
+
+        filtered_dataset = dataset.map_batches(
+            drop_null_records, batch_format=batch_format
+        )
 
-        filtered_dataset = dataset.map_batches(drop_null_records, batch_format="pandas")
+        preprocess_pool, image_pool = self._resolve_actor_pools()
+
+        checkpoint_data_uris = []
+        if checkpoint_uri:
+            from datapreprocessing.checkpoint import CheckpointStore, new_run_id
+
+            run_id = run_id or new_run_id()
+            logger.info(
+                f"Checkpointing run {run_id} to {checkpoint_uri}; pass "
+                f"run_id='{run_id}' and resume=True to resume it"
+            )
+            checkpoint = CheckpointStore(checkpoint_uri, run_id)
+            if resume:
+                completed_ids, checkpoint_data_uris = checkpoint.completed()
+                if completed_ids:
+                    filtered_dataset = filtered_dataset.map_batches(
+                        drop_completed_rows,
+                        fn_kwargs={"completed_ids": completed_ids},
+                        batch_format=batch_format,
+                    )
+
+        image_kwargs = {
+            "output_bucket": output_bucket,
+            "output_image_folder": output_image_folder,
+            "incremental_images": incremental_images,
+            "revalidate_images": revalidate_images,
+            "image_manifest_path": image_manifest_path,
+            "profile_aggregator": profile_aggregator,
+        }
+        actor_kwargs = dict(image_kwargs)
+        if checkpoint_uri:
+            actor_kwargs["checkpoint_uri"] = checkpoint_uri
+            actor_kwargs["run_id"] = run_id
+        image_uris = None
+        if dedupe_images:
+            # Materialize the filtered rows once so the pre-pass and the main pass share them
+            filtered_dataset = filtered_dataset.materialize()
+            image_uris = self._dedupe_images(
+                filtered_dataset,
+                output_image_folder,
+                image_kwargs,
+                image_pool or preprocess_pool,
+                dedupe_max_candidates,
+            )
+        if image_uris is not None:
+            actor_kwargs["image_uris"] = ray.put(image_uris)
+        elif image_pool is not None:
+            # Split the I/O-bound image downloads into their own independently sized pool
+            filtered_dataset = filtered_dataset.map_batches(
+                ProductImageActor,
+                fn_constructor_kwargs=image_kwargs,
+                batch_format=batch_format,
+                **image_pool.map_batches_kwargs(),
+            )
+            actor_kwargs["async_image_fetch"] = False
 
         # Step 3: Stream batches dynamically through the stateful Actor processing loop
         processed_dataset = filtered_dataset.map_batches(
             PreprocessingActor,
-            fn_constructor_kwargs={
-                "output_bucket": output_bucket,
-                "output_image_folder": output_image_folder,
-            },
-            compute=ray.data.ActorPoolStrategy(min_size=1, max_size=8),
-            batch_size=200,
-            batch_format="pandas",
+            fn_constructor_kwargs=actor_kwargs,
+            batch_format=batch_format,
+            # Arrow batches are never modified in place, so the actor can read the blocks
+            # straight from the object store without a defensive copy
+            zero_copy_batch=batch_format == "pyarrow",
+            **preprocess_pool.map_batches_kwargs(),
         )
 
-        logger.info(
-            f"Coalescing data blocks down to single partition file: {target_filename}"
-        )
+        if checkpoint_data_uris:
+            # Merge the output of blocks completed before the resumed run was interrupted
+            processed_dataset = processed_dataset.union(
+                read_checkpointed_blocks(checkpoint_data_uris, batch_format)
+            )
 
-        # Coalesce the sharded data fragments into exactly 1 memory partition
-        single_block_dataset = processed_dataset.repartition(1)
+        # Category frequencies must be counted over the whole catalog rather than per
+        # batch, so keep the processed rows in the object store for the counting pass
+        from datapreprocessing.datacleaner import DataPrepForRag
 
-        # Step 4: Write output natively to GCS as a single, cleanly named CSV file
-        single_block_dataset.write_csv(
-            output_directory_uri,
-            filename_provider=SingleFilenameProvider(target_filename),
+        processed_dataset = DataPrepForRag().process_rag_dataset(
+            processed_dataset.materialize(), batch_format=batch_format
         )
 
+        if output_format == "parquet":
+            # Step 4: Write columnar output in parallel, one Parquet file per block
+            parquet_args = {"compression": parquet_compression}
+            if parquet_row_group_size is not None:
+                parquet_args["row_group_size"] = parquet_row_group_size
+            if partition_cols:
+                parquet_args["partition_cols"] = partition_cols
+            logger.info(
+                f"Writing Parquet dataset to {output_directory_uri} with {parquet_args}"
+            )
+            processed_dataset.write_parquet(output_directory_uri, **parquet_args)
+        else:
+            logger.info(
+                f"Coalescing data blocks down to single partition file: {target_filename}"
+            )
+
+            # Coalesce the sharded data fragments into exactly 1 memory partition
+            single_block_dataset = processed_dataset.repartition(1)
+
+            # Step 4: Write output natively to GCS as a single, cleanly named CSV file
+            single_block_dataset.write_csv(
+                output_directory_uri,
+                filename_provider=SingleFilenameProvider(target_filename),
+            )
+
         duration = time.time() - start_time
         logger.info(f"Ray Data engine successfully finished in {duration:.2f} seconds")
 
+        if profile_aggregator is not None:
+            self.last_profile = ray.get(profile_aggregator.snapshot.remote())
+            self.last_profile.add("pipeline_seconds", duration)
+            logger.info(f"Pipeline profile:\n{self.last_profile.summary()}")
+            if profile_uri:
+                self.last_profile.export(profile_uri, profile_format)
+            ray.kill(profile_aggregator)
+
         if initialized_by_orchestrator:
             ray.shutdown()
+
+    def _dedupe_images(
+        self,
+        dataset: Any,
+        output_image_folder: str,
+        image_kwargs: Dict[str, Any],
+        image_pool: ActorPoolConfig,
+        max_candidates: int = DEDUPE_MAX_CANDIDATES,
+    ) -> Optional[Dict[str, str]]:
+        """Downloads every unique image URL of the dataset once.
+
+        Candidates are exploded and collected on the driver, then unique URLs are fetched
+        by an ImageDownloadActor pool in rounds until every row has an uploaded image or
+        has exhausted its candidates.
+
+        The candidates, the download results and the returned mapping are held in driver
+        memory, and the mapping is shipped to every PreprocessingActor, so the pre-pass
+        is skipped for datasets with more than max_candidates candidates.
+
+        Args:
+            dataset: Filtered Ray Dataset of product rows.
+            output_image_folder: Folder name in the output bucket for extracted images.
+            image_kwargs: Constructor arguments for ImageDownloadActor.
+            image_pool: Actor pool of the download rounds.
+            max_candidates: Maximum number of candidates collected on the driver.
+
+        Returns:
+            Mapping of uniq_id to the GCS URI of the row's image, or None when the
+            dataset has more than max_candidates candidates.
+        """
+        from datapreprocessing.image_dedup import (
+            explode_image_candidates,
+            pending_image_requests,
+            resolve_image_uris,
+            summarize_image_dedup,
+        )
+
+        candidate_dataset = dataset.map_batches(
+            explode_image_candidates,
+            fn_kwargs={"gcs_folder": output_image_folder},
+            batch_format="pandas",
+        ).materialize()
+        num_candidates = candidate_dataset.count()
+        if num_candidates > max_candidates:
+            logger.warning(
+                f"Skipping the image pre-pass: {num_candidates} image candidates exceed "
+                f"dedupe_max_candidates={max_candidates}, downloading per row instead"
+            )
+            return None
+        candidates = candidate_dataset.to_pandas().reset_index(drop=True)
+
+        resolved = {}
+        image_bytes = {}
+        rounds = 0
+        while True:
+            pending = pending_image_requests(candidates, resolved)
+            if pending.empty:
+                break
+            rounds += 1
+            logger.info(
+                f"Image pre-pass round {rounds}: downloading {len(pending)} unique URLs"
+            )
+            downloads = (
+                ray.data.from_pandas(pending)
+                .map_batches(
+                    ImageDownloadActor,
+                    fn_constructor_kwargs=image_kwargs,
+                    batch_format="pandas",
+                    **image_pool.map_batches_kwargs(),
+                )
+                .to_pandas()
+            )
+            for url, image_uri, size in zip(
+                downloads["url"], downloads["image_uri"], downloads["image_bytes"]
+            ):
+                resolved[url] = image_uri if isinstance(image_uri, str) else None
+                image_bytes[url] = int(size)
+
+        report = summarize_image_dedup(candidates, resolved, image_bytes, rounds)
+        logger.info(
+            f"Image pre-pass finished in {report.rounds} rounds: {report.rows} rows reference "
+            f"{report.candidate_urls} image URLs ({report.unique_urls} unique). Issued "
+            f"{report.requests} requests instead of {report.baseline_requests} "
+            f"({report.requests_saved} saved) and downloaded {report.bytes_downloaded / 1e6:.1f} MB "
+            f"instead of {report.baseline_bytes / 1e6:.1f} MB ({report.bytes_saved / 1e6:.1f} MB saved)"
+        )
+        return resolve_image_uris(candidates, resolved)
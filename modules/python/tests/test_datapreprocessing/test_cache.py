@@ -0,0 +1,88 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for cache module."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from src.datapreprocessing.cache import ContentHashCache
+
+
+class TestContentHashCache(unittest.TestCase):
+    """Unit tests covering the in-process LRU and the SQLite disk tier."""
+
+    def test_get_or_compute_counts_hits_and_misses(self):
+        """Test that a value is computed once and then served from memory."""
+        cache = ContentHashCache()
+        compute = Mock(side_effect=str.upper)
+
+        self.assertEqual(cache.get_or_compute("ns", "abc", compute), "ABC")
+        self.assertEqual(cache.get_or_compute("ns", "abc", compute), "ABC")
+
+        compute.assert_called_once_with("abc")
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_namespaces_are_isolated(self):
+        """Test that the same text in different namespaces does not collide."""
+        cache = ContentHashCache()
+        cache.put("description", "abc", "one")
+        self.assertIsNone(cache.get("attributes", "abc"))
+        self.assertEqual(cache.get("description", "abc"), "one")
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted past max_entries."""
+        cache = ContentHashCache(max_entries=2)
+        cache.put("ns", "a", "1")
+        cache.put("ns", "b", "2")
+        cache.get("ns", "a")
+        cache.put("ns", "c", "3")
+
+        self.assertEqual(cache.get("ns", "a"), "1")
+        self.assertIsNone(cache.get("ns", "b"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_get_many_dedupes_missing(self):
+        """Test that get_many returns unique misses in first-seen order."""
+        cache = ContentHashCache()
+        cache.put("ns", "b", "2")
+        found, missing = cache.get_many("ns", ["a", "b", "a", "c"])
+        self.assertEqual(found, {"b": "2"})
+        self.assertEqual(missing, ["a", "c"])
+
+    def test_sqlite_tier_is_shared(self):
+        """Test that flushed entries are visible to another cache on the same file."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "cache.sqlite")
+            writer = ContentHashCache(sqlite_path=path, flush_every=100)
+            writer.put("ns", "abc", "value")
+            writer.flush()
+
+            reader = ContentHashCache(sqlite_path=path)
+            self.assertEqual(reader.get("ns", "abc"), "value")
+            self.assertEqual(reader.get("ns", "abc"), "value")
+            self.assertEqual(reader.stats()["disk_hits"], 1)
+            self.assertEqual(reader.stats()["hits"], 1)
+
+            writer.close()
+            reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
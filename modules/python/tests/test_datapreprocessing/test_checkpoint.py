@@ -0,0 +1,72 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for checkpoint module."""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+from src.datapreprocessing.checkpoint import CheckpointStore, new_run_id
+
+
+class TestCheckpointStore(unittest.TestCase):
+    """Unit tests for CheckpointStore on local storage."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = CheckpointStore(self.tmpdir.name, "run-1")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_completed_lists_written_blocks(self):
+        """Test that written blocks are reported with their rows and data files."""
+        df = pd.DataFrame({"Id": ["a", "b"], "Name": ["x", "y"]})
+        key = self.store.write_block(["a", "b", "c"], df)
+        self.store.write_block(["d"], df.iloc[0:0])
+
+        completed_ids, data_uris = self.store.completed()
+
+        self.assertEqual(completed_ids, {"a", "b", "c", "d"})
+        self.assertEqual(data_uris, [f"{self.tmpdir.name}/run-1/blocks/{key}.parquet"])
+        pd.testing.assert_frame_equal(pd.read_parquet(data_uris[0]), df)
+
+    def test_block_without_marker_is_not_completed(self):
+        """Test that a data file whose marker was never written is ignored."""
+        key = self.store.write_block(["a"], pd.DataFrame({"Id": ["a"]}))
+        os.remove(os.path.join(self.tmpdir.name, "run-1", "done", f"{key}.json"))
+
+        self.assertEqual(self.store.completed(), (set(), []))
+
+    def test_block_key_is_content_addressed(self):
+        """Test that block keys depend only on the batch's uniq_ids."""
+        self.assertEqual(
+            CheckpointStore.block_key(["a", "b"]), CheckpointStore.block_key(["a", "b"])
+        )
+        self.assertNotEqual(
+            CheckpointStore.block_key(["a", "b"]), CheckpointStore.block_key(["ab"])
+        )
+
+    def test_runs_are_isolated(self):
+        """Test that checkpoints of one run are invisible to another."""
+        self.store.write_block(["a"], pd.DataFrame({"Id": ["a"]}))
+        other = CheckpointStore(self.tmpdir.name, new_run_id())
+
+        self.assertEqual(other.completed(), (set(), []))
+
+
+if __name__ == "__main__":
+    unittest.main()
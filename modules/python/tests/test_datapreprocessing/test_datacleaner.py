@@ -12,11 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
+import re
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pandas as pd
-from src.datapreprocessing.datacleaner import DataPrepForRag, DataPreprocessor
+import pyarrow as pa
+import ray
+from src.datapreprocessing.cache import ContentHashCache
+from src.datapreprocessing.datacleaner import (
+    RAG_COLUMNS,
+    DataPrepForRag,
+    DataPreprocessor,
+    frequent_value_sets,
+    load_spacy_model,
+)
 
 
 class TestDataCleaner(unittest.TestCase):
@@ -72,6 +83,141 @@ class TestDataCleaner(unittest.TestCase):
         cleaned_df = cleaner.prep_product_desc(self.df.copy())
         self.assertEqual(cleaned_df["description"][0], "test")
 
+    @patch("src.datapreprocessing.datacleaner.spacy")
+    def test_nlp_is_loaded_lazily_once(self, mock_spacy):
+        """Test that the spaCy model is only loaded on first use, without unused pipes."""
+        cleaner = DataPreprocessor()
+        mock_spacy.load.assert_not_called()
+
+        self.assertIs(cleaner.nlp, mock_spacy.load.return_value)
+        self.assertIs(cleaner.nlp, mock_spacy.load.return_value)
+
+        mock_spacy.load.assert_called_once_with(
+            "en_core_web_sm", exclude=["parser", "ner"]
+        )
+        mock_spacy.cli.download.assert_not_called()
+
+    @patch("src.datapreprocessing.datacleaner.DataPreprocessor.download_image")
+    @patch("src.datapreprocessing.datacleaner.spacy")
+    def test_image_only_path_skips_nlp_load(self, mock_spacy, mock_download_image):
+        """Test that downloading images never loads the spaCy model."""
+        mock_download_image.return_value = True
+
+        DataPreprocessor().get_product_image(self.df.copy(), "node", "bucket", "folder")
+
+        mock_spacy.load.assert_not_called()
+
+    @patch("src.datapreprocessing.datacleaner.spacy")
+    def test_load_spacy_model_downloads_missing_model_once(self, mock_spacy):
+        """Test that a missing model is downloaded under the node lock, then loaded."""
+        mock_spacy.load.side_effect = [OSError("missing"), OSError("missing"), "nlp"]
+
+        self.assertEqual(load_spacy_model("en_core_web_sm", ["ner"]), "nlp")
+
+        mock_spacy.cli.download.assert_called_once_with("en_core_web_sm")
+        self.assertEqual(mock_spacy.load.call_count, 3)
+
+    def _fake_nlp(self):
+        """Builds a whitespace-tokenizing stand-in for the spaCy pipeline."""
+        stop_words = {"this", "is", "a"}
+
+        def tokenize(text):
+            return [
+                Mock(
+                    lemma_=word.strip("."),
+                    is_stop=word in stop_words,
+                    is_alpha=word.strip(".").isalpha(),
+                )
+                for word in text.split()
+            ]
+
+        nlp = Mock(side_effect=tokenize, pipe_names=["tagger", "parser", "ner"])
+        nlp.pipe.side_effect = lambda texts, **kwargs: (tokenize(t) for t in texts)
+        return nlp
+
+    def test_prep_product_desc_batched_matches_per_row(self):
+        """Test that the batched nlp.pipe path returns the per-row results in order."""
+        row_cleaner = DataPreprocessor()
+        row_cleaner.nlp = self._fake_nlp()
+        batch_cleaner = DataPreprocessor(nlp_batch_size=2)
+        batch_cleaner.nlp = self._fake_nlp()
+
+        expected = row_cleaner.prep_product_desc(self.df.copy())
+        cleaned_df = batch_cleaner.prep_product_desc(self.df.copy())
+
+        pd.testing.assert_series_equal(
+            cleaned_df["description"], expected["description"]
+        )
+        self.assertEqual(cleaned_df["description"][0], "test description")
+        self.assertEqual(cleaned_df["description"][2], "None")
+        batch_cleaner.nlp.pipe.assert_called_once()
+        self.assertEqual(
+            batch_cleaner.nlp.pipe.call_args.kwargs["disable"], ["parser", "ner"]
+        )
+        batch_cleaner.nlp.assert_not_called()
+
+    def test_prep_product_desc_batched_falls_back_per_row(self):
+        """Test that a failing nlp.pipe stream falls back to per-row parsing."""
+        cleaner = DataPreprocessor(nlp_batch_size=2)
+        cleaner.nlp = self._fake_nlp()
+        cleaner.nlp.pipe.side_effect = ValueError("bad document")
+
+        cleaned_df = cleaner.prep_product_desc(self.df.copy())
+
+        self.assertEqual(cleaned_df["description"][0], "test description")
+        self.assertEqual(cleaned_df["description"][1], "another description")
+        self.assertEqual(cleaned_df["description"][2], "None")
+
+    def test_prep_product_desc_batched_short_pipe_falls_back_per_row(self):
+        """Test that descriptions missing from a short nlp.pipe stream are parsed per row."""
+        cleaner = DataPreprocessor(nlp_batch_size=2)
+        cleaner.nlp = self._fake_nlp()
+        pipe = cleaner.nlp.pipe.side_effect
+        cleaner.nlp.pipe.side_effect = lambda texts, **kwargs: pipe(texts[:1])
+
+        cleaned_df = cleaner.prep_product_desc(self.df.copy())
+
+        self.assertEqual(cleaned_df["description"][0], "test description")
+        self.assertEqual(cleaned_df["description"][1], "another description")
+        self.assertEqual(cleaned_df["description"][2], "None")
+        cleaner.nlp.assert_called_once_with("another description.")
+
+    def test_prep_product_desc_batched_empty_pipe(self):
+        """Test that a pipeline yielding no documents degrades like per-row parsing."""
+        cleaner = DataPreprocessor(nlp_batch_size=2)
+        cleaner.nlp = MagicMock()
+
+        cleaned_df = cleaner.prep_product_desc(self.df.copy())
+
+        self.assertEqual(len(cleaned_df), len(self.df))
+        self.assertEqual(cleaned_df["description"][2], "None")
+
+    def test_prep_product_desc_batched_uses_cache(self):
+        """Test that cached and duplicate descriptions are not parsed again."""
+        cleaner = DataPreprocessor(nlp_batch_size=2, cache=ContentHashCache())
+        cleaner.nlp = self._fake_nlp()
+        df = pd.DataFrame({"description": ["Red shirt", "red shirt", "Blue shirt"]})
+
+        first = cleaner.prep_product_desc(df.copy())
+        second = cleaner.prep_product_desc(df.copy())
+
+        self.assertEqual(list(first["description"]), ["red shirt"] * 2 + ["blue shirt"])
+        pd.testing.assert_series_equal(first["description"], second["description"])
+        cleaner.nlp.pipe.assert_called_once()
+        self.assertEqual(
+            list(cleaner.nlp.pipe.call_args.args[0]), ["red shirt", "blue shirt"]
+        )
+        self.assertEqual(cleaner.cache.stats()["hits"], 2)
+
+    def test_parse_attributes_uses_cache(self):
+        """Test that repeated specifications are served from the cache."""
+        cleaner = DataPreprocessor(cache=ContentHashCache())
+        spec = self.df["product_specifications"][0]
+        self.assertEqual(cleaner.parse_attributes(spec), '{"value1": "value2"}')
+        self.assertEqual(cleaner.parse_attributes(spec), '{"value1": "value2"}')
+        self.assertEqual(cleaner.cache.stats()["hits"], 1)
+        self.assertEqual(cleaner.cache.stats()["misses"], 1)
+
     def test_parse_attributes(self):
         """Test if product attributes are parsed correctly."""
         attributes = self.cleaner.parse_attributes(self.df["product_specifications"][0])
@@ -79,6 +225,54 @@ class TestDataCleaner(unittest.TestCase):
         attributes = self.cleaner.parse_attributes(self.df["product_specifications"][1])
         self.assertEqual(attributes, "{}")
 
+    def test_parse_attributes_column_matches_character_walk(self):
+        """Test that the column parser matches the original character-by-character walk."""
+
+        def character_walk(specification):
+            if pd.isna(specification):
+                return "{}"
+            m = re.compile("(.*?)\\[(.*)\\](.*)").match(str(specification))
+            out = {}
+            if m is not None and m.group(2) is not None:
+                phrase = ""
+                for c in m.group(2):
+                    if c == "}":
+                        m2 = re.compile('(.*?)=>"(.*?)"(.*?)=>"(.*?)"(.*)').match(
+                            phrase
+                        )
+                        if m2 and m2.group(2) is not None and m2.group(4) is not None:
+                            out[m2.group(2)] = m2.group(4)
+                        phrase = ""
+                    else:
+                        phrase += c
+            return json.dumps(out)
+
+        flipkart_spec = (
+            '{"product_specification"=>[{"key"=>"Fabric", "value"=>"Cotton"}, '
+            '{"key"=>"Pattern", "value"=>"Solid"}, {"value"=>"Machine Wash"}]}'
+        )
+        specs = pd.Series(
+            [
+                flipkart_spec,
+                None,
+                flipkart_spec,
+                '[{"key"=>"Sleeve", "value"=>"Full"}, {"key"=>"Trailing", "value"=>"x"',
+                '[{"key"=>"Multi\nLine", "value"=>"Cotton"}]',
+                "no brackets at all",
+                "",
+                12,
+            ],
+            index=[4, 8, 15, 16, 23, 42, 7, 1],
+        )
+
+        expected = specs.apply(character_walk)
+        pd.testing.assert_series_equal(
+            self.cleaner.parse_attributes_column(specs), expected
+        )
+        self.assertEqual(
+            json.loads(expected[4]), {"Fabric": "Cotton", "Pattern": "Solid"}
+        )
+
     @patch("src.datapreprocessing.datacleaner.DataPreprocessor.download_image")
     def test_get_product_image(self, mock_download_image):
         """Test if product images are downloaded and URIs are updated."""
@@ -113,6 +307,60 @@ class TestDataCleaner(unittest.TestCase):
             mock_download_image.call_count, 2
         )  # 1 for url1, 1 for url2/url3
 
+    def test_get_product_image_uses_image_fetcher(self):
+        """Test that an injected image fetcher receives ordered candidates per row."""
+        fetcher = Mock()
+        fetcher.fetch_rows.return_value = (
+            ["gs://test_bucket/test_path/1_0.jpg", None, None],
+            "stats",
+        )
+        self.cleaner.image_fetcher = fetcher
+
+        cleaned_df = self.cleaner.get_product_image(
+            self.df.copy(), 1, "test_bucket", "test_path"
+        )
+
+        fetcher.fetch_rows.assert_called_once_with(
+            [
+                [("url1", "test_path/1_0.jpg")],
+                [("url2", "test_path/2_0.jpg"), ("url3", "test_path/2_1.jpg")],
+                [],
+            ],
+            "test_bucket",
+            1,
+            image_index=None,
+            revalidate=False,
+        )
+        self.assertEqual(
+            cleaned_df["image_uri"].tolist(),
+            ["gs://test_bucket/test_path/1_0.jpg", None, None],
+        )
+        self.assertEqual(self.cleaner.last_image_fetch_stats, "stats")
+
+    @patch("src.datapreprocessing.datacleaner.DataPreprocessor.download_image")
+    def test_get_product_image_incremental_skips_uploaded(self, mock_download_image):
+        """Test that incremental mode lists the folder once and skips uploaded images."""
+        existing = Mock(size=10, metadata={"source_url": "url1"})
+        existing.name = "test_path/1_0.jpg"
+        self.cleaner.storage_client.list_blobs.return_value = [existing]
+        self.cleaner.incremental_images = True
+        mock_download_image.return_value = True
+
+        for _ in range(2):
+            cleaned_df = self.cleaner.get_product_image(
+                self.df.copy(), 1, "test_bucket", "test_path"
+            )
+
+        self.assertEqual(self.cleaner.storage_client.list_blobs.call_count, 1)
+        self.assertEqual(
+            cleaned_df["image_uri"][0], "gs://test_bucket/test_path/1_0.jpg"
+        )
+        self.assertEqual(
+            cleaned_df["image_uri"][1], "gs://test_bucket/test_path/2_0.jpg"
+        )
+        downloaded_urls = [call.args[0] for call in mock_download_image.call_args_list]
+        self.assertEqual(downloaded_urls, ["url2", "url2"])
+
     def test_reformat(self):
         """Test if the reformat method cleans the text correctly."""
         text = '[ "Test" ]'
@@ -125,6 +373,43 @@ class TestDataCleaner(unittest.TestCase):
         self.assertEqual(cleaned_df["c0_name"][0], "Category A")
         self.assertEqual(cleaned_df["c1_name"][0], "Category B")
 
+    def test_prep_cat_matches_row_wise_split(self):
+        """Test that the vectorized category split matches the row-wise reformat/split."""
+        self._assert_prep_cat_matches_row_wise_split()
+
+    @patch("src.datapreprocessing.datacleaner.pc", None)
+    def test_prep_cat_matches_row_wise_split_without_pyarrow(self):
+        """Test that the pandas string accessor fallback matches the row-wise split."""
+        self._assert_prep_cat_matches_row_wise_split()
+
+    def _assert_prep_cat_matches_row_wise_split(self):
+        trees = [
+            '["Clothing >> Women\'s Clothing >> Western Wear >> Tops"]',
+            "A >> B >> C >> D >> E >> F >> G >> H",
+            "  Padded  >>  >> Level ",
+            "",
+            None,
+            42,
+        ]
+        df = pd.DataFrame(
+            {"product_category_tree": pd.Series(trees, dtype=object)},
+            index=[7, 3, 11, 0, 5, 9],
+        )
+
+        expected = pd.DataFrame(index=df.index)
+        splits = (
+            df["product_category_tree"].apply(self.cleaner.reformat).str.split(">>")
+        )
+        for i in range(6):
+            expected[f"c{i}_name"] = splits.apply(
+                lambda x: x[i].strip() if isinstance(x, list) and len(x) > i else ""
+            )
+
+        pd.testing.assert_frame_equal(self.cleaner.prep_cat(df.copy()), expected)
+        pd.testing.assert_frame_equal(
+            self.cleaner.prep_cat(df.iloc[:0].copy()), expected.iloc[:0]
+        )
+
     @patch.object(DataPreprocessor, "get_product_image")
     @patch.object(DataPreprocessor, "prep_product_desc")
     @patch.object(DataPreprocessor, "prep_cat")
@@ -140,6 +425,39 @@ class TestDataCleaner(unittest.TestCase):
         )
         self.assertEqual(len(cleaned_df), 3)
 
+    def test_process_table_matches_process_data(self):
+        """Test that the Arrow-native path returns the same columns and values."""
+        cleaner = DataPreprocessor(nlp_batch_size=2)
+        cleaner.nlp = self._fake_nlp()
+        df = self.df.assign(image_uri=["gs://b/1.jpg", None, None])
+
+        expected = cleaner.process_data(df.copy(), 1, "test_bucket", "test_path")
+        table = cleaner.process_table(
+            pa.Table.from_pandas(df, preserve_index=False),
+            1,
+            "test_bucket",
+            "test_path",
+        )
+
+        self.assertIsInstance(table, pa.Table)
+        pd.testing.assert_frame_equal(table.to_pandas(), expected)
+
+    @patch.object(DataPreprocessor, "fetch_images")
+    def test_get_product_image_table_appends_arrow_column(self, mock_fetch_images):
+        """Test that image URIs are appended as an Arrow string column."""
+        mock_fetch_images.return_value = ["gs://b/1_0.jpg", None, None]
+        table = pa.Table.from_pandas(self.df, preserve_index=False)
+
+        result = self.cleaner.get_product_image_table(table, 1, "b", "folder")
+
+        self.assertEqual(result.column_names, table.column_names + ["image_uri"])
+        self.assertEqual(result.schema.field("image_uri").type, pa.string())
+        self.assertEqual(
+            result.column("image_uri").to_pylist(), ["gs://b/1_0.jpg", None, None]
+        )
+        candidates = mock_fetch_images.call_args.args[0]
+        self.assertEqual(candidates[0], [("url1", "folder/1_0.jpg")])
+
 
 class TestDataPrepForRag(unittest.TestCase):
     def setUp(self):
@@ -264,6 +582,165 @@ class TestDataPrepForRag(unittest.TestCase):
         self.assertNotIn("filtered_c0", result["Id"].values)
         self.assertNotIn("filtered_c1", result["Id"].values)
 
+    def test_frequent_value_sets_cascades(self):
+        """Test that later filters only count the groups kept by earlier ones."""
+        counts = pd.DataFrame(
+            {
+                "c2_name": ["Tops", "Tops", "Rare"],
+                "c3_name": ["Casual", "Formal", "Casual"],
+                "count()": [6, 6, 5],
+            }
+        )
+
+        kept = frequent_value_sets(counts, [("c2_name", 10), ("c3_name", 6)])
+
+        # 'Casual' reaches 11 rows overall but only 6 within the kept c2 values
+        self.assertEqual(kept, {"c2_name": ["Tops"], "c3_name": ["Casual", "Formal"]})
+
+    def test_process_rag_dataset_counts_across_batches(self):
+        """Test that frequencies are counted over the whole dataset, not per batch."""
+        rows = [
+            {
+                "uniq_id": f"id_{i}",
+                "product_name": f"Name_{i}",
+                "description": None,
+                "brand": "Brand",
+                "image": "Image",
+                "image_uri": None,
+                "c0_name": "Clothing",
+                "c1_name": "Men's Clothing",
+                "c2_name": "T-Shirts" if i < 12 else "Socks",
+                "c3_name": "Casual",
+                "attributes": "Specs",
+            }
+            for i in range(14)
+        ]
+        selected = self.prep.select_rag_rows(pd.DataFrame(rows))
+        batches = [selected.iloc[:7], selected.iloc[7:]]
+        dataset = MagicMock()
+        counts = selected.groupby(["c2_name", "c3_name"]).size()
+        dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            counts.rename("count()").reset_index()
+        )
+
+        self.prep.process_rag_dataset(dataset)
+
+        filter_and_format = dataset.map_batches.call_args.args[0]
+        result = pd.concat([filter_and_format(batch) for batch in batches])
+        self.assertEqual(result["Id"].tolist(), [f"id_{i}" for i in range(12)])
+        self.assertEqual(result.columns.tolist(), RAG_COLUMNS)
+        self.assertEqual(result["Description"].unique().tolist(), ["None"])
+        # Each batch alone falls below the threshold
+        self.assertTrue(self.prep.process_rag_input(pd.DataFrame(rows[:7])).empty)
+
+    def test_rag_table_matches_rag_rows(self):
+        """Test that the Arrow-native select and format match the pandas ones."""
+        rows = [
+            {
+                "uniq_id": f"id_{i % 3}",
+                "product_name": "Name",
+                "description": None if i == 0 else "Desc",
+                "brand": "Brand",
+                "image": "Image",
+                "image_uri": None,
+                "c0_name": "Clothing" if i < 5 else "Footwear",
+                "c1_name": "Kids' Clothing",
+                "c2_name": "Dresses",
+                "c3_name": "Casual",
+                "attributes": "Specs",
+            }
+            for i in range(6)
+        ]
+        df = pd.DataFrame(rows)
+
+        expected = self.prep.format_rag_rows(self.prep.select_rag_rows(df))
+        table = self.prep.format_rag_table(
+            self.prep.select_rag_table(pa.Table.from_pandas(df, preserve_index=False))
+        )
+
+        pd.testing.assert_frame_equal(
+            table.to_pandas(), expected.reset_index(drop=True)
+        )
+
+    def test_process_rag_dataset_pyarrow_batches(self):
+        """Test that the pyarrow batch format filters and formats Arrow tables."""
+        selected = pd.DataFrame(
+            {
+                **{column: ["x", "y"] for column in RAG_COLUMNS},
+                "c2_name": ["Tops", "Rare"],
+                "c3_name": ["Casual", "Casual"],
+            }
+        )
+        dataset = MagicMock()
+        dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            pd.DataFrame(
+                {
+                    "c2_name": ["Tops", "Rare"],
+                    "c3_name": ["Casual", "Casual"],
+                    "count()": [10, 1],
+                }
+            )
+        )
+
+        self.prep.process_rag_dataset(dataset, batch_format="pyarrow")
+
+        filter_and_format = dataset.map_batches.call_args.args[0]
+        self.assertEqual(
+            dataset.map_batches.call_args.kwargs["batch_format"], "pyarrow"
+        )
+        result = filter_and_format(pa.Table.from_pandas(selected))
+        self.assertEqual(result.column_names, RAG_COLUMNS)
+        self.assertEqual(result.column("Id").to_pylist(), ["x"])
+
+
+class TestDataPrepForRagDataset(unittest.TestCase):
+    """Runs process_rag_dataset on a local Ray cluster."""
+
+    @classmethod
+    def setUpClass(cls):
+        ray.shutdown()
+        ray.init(num_cpus=2, include_dashboard=False, log_to_driver=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        ray.shutdown()
+
+    def test_process_rag_dataset_drops_duplicates_across_blocks(self):
+        """Test that duplicate rows landing in different blocks are dropped."""
+        prep = DataPrepForRag()
+        rows = [
+            {
+                "uniq_id": f"id_{i % 10}",
+                "product_name": f"Name_{i % 10}",
+                "description": None,
+                "brand": None,
+                "image": "Image",
+                "image_uri": "gs://bucket/image.jpg",
+                "c0_name": "Clothing",
+                "c1_name": "Men's Clothing",
+                "c2_name": "T-Shirts",
+                "c3_name": "Casual",
+                "attributes": "Specs",
+            }
+            for i in range(20)
+        ]
+        selected = prep.select_rag_rows(pd.DataFrame(rows))
+
+        for batch_format in ("pandas", "pyarrow"):
+            with self.subTest(batch_format=batch_format):
+                # Rows 10-19 repeat rows 0-9 in a second block
+                dataset = ray.data.from_pandas([selected.iloc[:10], selected.iloc[10:]])
+                self.assertEqual(dataset.num_blocks(), 2)
+
+                result = prep.process_rag_dataset(
+                    dataset, batch_format=batch_format
+                ).to_pandas()
+
+                self.assertEqual(
+                    sorted(result["Id"]), sorted(f"id_{i}" for i in range(10))
+                )
+                self.assertEqual(result.columns.tolist(), RAG_COLUMNS)
+
 
 if __name__ == "__main__":
     unittest.main()
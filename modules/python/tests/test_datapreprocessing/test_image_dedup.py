@@ -0,0 +1,111 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for image_dedup module."""
+
+import unittest
+
+import pandas as pd
+from src.datapreprocessing.image_dedup import (
+    explode_image_candidates,
+    pending_image_requests,
+    resolve_image_uris,
+    summarize_image_dedup,
+)
+
+
+class TestImageDedup(unittest.TestCase):
+    """Unit tests for the deduplicated image download planning functions."""
+
+    def setUp(self):
+        """Three rows sharing URLs; 'broken' never downloads."""
+        df = pd.DataFrame(
+            {
+                "uniq_id": ["a", "b", "c", "d"],
+                "image": [
+                    '["shared", "a_alt"]',
+                    '["shared"]',
+                    '["broken", "shared"]',
+                    None,
+                ],
+            }
+        )
+        self.candidates = explode_image_candidates(df, "images")
+
+    def _download(self, pending, resolved, image_bytes):
+        for url, blob_name in zip(pending["url"], pending["blob_name"]):
+            resolved[url] = None if url == "broken" else f"gs://bucket/{blob_name}"
+            image_bytes[url] = 0 if url == "broken" else 100
+
+    def test_explode_image_candidates(self):
+        """Test that rows explode into ranked candidates with per-row blob names."""
+        self.assertEqual(
+            self.candidates.values.tolist(),
+            [
+                ["a", 0, "shared", "images/a_0.jpg"],
+                ["a", 1, "a_alt", "images/a_1.jpg"],
+                ["b", 0, "shared", "images/b_0.jpg"],
+                ["c", 0, "broken", "images/c_0.jpg"],
+                ["c", 1, "shared", "images/c_1.jpg"],
+            ],
+        )
+
+    def test_rounds_download_each_url_once(self):
+        """Test that rounds fetch unique URLs once and fall back past failures."""
+        resolved, image_bytes = {}, {}
+
+        first_round = pending_image_requests(self.candidates, resolved)
+        self.assertEqual(
+            first_round.values.tolist(),
+            [["shared", "images/a_0.jpg"], ["broken", "images/c_0.jpg"]],
+        )
+        self._download(first_round, resolved, image_bytes)
+
+        # Row 'c' falls back to 'shared', which is already uploaded
+        self.assertTrue(pending_image_requests(self.candidates, resolved).empty)
+
+        self.assertEqual(
+            resolve_image_uris(self.candidates, resolved),
+            {
+                "a": "gs://bucket/images/a_0.jpg",
+                "b": "gs://bucket/images/a_0.jpg",
+                "c": "gs://bucket/images/a_0.jpg",
+            },
+        )
+
+        report = summarize_image_dedup(self.candidates, resolved, image_bytes, 1)
+        self.assertEqual(report.rows, 3)
+        self.assertEqual(report.unique_urls, 3)
+        self.assertEqual(report.requests, 2)
+        # a: shared, b: shared, c: broken + shared
+        self.assertEqual(report.baseline_requests, 4)
+        self.assertEqual(report.requests_saved, 2)
+        self.assertEqual(report.bytes_downloaded, 100)
+        self.assertEqual(report.baseline_bytes, 300)
+        self.assertEqual(report.bytes_saved, 200)
+
+    def test_failed_first_image_triggers_next_round(self):
+        """Test that a row whose only downloaded URL failed moves to its next candidate."""
+        resolved = {"shared": None}
+
+        pending = pending_image_requests(self.candidates, resolved)
+
+        self.assertEqual(
+            pending.values.tolist(),
+            [["a_alt", "images/a_1.jpg"], ["broken", "images/c_0.jpg"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for image_fetcher module."""
+
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+from src.datapreprocessing.image_fetcher import AsyncImageFetcher
+from src.datapreprocessing.image_index import ImageRecord, UploadedImageIndex
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """Serves fake JPEG bytes with an ETag for /img/* and 404 for anything else."""
+
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        self.client_ports.append(self.client_address[1])
+        if self.path.startswith("/img/"):
+            body = self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("ETag", '"v1"')
+        else:
+            body = b"not found"
+            self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncImageFetcher(unittest.TestCase):
+    """Unit tests running AsyncImageFetcher against a local HTTP server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _ImageHandler.client_ports.clear()
+        self.storage_client = MagicMock()
+        self.bucket = self.storage_client.bucket.return_value
+        self.fetcher = AsyncImageFetcher(
+            self.storage_client, max_connections=4, max_connections_per_host=1
+        )
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def test_fetch_rows_uploads_first_available_image(self):
+        """Test that each row gets the URI of its first downloadable image."""
+        rows = [
+            [(f"{self.base_url}/img/a.jpg", "folder/1_0.jpg")],
+            [
+                (f"{self.base_url}/missing.jpg", "folder/2_0.jpg"),
+                (f"{self.base_url}/img/b.jpg", "folder/2_1.jpg"),
+            ],
+            [],
+        ]
+
+        uris, stats = self.fetcher.fetch_rows(rows, "bucket", "node")
+
+        self.assertEqual(
+            uris, ["gs://bucket/folder/1_0.jpg", "gs://bucket/folder/2_1.jpg", None]
+        )
+        self.assertEqual(stats.rows, 3)
+        self.assertEqual(stats.images_uploaded, 2)
+        self.assertEqual(stats.download_failures, 1)
+        self.assertEqual(
+            stats.bytes_downloaded, len(b"/img/a.jpg") + len(b"/img/b.jpg")
+        )
+        self.bucket.blob.return_value.upload_from_string.assert_any_call(
+            b"/img/a.jpg", content_type="image/jpeg", retry=unittest.mock.ANY
+        )
+        self.assertEqual(self.bucket.blob.return_value.metadata["source_etag"], '"v1"')
+
+    def test_upload_failure_falls_through_to_next_image(self):
+        """Test that a failed upload counts as a failure and tries the next URL."""
+        self.bucket.blob.return_value.upload_from_string.side_effect = [
+            RuntimeError("upload failed"),
+            None,
+        ]
+        rows = [
+            [
+                (f"{self.base_url}/img/a.jpg", "folder/1_0.jpg"),
+                (f"{self.base_url}/img/b.jpg", "folder/1_1.jpg"),
+            ]
+        ]
+
+        uris, stats = self.fetcher.fetch_rows(rows, "bucket", "node")
+
+        self.assertEqual(uris, ["gs://bucket/folder/1_1.jpg"])
+        self.assertEqual(stats.upload_failures, 1)
+        self.assertEqual(stats.images_uploaded, 1)
+
+    def test_buffered_images_are_bounded_by_max_connections(self):
+        """Test that no more images are downloaded while max_connections wait to upload."""
+        uploads_released = threading.Event()
+        self.bucket.blob.return_value.upload_from_string.side_effect = (
+            lambda *args, **kwargs: uploads_released.wait(5)
+        )
+        requests_while_blocked = []
+
+        def release_uploads():
+            requests_while_blocked.append(len(_ImageHandler.client_ports))
+            uploads_released.set()
+
+        timer = threading.Timer(0.5, release_uploads)
+        timer.start()
+        rows = [
+            [(f"{self.base_url}/img/{i}.jpg", f"folder/{i}_0.jpg")] for i in range(10)
+        ]
+
+        uris, stats = self.fetcher.fetch_rows(rows, "bucket", "node")
+        timer.join()
+
+        self.assertEqual(requests_while_blocked, [4])
+        self.assertEqual(stats.images_uploaded, 10)
+
+    def test_incremental_index_skips_uploaded_and_records_new_images(self):
+        """Test that indexed images are skipped and fresh uploads are recorded."""
+        url_a = f"{self.base_url}/img/a.jpg"
+        url_b = f"{self.base_url}/img/b.jpg"
+        index = UploadedImageIndex({"folder/1_0.jpg": ImageRecord(url_a)})
+        rows = [[(url_a, "folder/1_0.jpg")], [(url_b, "folder/2_0.jpg")]]
+
+        uris, stats = self.fetcher.fetch_rows(rows, "bucket", "node", image_index=index)
+
+        self.assertEqual(
+            uris, ["gs://bucket/folder/1_0.jpg", "gs://bucket/folder/2_0.jpg"]
+        )
+        self.assertEqual(stats.images_skipped, 1)
+        self.assertEqual(stats.images_uploaded, 1)
+        self.assertEqual(len(_ImageHandler.client_ports), 1)
+        self.assertEqual(
+            index.records["folder/2_0.jpg"],
+            ImageRecord(url_b, '"v1"', len(b"/img/b.jpg")),
+        )
+
+    def test_revalidation_refetches_changed_images(self):
+        """Test that a HEAD request with a new ETag triggers a refetch."""
+        url_a = f"{self.base_url}/img/a.jpg"
+        url_b = f"{self.base_url}/img/b.jpg"
+        index = UploadedImageIndex(
+            {
+                "folder/1_0.jpg": ImageRecord(url_a, '"v1"'),
+                "folder/2_0.jpg": ImageRecord(url_b, '"v0"'),
+            }
+        )
+        rows = [[(url_a, "folder/1_0.jpg")], [(url_b, "folder/2_0.jpg")]]
+
+        _, stats = self.fetcher.fetch_rows(
+            rows, "bucket", "node", image_index=index, revalidate=True
+        )
+
+        self.assertEqual(stats.images_skipped, 1)
+        self.assertEqual(stats.images_uploaded, 1)
+        self.bucket.blob.assert_called_once_with("folder/2_0.jpg")
+        self.assertEqual(index.records["folder/2_0.jpg"].source_etag, '"v1"')
+
+    def test_connections_are_reused_across_batches(self):
+        """Test that keep-alive connections are reused within and across batches."""
+        rows = [
+            [(f"{self.base_url}/img/{i}.jpg", f"folder/{i}_0.jpg")] for i in range(5)
+        ]
+
+        self.fetcher.fetch_rows(rows, "bucket", "node")
+        self.fetcher.fetch_rows(rows, "bucket", "node")
+
+        self.assertEqual(len(_ImageHandler.client_ports), 10)
+        self.assertEqual(len(set(_ImageHandler.client_ports)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
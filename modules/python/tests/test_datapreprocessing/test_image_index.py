@@ -0,0 +1,90 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for image_index module."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from src.datapreprocessing.image_index import ImageRecord, UploadedImageIndex
+
+
+def _blob(name, size, metadata=None):
+    blob = MagicMock()
+    blob.name = name
+    blob.size = size
+    blob.metadata = metadata
+    return blob
+
+
+class TestUploadedImageIndex(unittest.TestCase):
+    """Unit tests for UploadedImageIndex."""
+
+    def test_from_listing_reads_source_metadata(self):
+        """Test that one prefix listing populates records from blob metadata."""
+        storage_client = MagicMock()
+        storage_client.list_blobs.return_value = [
+            _blob("images/1_0.jpg", 10, {"source_url": "u1", "source_etag": '"e1"'}),
+            _blob("images/2_0.jpg", 20),
+        ]
+
+        index = UploadedImageIndex.from_listing(storage_client, "bucket", "images")
+
+        self.assertEqual(storage_client.list_blobs.call_count, 1)
+        self.assertEqual(
+            storage_client.list_blobs.call_args.kwargs["prefix"], "images/"
+        )
+        self.assertEqual(index.records["images/1_0.jpg"], ImageRecord("u1", '"e1"', 10))
+        self.assertEqual(index.records["images/2_0.jpg"], ImageRecord(None, None, 20))
+
+    def test_lookup_rejects_blobs_from_another_url(self):
+        """Test that a blob uploaded from a different URL is not reused."""
+        index = UploadedImageIndex(
+            {"a.jpg": ImageRecord("u1"), "legacy.jpg": ImageRecord(size=5)}
+        )
+
+        self.assertIsNotNone(index.lookup("a.jpg", "u1"))
+        self.assertIsNone(index.lookup("a.jpg", "u2"))
+        self.assertIsNone(index.lookup("missing.jpg", "u1"))
+        # Blobs without source metadata are trusted on presence alone
+        self.assertIsNotNone(index.lookup("legacy.jpg", "u3"))
+
+    def test_is_unchanged_prefers_etag_over_size(self):
+        """Test ETag comparison with a size fallback."""
+        record = ImageRecord("u1", '"e1"', 10)
+
+        self.assertTrue(record.is_unchanged('"e1"', 99))
+        self.assertFalse(record.is_unchanged('"e2"', 10))
+        self.assertTrue(record.is_unchanged(None, 10))
+        self.assertFalse(record.is_unchanged(None, 11))
+        self.assertTrue(ImageRecord("u1").is_unchanged(None, None))
+
+    def test_manifest_round_trip(self):
+        """Test that a manifest written by to_manifest loads back identically."""
+        index = UploadedImageIndex()
+        index.record("images/1_0.jpg", "u1", '"e1"', 10)
+        index.record("images/2_0.jpg", "u2", None, 20)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest_path = os.path.join(tmpdir, "manifest.json")
+            index.to_manifest(manifest_path)
+            loaded = UploadedImageIndex.from_manifest(manifest_path)
+
+        self.assertEqual(loaded.records, index.records)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for profiling module."""
+
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.datapreprocessing.profiling import (
+    LatencyHistogram,
+    PipelineProfile,
+    flush_profile,
+)
+
+
+class TestPipelineProfile(unittest.TestCase):
+    """Unit tests for PipelineProfile recording, merging and export."""
+
+    def _profile(self, latencies):
+        profile = PipelineProfile()
+        profile.record_stage("description_nlp", 100, 2.0)
+        profile.add("bytes_downloaded", 1000)
+        for latency in latencies:
+            profile.observe("upload_latency_seconds", latency)
+        return profile
+
+    def test_histogram_quantiles(self):
+        """Test that quantiles resolve to the upper bound of their bucket."""
+        histogram = LatencyHistogram(bounds=(0.1, 1.0))
+        for latency in (0.05, 0.05, 0.5, 3.0):
+            histogram.observe(latency)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.75), 1.0)
+        self.assertEqual(histogram.quantile(1.0), float("inf"))
+        self.assertEqual(LatencyHistogram().quantile(0.5), 0.0)
+
+    def test_merge_aggregates_workers(self):
+        """Test that merged profiles add stages, counters and histograms."""
+        total = self._profile([0.02])
+        total.merge(self._profile([0.2, 0.3]))
+
+        timing = total.stages["description_nlp"]
+        self.assertEqual((timing.calls, timing.rows, timing.seconds), (2, 200, 4.0))
+        self.assertEqual(timing.rows_per_second, 50.0)
+        self.assertEqual(total.counters["bytes_downloaded"], 2000)
+        self.assertEqual(total.histograms["upload_latency_seconds"].count, 3)
+
+    def test_drain_resets_and_survives_pickling(self):
+        """Test that drained profiles move the recorded data and can be shipped to Ray."""
+        profile = self._profile([0.02])
+
+        drained = pickle.loads(pickle.dumps(profile.drain()))
+
+        self.assertTrue(profile.is_empty())
+        self.assertEqual(drained.counters, {"bytes_downloaded": 1000})
+        drained.add("bytes_downloaded", 1)
+
+    def test_to_prometheus(self):
+        """Test the Prometheus text exposition of stages, counters and histograms."""
+        text = self._profile([0.02, 20.0]).to_prometheus()
+
+        self.assertIn(
+            'datapreprocessing_stage_seconds_total{stage="description_nlp"} 2', text
+        )
+        self.assertIn(
+            'datapreprocessing_stage_rows_per_second{stage="description_nlp"} 50', text
+        )
+        self.assertIn("datapreprocessing_bytes_downloaded_total 1000", text)
+        self.assertIn("# TYPE datapreprocessing_upload_latency_seconds histogram", text)
+        self.assertIn(
+            'datapreprocessing_upload_latency_seconds_bucket{le="0.01"} 0', text
+        )
+        self.assertIn(
+            'datapreprocessing_upload_latency_seconds_bucket{le="10"} 1', text
+        )
+        self.assertIn(
+            'datapreprocessing_upload_latency_seconds_bucket{le="+Inf"} 2', text
+        )
+        self.assertIn("datapreprocessing_upload_latency_seconds_count 2", text)
+
+    def test_export_json(self):
+        """Test that the JSON export is valid JSON with null overflow quantiles."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "profile.json")
+            self._profile([20.0]).export(path, "json")
+            with open(path) as f:
+                exported = json.load(f)
+
+        self.assertEqual(exported["stages"]["description_nlp"]["rows"], 100)
+        self.assertEqual(exported["counters"]["bytes_downloaded"], 1000)
+        self.assertIsNone(exported["histograms"]["upload_latency_seconds"]["p99"])
+
+    def test_export_rejects_unknown_format(self):
+        """Test that an unsupported export format raises a ValueError."""
+        with self.assertRaises(ValueError):
+            PipelineProfile().export("/tmp/profile.txt", "csv")
+
+    @patch("src.datapreprocessing.profiling.ray")
+    def test_flush_profile(self, mock_ray):
+        """Test that flushing pushes recorded data once and skips empty profiles."""
+        aggregator = MagicMock()
+        profile = self._profile([0.02])
+
+        flush_profile(profile, aggregator)
+        flush_profile(profile, aggregator)
+
+        aggregator.merge.remote.assert_called_once()
+        mock_ray.get.assert_called_once()
+        self.assertTrue(profile.is_empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,17 +14,33 @@
 
 """Unit tests for ray_data_pipeline module."""
 
+import os
+import sys
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
+import pyarrow as pa
+import ray
+from src.datapreprocessing.checkpoint import CheckpointStore
+from src.datapreprocessing.datacleaner import RAG_COLUMNS, DataPrepForRag
+from src.datapreprocessing.profiling import PipelineProfile
 from src.datapreprocessing.ray_data_pipeline import (
+    ActorPoolConfig,
+    ImageDownloadActor,
     PreprocessingActor,
+    ProductImageActor,
     RayDataPipelineOrchestrator,
     SingleFilenameProvider,
+    autotune_actor_pools,
+    drop_completed_rows,
     handle_invalid_row,
 )
 
+# Category counts returned by the mocked dataset-wide groupby of the RAG filter
+RAG_COUNTS = pd.DataFrame({"c2_name": ["Tops"], "c3_name": ["Shirts"], "count()": [10]})
+
 
 class TestRayDataPipeline(unittest.TestCase):
     """Unit tests covering SingleFilenameProvider, PreprocessingActor, and RayDataPipelineOrchestrator."""
@@ -44,7 +60,7 @@ class TestRayDataPipeline(unittest.TestCase):
 
     @patch("datapreprocessing.datacleaner.storage.Client")
     @patch("datapreprocessing.datacleaner.DataPreprocessor.process_data")
-    @patch("datapreprocessing.datacleaner.DataPrepForRag.process_rag_input")
+    @patch("datapreprocessing.datacleaner.DataPrepForRag.select_rag_rows")
     def test_preprocessing_actor(
         self, mock_rag, mock_process_data, mock_storage_client
     ):
@@ -70,6 +86,69 @@ class TestRayDataPipeline(unittest.TestCase):
         mock_process_data.assert_called_once()
         mock_rag.assert_called_once()
 
+    @patch("datapreprocessing.datacleaner.storage.Client")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.get_product_image")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.prep_product_desc")
+    @patch("datapreprocessing.datacleaner.DataPrepForRag.select_rag_rows")
+    def test_preprocessing_actor_uses_deduplicated_image_uris(
+        self, mock_rag, mock_prep_desc, mock_get_product_image, mock_storage_client
+    ):
+        """Test that image URIs resolved by the pre-pass are joined instead of downloaded."""
+        df_input = pd.DataFrame(
+            {
+                "uniq_id": ["1", "2"],
+                "description": ["desc1", "desc2"],
+                "product_specifications": [None, None],
+                "product_category_tree": ["cat1 >> cat2", "cat3 >> cat4"],
+                "image": ['["url1"]', '["url1"]'],
+            }
+        )
+        mock_rag.side_effect = lambda df: df
+        mock_prep_desc.side_effect = lambda df: df
+
+        actor = PreprocessingActor(
+            output_bucket="test-bucket",
+            output_image_folder="test-folder",
+            async_image_fetch=False,
+            image_uris={"1": "gs://test-bucket/test-folder/1_0.jpg"},
+        )
+        result = actor(df_input)
+
+        mock_get_product_image.assert_not_called()
+        self.assertEqual(
+            result["image_uri"].tolist(), ["gs://test-bucket/test-folder/1_0.jpg", None]
+        )
+
+    @patch("datapreprocessing.datacleaner.storage.Client")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.fetch_images")
+    def test_image_download_actor(self, mock_fetch_images, mock_storage_client):
+        """Test ImageDownloadActor uploads each unique URL to its own blob name."""
+        mock_fetch_images.return_value = ["gs://test-bucket/test-folder/1_0.jpg", None]
+
+        actor = ImageDownloadActor(
+            output_bucket="test-bucket",
+            output_image_folder="test-folder",
+            async_image_fetch=False,
+        )
+        result = actor(
+            pd.DataFrame(
+                {
+                    "url": ["url1", "url2"],
+                    "blob_name": ["test-folder/1_0.jpg", "test-folder/2_0.jpg"],
+                }
+            )
+        )
+
+        self.assertEqual(
+            mock_fetch_images.call_args.args[0],
+            [[("url1", "test-folder/1_0.jpg")], [("url2", "test-folder/2_0.jpg")]],
+        )
+        self.assertEqual(result["url"].tolist(), ["url1", "url2"])
+        self.assertEqual(
+            result["image_uri"].tolist(), ["gs://test-bucket/test-folder/1_0.jpg", None]
+        )
+        self.assertEqual(result["image_bytes"].tolist(), [0, 0])
+
     @patch("src.datapreprocessing.ray_data_pipeline.ray")
     def test_orchestrator_execute_local(self, mock_ray):
         """Test RayDataPipelineOrchestrator execute method under local cluster settings."""
@@ -77,6 +156,11 @@ class TestRayDataPipeline(unittest.TestCase):
         mock_dataset = MagicMock()
         mock_ray.data.read_csv.return_value = mock_dataset
         mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
         mock_dataset.repartition.return_value = mock_dataset
 
         orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
@@ -90,9 +174,590 @@ class TestRayDataPipeline(unittest.TestCase):
 
         mock_ray.init.assert_called_once()
         mock_ray.data.read_csv.assert_called_once()
+        mock_dataset.groupby.assert_any_call(["c2_name", "c3_name"])
+        # Duplicates spanning blocks are dropped by a dataset-wide groupby
+        mock_dataset.groupby.assert_any_call(RAG_COLUMNS)
+        self.assertEqual(mock_dataset.groupby.call_count, 2)
         mock_dataset.write_csv.assert_called_once()
         mock_ray.shutdown.assert_called_once()
 
+    def test_dedupe_images_skips_large_datasets(self):
+        """Test that the pre-pass collects no candidates beyond dedupe_max_candidates."""
+        candidates = MagicMock()
+        candidates.count.return_value = 11
+        mock_dataset = MagicMock()
+        mock_dataset.map_batches.return_value.materialize.return_value = candidates
+
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        image_uris = orchestrator._dedupe_images(
+            mock_dataset, "img-folder", {}, ActorPoolConfig(), max_candidates=10
+        )
+
+        self.assertIsNone(image_uris)
+        candidates.to_pandas.assert_not_called()
+
+    @patch(
+        "src.datapreprocessing.ray_data_pipeline.RayDataPipelineOrchestrator._dedupe_images"
+    )
+    @patch("src.datapreprocessing.ray_data_pipeline.ray")
+    def test_orchestrator_execute_dedupe_falls_back_per_row(
+        self, mock_ray, mock_dedupe_images
+    ):
+        """Test that a skipped image pre-pass leaves the downloads to the actors."""
+        mock_ray.is_initialized.return_value = True
+        mock_dataset = MagicMock()
+        mock_ray.data.read_csv.return_value = mock_dataset
+        mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
+        mock_dataset.repartition.return_value = mock_dataset
+
+        for image_uris in ({"1": "gs://out-bucket/img-folder/1_0.jpg"}, None):
+            mock_dedupe_images.return_value = image_uris
+            mock_dataset.map_batches.reset_mock()
+            orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+            orchestrator.execute(
+                input_bucket="in-bucket",
+                input_path="/path/input.csv",
+                output_bucket="out-bucket",
+                output_path="/path/out.csv",
+                output_image_folder="img-folder",
+                dedupe_images=True,
+                dedupe_max_candidates=10,
+            )
+
+            self.assertEqual(mock_dedupe_images.call_args.args[-1], 10)
+            stages = {
+                call.args[0]: call.kwargs
+                for call in mock_dataset.map_batches.call_args_list
+            }
+            actor_kwargs = stages[PreprocessingActor]["fn_constructor_kwargs"]
+            self.assertEqual("image_uris" in actor_kwargs, image_uris is not None)
+
+    @patch("datapreprocessing.profiling.ray")
+    @patch("datapreprocessing.datacleaner.storage.Client")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.process_data")
+    @patch("datapreprocessing.datacleaner.DataPrepForRag.select_rag_rows")
+    def test_preprocessing_actor_pushes_profile(
+        self, mock_rag, mock_process_data, mock_storage_client, mock_profiling_ray
+    ):
+        """Test that a profiled PreprocessingActor pushes each batch's stages."""
+        df_input = pd.DataFrame({"uniq_id": [1, 2]})
+        mock_process_data.return_value = df_input
+        mock_rag.return_value = pd.DataFrame({"Id": [1]})
+        aggregator = MagicMock()
+
+        actor = PreprocessingActor(
+            output_bucket="test-bucket",
+            output_image_folder="test-folder",
+            async_image_fetch=False,
+            profile_aggregator=aggregator,
+        )
+        actor(df_input)
+
+        pushed = aggregator.merge.remote.call_args.args[0]
+        self.assertEqual(pushed.stages["rag_transform"].rows, 2)
+        self.assertTrue(actor.preprocessor.profile.is_empty())
+        mock_profiling_ray.get.assert_called_once()
+
+    @patch("src.datapreprocessing.ray_data_pipeline.ray")
+    def test_orchestrator_execute_exports_profile(self, mock_ray):
+        """Test that execute aggregates the actor profiles and exports them."""
+        mock_dataset = MagicMock()
+        mock_ray.data.read_csv.return_value = mock_dataset
+        mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
+        mock_dataset.repartition.return_value = mock_dataset
+        aggregated = PipelineProfile()
+        aggregated.record_stage("description_nlp", 10, 1.0)
+        mock_ray.get.return_value = aggregated
+
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profile_uri = f"{tmpdir}/profile.prom"
+            orchestrator.execute(
+                input_bucket="in-bucket",
+                input_path="/path/input.csv",
+                output_bucket="out-bucket",
+                output_path="/path/out.csv",
+                output_image_folder="img-folder",
+                profile_uri=profile_uri,
+                profile_format="prometheus",
+            )
+            with open(profile_uri) as f:
+                exported = f.read()
+
+        stages = {
+            call.args[0]: call.kwargs
+            for call in mock_dataset.map_batches.call_args_list
+        }
+        actor_kwargs = stages[PreprocessingActor]["fn_constructor_kwargs"]
+        self.assertIn("profile_aggregator", actor_kwargs)
+        self.assertIs(orchestrator.last_profile, aggregated)
+        self.assertIn("pipeline_seconds", aggregated.counters)
+        self.assertIn(
+            'datapreprocessing_stage_rows_total{stage="description_nlp"} 10', exported
+        )
+
+    def test_orchestrator_execute_rejects_unknown_profile_format(self):
+        """Test that an unsupported profile format raises a ValueError."""
+        with self.assertRaises(ValueError):
+            RayDataPipelineOrchestrator().execute(
+                input_bucket="in-bucket",
+                input_path="input.csv",
+                output_bucket="out-bucket",
+                output_path="out.csv",
+                output_image_folder="img-folder",
+                profile_format="xml",
+            )
+
+    def test_actor_pool_config_map_batches_kwargs(self):
+        """Test that pool configs translate into map_batches arguments."""
+        kwargs = ActorPoolConfig(
+            min_size=2,
+            max_size=16,
+            batch_size=50,
+            num_cpus=0.5,
+            max_tasks_in_flight_per_actor=4,
+        ).map_batches_kwargs()
+
+        self.assertEqual(kwargs["batch_size"], 50)
+        self.assertEqual(kwargs["num_cpus"], 0.5)
+        self.assertEqual(kwargs["compute"].min_size, 2)
+        self.assertEqual(kwargs["compute"].max_size, 16)
+        self.assertEqual(kwargs["compute"].max_tasks_in_flight_per_actor, 4)
+        self.assertNotIn("num_cpus", ActorPoolConfig().map_batches_kwargs())
+
+    def test_autotune_actor_pools(self):
+        """Test that auto-tuning splits cluster CPUs between NLP and image pools."""
+        preprocess_pool, image_pool = autotune_actor_pools({"CPU": 64.0})
+
+        self.assertEqual(preprocess_pool.max_size, 48)
+        self.assertEqual(preprocess_pool.min_size, 12)
+        self.assertEqual(preprocess_pool.num_cpus, 1)
+        self.assertEqual(image_pool.max_size, 64)
+        self.assertEqual(image_pool.num_cpus, 0.25)
+
+        preprocess_pool, image_pool = autotune_actor_pools({})
+        self.assertEqual((preprocess_pool.min_size, preprocess_pool.max_size), (1, 1))
+        self.assertEqual((image_pool.min_size, image_pool.max_size), (1, 1))
+
+    @patch("src.datapreprocessing.ray_data_pipeline.ray")
+    def test_orchestrator_execute_autotune_splits_image_stage(self, mock_ray):
+        """Test that auto-tuning adds a separate image stage ahead of preprocessing."""
+        mock_ray.is_initialized.return_value = True
+        mock_ray.cluster_resources.return_value = {"CPU": 16.0}
+        mock_dataset = MagicMock()
+        mock_ray.data.read_csv.return_value = mock_dataset
+        mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
+        mock_dataset.repartition.return_value = mock_dataset
+
+        orchestrator = RayDataPipelineOrchestrator(
+            ray_cluster_host="local", autotune=True
+        )
+        orchestrator.execute(
+            input_bucket="in-bucket",
+            input_path="/path/input.csv",
+            output_bucket="out-bucket",
+            output_path="/path/out.csv",
+            output_image_folder="img-folder",
+        )
+
+        stages = {
+            call.args[0]: call.kwargs
+            for call in mock_dataset.map_batches.call_args_list
+        }
+        self.assertEqual(stages[ProductImageActor]["num_cpus"], 0.25)
+        self.assertEqual(stages[ProductImageActor]["batch_size"], 100)
+        self.assertEqual(stages[PreprocessingActor]["num_cpus"], 1)
+        self.assertFalse(
+            stages[PreprocessingActor]["fn_constructor_kwargs"]["async_image_fetch"]
+        )
+        mock_ray.shutdown.assert_not_called()
+
+    @patch(
+        "src.datapreprocessing.ray_data_pipeline.parquet_datasink_options_supported",
+        return_value=True,
+    )
+    @patch("src.datapreprocessing.ray_data_pipeline.ray")
+    def test_orchestrator_execute_parquet_output(self, mock_ray, mock_supported):
+        """Test that Parquet output is written in parallel without coalescing."""
+        mock_ray.is_initialized.return_value = True
+        mock_dataset = MagicMock()
+        mock_ray.data.read_csv.return_value = mock_dataset
+        mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
+
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        orchestrator.execute(
+            input_bucket="in-bucket",
+            input_path="/path/input.csv",
+            output_bucket="out-bucket",
+            output_path="/path/out.csv",
+            output_image_folder="img-folder",
+            output_format="parquet",
+            parquet_compression="zstd",
+            parquet_row_group_size=5000,
+            partition_cols=["c0_name"],
+        )
+
+        mock_dataset.write_parquet.assert_called_once_with(
+            "gs://out-bucket/path/out",
+            compression="zstd",
+            row_group_size=5000,
+            partition_cols=["c0_name"],
+        )
+        mock_dataset.repartition.assert_not_called()
+        mock_dataset.write_csv.assert_not_called()
+
+    @patch(
+        "src.datapreprocessing.ray_data_pipeline.parquet_datasink_options_supported",
+        return_value=False,
+    )
+    def test_orchestrator_execute_rejects_parquet_options_on_older_ray(
+        self, mock_supported
+    ):
+        """Test that Parquet options the Ray release cannot write fail before the run."""
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        for options in (
+            {"parquet_row_group_size": 5000},
+            {"partition_cols": ["c0_name"]},
+        ):
+            with self.subTest(options=options):
+                with self.assertRaises(ValueError):
+                    orchestrator.execute(
+                        input_bucket="in-bucket",
+                        input_path="/path/input.csv",
+                        output_bucket="out-bucket",
+                        output_path="/path/out.csv",
+                        output_image_folder="img-folder",
+                        output_format="parquet",
+                        **options,
+                    )
+
+    def test_orchestrator_execute_rejects_unknown_output_format(self):
+        """Test that unsupported output formats fail before Ray is initialized."""
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        with self.assertRaises(ValueError):
+            orchestrator.execute(
+                input_bucket="in-bucket",
+                input_path="/path/input.csv",
+                output_bucket="out-bucket",
+                output_path="/path/out.csv",
+                output_image_folder="img-folder",
+                output_format="json",
+            )
+
+    @patch("datapreprocessing.datacleaner.storage.Client")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.process_data")
+    @patch("datapreprocessing.datacleaner.DataPrepForRag.select_rag_rows")
+    def test_preprocessing_actor_checkpoints_batches(
+        self, mock_rag, mock_process_data, mock_storage_client
+    ):
+        """Test that PreprocessingActor persists every processed batch under its run."""
+        df_input = pd.DataFrame({"uniq_id": [1, 2], "image": ['["url1"]', None]})
+        mock_rag.return_value = pd.DataFrame({"Id": [1]})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            actor = PreprocessingActor(
+                output_bucket="test-bucket",
+                output_image_folder="test-folder",
+                async_image_fetch=False,
+                checkpoint_uri=tmpdir,
+                run_id="run-1",
+            )
+            actor(df_input)
+
+            completed_ids, data_uris = CheckpointStore(tmpdir, "run-1").completed()
+
+        self.assertEqual(completed_ids, {"1", "2"})
+        self.assertEqual(len(data_uris), 1)
+
+    def test_drop_completed_rows(self):
+        """Test that rows completed by an earlier attempt are filtered out."""
+        df = pd.DataFrame({"uniq_id": [1, 2, 3]})
+        self.assertEqual(drop_completed_rows(df, {"1", "3"})["uniq_id"].tolist(), [2])
+
+    def test_drop_completed_rows_arrow(self):
+        """Test that completed rows are filtered out of Arrow batches."""
+        table = pa.table({"uniq_id": [1, 2, 3]})
+        result = drop_completed_rows(table, {"1", "3"})
+        self.assertIsInstance(result, pa.Table)
+        self.assertEqual(result.column("uniq_id").to_pylist(), [2])
+
+    @patch("datapreprocessing.datacleaner.storage.Client")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.process_data")
+    @patch("datapreprocessing.datacleaner.DataPreprocessor.process_table")
+    def test_preprocessing_actor_arrow_batches(
+        self, mock_process_table, mock_process_data, mock_storage_client
+    ):
+        """Test that Arrow batches stay Arrow tables through the actor."""
+        table = pa.table(
+            {
+                "uniq_id": ["1", "2"],
+                "product_name": ["n1", "n2"],
+                "description": ["d1", "d2"],
+                "brand": ["b1", "b2"],
+                "image": ['["url1"]', '["url1"]'],
+                "attributes": ["{}", "{}"],
+                "c0_name": ["Clothing", "Clothing"],
+                "c1_name": ["Men's Clothing", "Footwear"],
+                "c2_name": ["Tops", "Tops"],
+                "c3_name": ["Casual", "Casual"],
+            }
+        )
+        mock_process_table.side_effect = lambda batch, **kwargs: batch
+
+        actor = PreprocessingActor(
+            output_bucket="test-bucket",
+            output_image_folder="test-folder",
+            async_image_fetch=False,
+            image_uris={"1": "gs://test-bucket/test-folder/1_0.jpg"},
+        )
+        result = actor(table)
+
+        mock_process_data.assert_not_called()
+        self.assertIsInstance(result, pa.Table)
+        self.assertEqual(result.column("Id").to_pylist(), ["1"])
+        self.assertEqual(
+            result.column("image_uri").to_pylist(),
+            ["gs://test-bucket/test-folder/1_0.jpg"],
+        )
+
+    @patch("src.datapreprocessing.ray_data_pipeline.ray")
+    def test_orchestrator_execute_pyarrow_batches(self, mock_ray):
+        """Test that batch_format='pyarrow' is used by every per-row stage."""
+        mock_ray.is_initialized.return_value = True
+        mock_dataset = MagicMock()
+        mock_ray.data.read_csv.return_value = mock_dataset
+        mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
+        mock_dataset.repartition.return_value = mock_dataset
+
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        orchestrator.execute(
+            input_bucket="in-bucket",
+            input_path="/path/input.csv",
+            output_bucket="out-bucket",
+            output_path="/path/out.csv",
+            output_image_folder="img-folder",
+            batch_format="pyarrow",
+        )
+
+        batch_formats = [
+            call.kwargs["batch_format"]
+            for call in mock_dataset.map_batches.call_args_list
+        ]
+        self.assertEqual(set(batch_formats), {"pyarrow"})
+        stages = {
+            call.args[0]: call.kwargs
+            for call in mock_dataset.map_batches.call_args_list
+        }
+        self.assertTrue(stages[PreprocessingActor]["zero_copy_batch"])
+
+    def test_orchestrator_execute_rejects_unknown_batch_format(self):
+        """Test that an unsupported batch format raises a ValueError."""
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        with self.assertRaises(ValueError):
+            orchestrator.execute(
+                input_bucket="in-bucket",
+                input_path="/path/input.csv",
+                output_bucket="out-bucket",
+                output_path="/path/out.csv",
+                output_image_folder="img-folder",
+                batch_format="numpy",
+            )
+
+    @patch("src.datapreprocessing.ray_data_pipeline.ray")
+    def test_orchestrator_execute_resume(self, mock_ray):
+        """Test that resuming skips completed rows and merges their checkpoints."""
+        mock_ray.is_initialized.return_value = True
+        mock_dataset = MagicMock()
+        mock_ray.data.read_csv.return_value = mock_dataset
+        mock_dataset.map_batches.return_value = mock_dataset
+        mock_dataset.materialize.return_value = mock_dataset
+        mock_dataset.groupby.return_value.count.return_value.to_pandas.return_value = (
+            RAG_COUNTS
+        )
+        mock_dataset.groupby.return_value.map_groups.return_value = mock_dataset
+        mock_dataset.union.return_value = mock_dataset
+        mock_dataset.repartition.return_value = mock_dataset
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            CheckpointStore(tmpdir, "run-1").write_block(
+                ["1"], pd.DataFrame({"Id": ["1"]})
+            )
+            orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+            orchestrator.execute(
+                input_bucket="in-bucket",
+                input_path="/path/input.csv",
+                output_bucket="out-bucket",
+                output_path="/path/out.csv",
+                output_image_folder="img-folder",
+                checkpoint_uri=tmpdir,
+                run_id="run-1",
+                resume=True,
+            )
+
+        stages = {
+            call.args[0]: call.kwargs
+            for call in mock_dataset.map_batches.call_args_list
+        }
+        self.assertEqual(
+            stages[drop_completed_rows]["fn_kwargs"], {"completed_ids": {"1"}}
+        )
+        self.assertEqual(
+            stages[PreprocessingActor]["fn_constructor_kwargs"]["run_id"], "run-1"
+        )
+        self.assertEqual(len(mock_ray.data.read_parquet.call_args.args[0]), 1)
+        mock_dataset.union.assert_called_once()
+        mock_dataset.write_csv.assert_called_once()
+
+    def test_orchestrator_execute_resume_requires_run_id(self):
+        """Test that resume=True without a run to resume is rejected."""
+        orchestrator = RayDataPipelineOrchestrator(ray_cluster_host="local")
+        with self.assertRaises(ValueError):
+            orchestrator.execute(
+                input_bucket="in-bucket",
+                input_path="/path/input.csv",
+                output_bucket="out-bucket",
+                output_path="/path/out.csv",
+                output_image_folder="img-folder",
+                checkpoint_uri="/tmp/checkpoints",
+                resume=True,
+            )
+
+
+class FakePreprocessingActor:
+    """Stands in for PreprocessingActor without Cloud Storage or spaCy.
+
+    Like the real actor, it returns the RAG rows of a batch as a pandas DataFrame for
+    pandas batches and as an Arrow table for Arrow batches.
+    """
+
+    def __init__(self, **kwargs):
+        self.rag_transformer = DataPrepForRag()
+
+    def __call__(self, batch):
+        arrow_batch = isinstance(batch, pa.Table)
+        df = batch.to_pandas() if arrow_batch else batch
+        rag_df = self.rag_transformer.select_rag_rows(cleaned_rows(df["uniq_id"]))
+        if arrow_batch:
+            return pa.Table.from_pandas(rag_df, preserve_index=False)
+        return rag_df
+
+
+def cleaned_rows(uniq_ids):
+    """Returns DataPreprocessor-like output rows of clothing products."""
+    uniq_ids = [str(uniq_id) for uniq_id in uniq_ids]
+    return pd.DataFrame(
+        {
+            "uniq_id": uniq_ids,
+            "product_name": [f"Name_{uniq_id}" for uniq_id in uniq_ids],
+            "description": "Description",
+            "brand": "Brand",
+            "image": "Image",
+            "image_uri": "gs://out-bucket/img-folder/image.jpg",
+            "c0_name": "Clothing",
+            "c1_name": "Men's Clothing",
+            "c2_name": "T-Shirts",
+            "c3_name": "Casual",
+            "attributes": "Specs",
+        }
+    )
+
+
+class TestResumeOnRay(unittest.TestCase):
+    """Resumes partially checkpointed runs of RayDataPipelineOrchestrator on local Ray."""
+
+    @classmethod
+    def setUpClass(cls):
+        ray.shutdown()
+        ray.init(num_cpus=2, include_dashboard=False, log_to_driver=False)
+        # Ship FakePreprocessingActor to the workers, which cannot import this module
+        ray.cloudpickle.register_pickle_by_value(sys.modules[__name__])
+
+    @classmethod
+    def tearDownClass(cls):
+        ray.cloudpickle.unregister_pickle_by_value(sys.modules[__name__])
+        ray.shutdown()
+
+    def test_execute_resumes_partial_run(self):
+        """Test that checkpointed and newly processed rows are merged in both formats."""
+        uniq_ids = [f"id_{i}" for i in range(24)]
+        read_csv = ray.data.read_csv
+
+        for batch_format in ("pandas", "pyarrow"):
+            with self.subTest(
+                batch_format=batch_format
+            ), tempfile.TemporaryDirectory() as tmpdir:
+                input_path = os.path.join(tmpdir, "input.csv")
+                pd.DataFrame(
+                    {
+                        "uniq_id": uniq_ids,
+                        "product_name": "Name",
+                        "description": "Description",
+                        "brand": "Brand",
+                        "image": '["http://image.jpg"]',
+                        "product_specifications": "Specs",
+                        "product_category_tree": "Clothing",
+                    }
+                ).to_csv(input_path, index=False)
+                # The interrupted attempt checkpointed the first half of the catalog
+                CheckpointStore(tmpdir, "run-1").write_block(
+                    uniq_ids[:12],
+                    DataPrepForRag().select_rag_rows(cleaned_rows(uniq_ids[:12])),
+                )
+                outputs = []
+
+                with patch(
+                    "src.datapreprocessing.ray_data_pipeline.PreprocessingActor",
+                    FakePreprocessingActor,
+                ), patch.object(
+                    ray.data,
+                    "read_csv",
+                    lambda uri, **kwargs: read_csv(input_path, **kwargs),
+                ), patch.object(
+                    ray.data.Dataset,
+                    "write_csv",
+                    lambda dataset, path, **kwargs: outputs.append(dataset.to_pandas()),
+                ):
+                    RayDataPipelineOrchestrator(ray_cluster_host="local").execute(
+                        input_bucket="in-bucket",
+                        input_path="/path/input.csv",
+                        output_bucket="out-bucket",
+                        output_path="/path/out.csv",
+                        output_image_folder="img-folder",
+                        checkpoint_uri=tmpdir,
+                        run_id="run-1",
+                        resume=True,
+                        batch_format=batch_format,
+                    )
+
+                (output,) = outputs
+                self.assertEqual(sorted(output["Id"]), sorted(uniq_ids))
+                self.assertEqual(output.columns.tolist(), RAG_COLUMNS)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env bash
+
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+#To add a new directory to the benchmarks, add it to source_dirs array.
+#Add the source (folder containing src and benchmarks directories) to the array.
+#Extra arguments are passed to pytest, e.g. --bench-rows=1000,100000,1000000
+source_dirs=("modules/python")
+
+for source_dir in "${source_dirs[@]}"; do
+    export PYTHONPATH=$PYTHONPATH:${source_dir}/src
+    python -m pytest "${source_dir}/benchmarks" "$@"
+done
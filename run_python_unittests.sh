@@ -17,9 +17,33 @@
 #To add a new directory to unit tests, add it to source_dirs array.
 #Add the source (folder containing src and test directories) to the array
 source_dirs=("modules/python")
+#Services loading their logging.conf from the working directory run their tests
+#from their src directory, add them to the service_dirs array instead
+service_dirs=(
+    "use-cases/rag-pipeline/alloy-db-setup"
+    "use-cases/rag-pipeline/backend"
+    "use-cases/rag-pipeline/frontend"
+)
+
+#Pass directories of either array as arguments to only run their tests, e.g. with
+#the requirements of one service installed
+selected_dirs=("$@")
+status=0
+
+is_selected() {
+    [[ ${#selected_dirs[@]} -eq 0 || " ${selected_dirs[*]} " == *" $1 "* ]]
+}
 
 for source_dir in "${source_dirs[@]}"; do
+    is_selected "${source_dir}" || continue
     export PYTHONPATH=$PYTHONPATH:${source_dir}
     export PYTHONPATH=$PYTHONPATH:${source_dir}/src
-    python -m unittest discover "${source_dir}/tests"
+    python -m unittest discover "${source_dir}/tests" || status=1
 done
+
+for service_dir in "${service_dirs[@]}"; do
+    is_selected "${service_dir}" || continue
+    (cd "${service_dir}/src" && PYTHONPATH=. python -m unittest discover -s ../tests) || status=1
+done
+
+exit ${status}
@@ -75,8 +75,25 @@ def filter_low_value_count_rows(df, column_name, min_count=10):
     return filtered_df
 
 
+def read_preprocessed_dataset(path):
+    """
+    Reads the preprocessed dataset from a CSV file or a Parquet file/dataset directory.
+
+    Args:
+        path: Path ending in '.csv', or in '.parquet' / no extension for Parquet output.
+
+    Returns:
+        The preprocessed dataset as a Pandas DataFrame.
+    """
+    if os.path.splitext(path.rstrip("/"))[1] in ("", ".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
 def prep_context():
-    preprocessed = pd.read_csv(f"gs://{BUCKET}/{DATASET_INPUT}/{DATASET_INPUT_FILE}")
+    preprocessed = read_preprocessed_dataset(
+        f"gs://{BUCKET}/{DATASET_INPUT}/{DATASET_INPUT_FILE}"
+    )
     # renaming column name
     preprocessed.rename(
         columns={
@@ -50,6 +50,11 @@ embedding_columns = {
     "multimodal": "multimodal_embeddings",
 }
 
+# Columns filtered alongside vector searches by the backend
+filter_columns = ["c1_name", "Brand"]
+if os.environ.get("CATALOG_PRICE_COLUMN"):
+    filter_columns.append(os.environ.get("CATALOG_PRICE_COLUMN"))
+
 index_names = {
     "text": "rag_text_embeddings_index",
     "image": "rag_image_embeddings_index",
@@ -101,7 +106,8 @@ def initialize_database():
 def populate_table():
     """Populate the table"""
     try:
-        # ETL Run
+        # ETL Run, the new table gets the ScaNN indexes of all embedding columns
+        # (text, image and multimodal) and the filter indexes before it is swapped in
         logger.info("Generate embeddings...")
         asyncio.run(
             table.create_and_populate(
@@ -109,24 +115,16 @@ def populate_table():
                 max_workers_value=max_workers_value,
                 processed_data_path=processed_data_path,
                 table_name=catalog_table_name,
-            )
-        )
-        logger.info("Embeddings generated successfully")
-
-        # Create Indexes for all embedding columns(text, image and multimodal)
-        logger.info("Create SCaNN indexes...")
-        for modality, embedding_column in embedding_columns.items():
-            index_name = index_names[modality]
-
-            table.create_embeddings_index(
-                database=catalog_db_name,
+                embedding_indexes={
+                    index_names[modality]: embedding_column
+                    for modality, embedding_column in embedding_columns.items()
+                },
                 distance_function=DISTANCE_FUNCTION,
-                embedding_column=embedding_column,
-                index_name=index_name,
                 num_leaves=NUM_LEAVES_VALUE,
-                table_name=catalog_table_name,
+                filter_columns=filter_columns,
             )
-        logger.info("SCaNN indexes have been created successfully")
+        )
+        logger.info("Table populated and indexed successfully")
     except Exception:
         logger.exception("An unhandled exception occurred while populating the table")
         raise
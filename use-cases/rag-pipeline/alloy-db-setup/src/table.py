@@ -13,9 +13,12 @@
 # limitations under the License.
 
 import asyncio
+import csv
+import io
 import logging
 import logging.config
 import os
+import time
 
 import aiohttp
 import alloydb_connect
@@ -26,6 +29,10 @@ from google.cloud.alloydb.connector import Connector
 from pgvector.sqlalchemy import Vector
 
 EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION"))
+# Rows per CSV chunk streamed to COPY FROM STDIN, each row carries three vectors
+LOAD_CHUNK_ROWS = int(os.getenv("LOAD_CHUNK_ROWS", "1000"))
+
+EMBEDDING_COLUMNS = ["multimodal_embeddings", "text_embeddings", "image_embeddings"]
 
 # Configure logging
 logging.config.fileConfig("logging.conf")
@@ -39,16 +46,182 @@ if "LOG_LEVEL" in os.environ:
     logger.setLevel(new_log_level)
 
 
+def read_processed_data(processed_data_path: str) -> pd.DataFrame:
+    """Reads the processed catalog from a CSV file or a Parquet file/dataset directory.
+
+    Paths ending in '.parquet' or without a file extension (e.g. a partitioned Parquet
+    dataset directory) are read as Parquet, anything else as CSV.
+    """
+    if os.path.splitext(processed_data_path.rstrip("/"))[1] in ("", ".parquet"):
+        return pd.read_parquet(processed_data_path)
+    return pd.read_csv(processed_data_path)
+
+
+def vector_literal(embedding) -> str | None:
+    """Formats an embedding as a pgvector text literal, e.g. '[0.1,0.2]'."""
+    if embedding is None:
+        return None
+    return "[" + ",".join(map(str, embedding)) + "]"
+
+
+def copy_chunks(df: pd.DataFrame, chunk_rows: int):
+    """Yields the rows of the DataFrame as CSV text chunks for COPY FROM STDIN.
+
+    Every value but NULL is quoted, NULLs are written as unquoted empty fields, so
+    COPY keeps empty strings and NULLs apart.
+    """
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start : start + chunk_rows].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        for column in EMBEDDING_COLUMNS:
+            chunk[column] = chunk[column].map(vector_literal)
+
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_NOTNULL).writerows(
+            chunk.itertuples(index=False, name=None)
+        )
+        yield buffer.getvalue()
+        logger.debug("Streamed %s/%s rows", start + len(chunk), len(df))
+
+
+def scann_index_sql(
+    index_name: str,
+    table_name: str,
+    embedding_column: str,
+    distance_function: str,
+    num_leaves: int,
+) -> str:
+    """Returns the statement creating a ScaNN index on an embedding column."""
+    return (
+        f"CREATE INDEX {index_name} ON {table_name} "
+        f"USING scann ({embedding_column} {distance_function}) "
+        f"WITH (num_leaves={num_leaves});"
+    )
+
+
+def filter_index_name(table_name: str, column: str) -> str:
+    """Returns the name of the B-tree index of a filter column."""
+    return f"{table_name}_{column.lower()}_index"
+
+
+def filter_index_sql(index_name: str, table_name: str, column: str) -> str:
+    """Returns the statement creating a B-tree index on a filter column."""
+    return f'CREATE INDEX {index_name} ON {table_name} ("{column}");'
+
+
+def load_table(
+    engine: sqlalchemy.engine.Engine,
+    table_name: str,
+    df: pd.DataFrame,
+    embedding_indexes: dict | None = None,
+    distance_function: str = "cosine",
+    num_leaves: int | None = None,
+    filter_columns: list | tuple = (),
+    chunk_rows: int = LOAD_CHUNK_ROWS,
+) -> float:
+    """Bulk loads the DataFrame into a table with COPY FROM STDIN.
+
+    The rows are streamed in CSV chunks into '<table_name>_staging', which gets the
+    ScaNN indexes of embedding_indexes (index name to embedding column) and the B-tree
+    indexes of filter_columns, and fresh statistics. The staging table then replaces
+    the table in the same transaction, so readers keep the previous, indexed catalog
+    until the new one is complete and indexed.
+
+    With current statistics, the planner pre-filters selective predicates (e.g. one
+    brand) through the filter indexes and ranks the few remaining rows exactly, and
+    filters the ScaNN index scan for broad ones (e.g. a whole category).
+
+    The indexes are built as '<index_name>_staging', not to clash with the indexes of
+    the previous table, and renamed once it is dropped.
+
+    Returns:
+        The rows per second of the load.
+    """
+    staging_table_name = f"{table_name}_staging"
+    columns = ", ".join(f'"{column}"' for column in df.columns)
+    index_statements = {
+        index_name: scann_index_sql(
+            f"{index_name}_staging",
+            staging_table_name,
+            embedding_column,
+            distance_function,
+            num_leaves,
+        )
+        for index_name, embedding_column in (embedding_indexes or {}).items()
+    }
+    for column in filter_columns:
+        index_name = filter_index_name(table_name, column)
+        index_statements[index_name] = filter_index_sql(
+            f"{index_name}_staging", staging_table_name, column
+        )
+
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        # Create the empty staging table with the schema to_sql infers
+        df.head(0).to_sql(
+            staging_table_name,
+            conn,
+            if_exists="replace",
+            index=False,
+            dtype={column: Vector(EMBEDDING_DIMENSION) for column in EMBEDDING_COLUMNS},
+        )
+
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(
+                f"COPY {staging_table_name} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                stream=copy_chunks(df, chunk_rows),
+            )
+        finally:
+            cursor.close()
+        seconds = time.perf_counter() - start
+
+        for index_name, statement in index_statements.items():
+            conn.execute(sqlalchemy.text(statement))
+            logger.info("Index '%s' created on '%s'", index_name, staging_table_name)
+        # Refresh the statistics the planner uses to estimate filter selectivity
+        conn.execute(sqlalchemy.text(f"ANALYZE {staging_table_name};"))
+
+        # Swap the staging table and its indexes in
+        conn.execute(sqlalchemy.text(f"DROP TABLE IF EXISTS {table_name};"))
+        conn.execute(
+            sqlalchemy.text(f"ALTER TABLE {staging_table_name} RENAME TO {table_name};")
+        )
+        for index_name in index_statements:
+            conn.execute(
+                sqlalchemy.text(
+                    f"ALTER INDEX {index_name}_staging RENAME TO {index_name};"
+                )
+            )
+
+    rows_per_second = len(df) / seconds if seconds else 0.0
+    logger.info(
+        "Loaded %s rows into '%s' in %.1f seconds (%.0f rows/s), indexed and swapped "
+        "in after %.1f seconds",
+        len(df),
+        table_name,
+        seconds,
+        rows_per_second,
+        time.perf_counter() - start,
+    )
+    return rows_per_second
+
+
 async def create_and_populate(
     database: str,
     table_name: str,
     processed_data_path: str,
     max_workers_value: int,
+    **index_options,
 ):
-    """Creates and populates table, generating embeddings concurrently."""
+    """Creates and populates table, generating embeddings concurrently.
+
+    The index_options, e.g. embedding_indexes and filter_columns, are passed to
+    load_table.
+    """
     try:
         # 1. Extract Data
-        df = pd.read_csv(processed_data_path)
+        df = read_processed_data(processed_data_path)
         logger.info("Input df shape: %s", df.shape)
 
         # Drop the products with image_uri as NaN
@@ -111,24 +284,12 @@ async def create_and_populate(
         # 3. Load (Synchronous Database Loading)
         with Connector() as connector:
             engine = alloydb_connect.init_connection_pool(connector, database)
-            with engine.begin() as conn:  # Use conn for consistency
-                df.to_sql(
-                    table_name,
-                    conn,
-                    if_exists="replace",
-                    index=False,
-                    method="multi",
-                    dtype={
-                        "multimodal_embeddings": Vector(EMBEDDING_DIMENSION),
-                        "text_embeddings": Vector(EMBEDDING_DIMENSION),
-                        "image_embeddings": Vector(EMBEDDING_DIMENSION),
-                    },
-                )
-                logger.info(
-                    "Table '%s' created and populated in '%s'.",
-                    table_name,
-                    database,
-                )
+            load_table(engine, table_name, df, **index_options)
+            logger.info(
+                "Table '%s' created and populated in '%s'.",
+                table_name,
+                database,
+            )
     except FileNotFoundError:
         logger.exception("CSV file not found")
     except pd.errors.EmptyDataError:
@@ -136,34 +297,3 @@ async def create_and_populate(
     except Exception:
         logger.exception("An unhandled exception occurred")
         raise
-
-
-def create_embeddings_index(
-    database: str,
-    table_name: str,
-    embedding_column: str,
-    index_name: str,
-    distance_function: str,
-    num_leaves: int,
-):
-    """Creates a ScaNN index on the specified embedding column."""
-    try:
-        with Connector() as connector:
-            pool = alloydb_connect.init_connection_pool(connector, database)
-            with pool.connect() as conn:  # Use conn for consistency
-                index_cmd = sqlalchemy.text(
-                    f"""CREATE INDEX {index_name} ON {table_name} 
-                       USING scann ({embedding_column} {distance_function}) 
-                       WITH (num_leaves={num_leaves});"""
-                )
-                conn.execute(index_cmd)
-                logger.info(
-                    "Index '%s' created on '%s', '%s'",
-                    index_name,
-                    table_name,
-                    embedding_column,
-                )
-
-    except Exception:
-        logger.exception("An unhandled exception occurred during index creation")
-        raise
@@ -0,0 +1,177 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the COPY FROM STDIN load of the table module."""
+
+import csv
+import io
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+os.environ.setdefault("EMBEDDING_DIMENSION", "2")
+
+# alloydb_connect loads the application default credentials on import
+with patch("google.auth.default", return_value=(MagicMock(), "project")):
+    from table import EMBEDDING_COLUMNS, copy_chunks, load_table, vector_literal
+
+
+def catalog(**columns):
+    """Returns a catalog DataFrame with the given columns and embeddings."""
+    rows = len(next(iter(columns.values())))
+    embeddings = {column: [[0.5, -1.0]] * rows for column in EMBEDDING_COLUMNS}
+    return pd.DataFrame({**columns, **embeddings})
+
+
+class TestVectorLiteral(unittest.TestCase):
+    def test_vector_literal(self):
+        """Test that embeddings are formatted as pgvector literals."""
+        self.assertEqual(vector_literal([0.1, 2, -3e-05]), "[0.1,2,-3e-05]")
+        self.assertIsNone(vector_literal(None))
+
+
+@unittest.skipUnless(hasattr(csv, "QUOTE_NOTNULL"), "requires Python 3.12+")
+class TestCopyChunks(unittest.TestCase):
+    def test_empty_strings_and_nulls(self):
+        """Test that empty strings are quoted and NULLs are unquoted empty fields."""
+        df = catalog(Name=["", None], Brand=["Alisha", float("nan")])
+
+        (chunk,) = copy_chunks(df, chunk_rows=10)
+
+        vectors = ",".join(['"[0.5,-1.0]"'] * len(EMBEDDING_COLUMNS))
+        self.assertEqual(chunk, f'"","Alisha",{vectors}\r\n' f",,{vectors}\r\n")
+
+    def test_values_are_quoted(self):
+        """Test that numbers and text with delimiters are quoted as CSV values."""
+        df = catalog(Name=['Shirt, "slim"'], Price=[9.5], Stock=[3])
+
+        (chunk,) = copy_chunks(df, chunk_rows=10)
+
+        self.assertTrue(chunk.startswith('"Shirt, ""slim""","9.5","3",'))
+
+    def test_null_embeddings(self):
+        """Test that missing embeddings are written as NULLs."""
+        df = catalog(Name=["Shirt"])
+        df["image_embeddings"] = [None]
+        self.assertEqual(EMBEDDING_COLUMNS[-1], "image_embeddings")
+
+        (chunk,) = copy_chunks(df, chunk_rows=10)
+
+        self.assertEqual(chunk, '"Shirt","[0.5,-1.0]","[0.5,-1.0]",\r\n')
+
+    def test_chunk_rows(self):
+        """Test that the rows are split into chunks of at most chunk_rows rows."""
+        df = catalog(Name=[f"product {i}" for i in range(5)])
+
+        chunks = list(copy_chunks(df, chunk_rows=2))
+
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [2, 2, 1])
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        self.assertEqual([row[0] for row in rows], list(df["Name"]))
+
+    def test_empty_dataframe(self):
+        """Test that an empty DataFrame streams no chunks."""
+        self.assertEqual(list(copy_chunks(catalog(Name=[]), chunk_rows=2)), [])
+
+
+class TestLoadTable(unittest.TestCase):
+    def load(self, df, **kwargs):
+        """
+        Loads df into the "catalog" table through mocks, and returns the SQL statements
+        run in order and the COPY call.
+        """
+        engine = MagicMock()
+        conn = engine.begin.return_value.__enter__.return_value
+        with (
+            patch.object(pd.DataFrame, "to_sql") as mock_to_sql,
+            patch("table.copy_chunks", return_value=iter(["chunk"])) as mock_chunks,
+        ):
+            load_table(engine, "catalog", df, chunk_rows=2, **kwargs)
+
+        mock_to_sql.assert_called_once()
+        self.assertEqual(mock_to_sql.call_args.args, ("catalog_staging", conn))
+        self.assertEqual(mock_to_sql.call_args.kwargs["if_exists"], "replace")
+        mock_chunks.assert_called_once_with(df, 2)
+        engine.begin.assert_called_once_with()
+
+        statements = []
+        copy_call = None
+        for name, args, kwargs in conn.mock_calls:
+            if name == "connection.cursor().execute":
+                copy_call = (args, kwargs)
+                statements.append(args[0])
+            elif name == "execute":
+                statements.append(str(args[0]))
+        conn.connection.cursor.return_value.close.assert_called_once_with()
+        return statements, copy_call, mock_chunks.return_value
+
+    def test_copy_into_staging_table(self):
+        """Test that the rows are streamed into the staging table before the swap."""
+        df = catalog(Name=["Shirt"], Brand=["Alisha"])
+
+        statements, (args, kwargs), chunks = self.load(df)
+
+        columns = ", ".join(f'"{column}"' for column in df.columns)
+        self.assertEqual(
+            args, (f"COPY catalog_staging ({columns}) FROM STDIN WITH (FORMAT csv)",)
+        )
+        self.assertIs(kwargs["stream"], chunks)
+        self.assertEqual(
+            statements[1:],
+            [
+                "ANALYZE catalog_staging;",
+                "DROP TABLE IF EXISTS catalog;",
+                "ALTER TABLE catalog_staging RENAME TO catalog;",
+            ],
+        )
+
+    def test_indexes_are_built_before_the_swap(self):
+        """Test that the staging table is indexed and analyzed before the swap."""
+        df = catalog(Name=["Shirt"], c1_name=["Clothing"], Brand=["Alisha"])
+
+        statements, _, _ = self.load(
+            df,
+            embedding_indexes={"rag_text_embeddings_index": "text_embeddings"},
+            distance_function="cosine",
+            num_leaves=10,
+            filter_columns=["c1_name", "Brand"],
+        )
+
+        self.assertTrue(statements[0].startswith("COPY catalog_staging "))
+        self.assertEqual(
+            statements[1:],
+            [
+                "CREATE INDEX rag_text_embeddings_index_staging ON catalog_staging "
+                "USING scann (text_embeddings cosine) WITH (num_leaves=10);",
+                "CREATE INDEX catalog_c1_name_index_staging ON catalog_staging "
+                '("c1_name");',
+                "CREATE INDEX catalog_brand_index_staging ON catalog_staging "
+                '("Brand");',
+                "ANALYZE catalog_staging;",
+                "DROP TABLE IF EXISTS catalog;",
+                "ALTER TABLE catalog_staging RENAME TO catalog;",
+                "ALTER INDEX rag_text_embeddings_index_staging "
+                "RENAME TO rag_text_embeddings_index;",
+                "ALTER INDEX catalog_c1_name_index_staging "
+                "RENAME TO catalog_c1_name_index;",
+                "ALTER INDEX catalog_brand_index_staging "
+                "RENAME TO catalog_brand_index;",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
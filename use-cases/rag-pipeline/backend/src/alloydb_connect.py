@@ -35,6 +35,14 @@ password = credentials.token
 # AlloyDB connection parameters
 instance_uri = os.environ.get("MLP_DB_INSTANCE_URI")
 
+# Connection pool of the process-wide engine
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "2"))
+DB_POOL_TIMEOUT_SECONDS = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "30"))
+# Replace connections before their IAM database token expires
+DB_POOL_RECYCLE_SECONDS = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+
 # Configure logging
 logging.config.fileConfig("logging.conf")
 logger = logging.getLogger(__name__)
@@ -66,7 +74,30 @@ def create_alloydb_engine(connector: Connector, catalog_db) -> sqlalchemy.engine
     pool = sqlalchemy.create_engine(
         "postgresql+pg8000://",
         creator=getconn,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=DB_POOL_PRE_PING,
     )
     pool.dialect.description_encoding = None
-    logger.info("Connection pool created successfully.")
+    logger.info(
+        "Connection pool created successfully with %s connections and %s overflow.",
+        DB_POOL_SIZE,
+        DB_MAX_OVERFLOW,
+    )
     return pool
+
+
+def pool_stats(engine: sqlalchemy.engine.Engine) -> dict:
+    """
+    Returns the size and usage of the connection pool of an engine.
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+    }
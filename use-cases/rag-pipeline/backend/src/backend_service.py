@@ -12,19 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import logging
 import logging.config
 import os
 import traceback
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
 
 import alloydb_connect
+import http_client
 import prompt_helper
 import rerank
 import semantic_search  # Assuming this module is implemented
 import uvicorn
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from google.cloud.alloydb.connector import Connector
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
@@ -33,7 +36,7 @@ from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from opentelemetry.sdk.resources import Resource, get_aggregated_resources
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 def configure_cloud_trace(app):
@@ -83,8 +86,26 @@ def configure_cloud_trace(app):
         return None  # Or handle the error appropriately
 
 
+@asynccontextmanager
+async def lifespan(app):
+    # One connector and connection pool for the process: the IAM token, TLS handshake
+    # and pool setup are paid once instead of on every request
+    app.state.connector = Connector()
+    app.state.engine = alloydb_connect.create_alloydb_engine(
+        app.state.connector, catalog_db
+    )
+    # Bounded pool running the blocking database queries of the requests
+    app.state.db_executor = semantic_search.create_db_executor()
+    yield
+    # Release the pooled connections shared by all requests
+    await http_client.aclose()
+    app.state.db_executor.shutdown(wait=False)
+    app.state.engine.dispose()
+    app.state.connector.close()
+
+
 # Assuming this is your FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 # Get a tracer instance
 tracer = configure_cloud_trace(app)
 
@@ -103,6 +124,25 @@ async def root():
     return {"message": "Cloud Trace Manual Span Example"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Returns per-endpoint latency metrics of the model calls, search cache and database
+    connection pool stats.
+    """
+    return {
+        "http_endpoints": http_client.metrics_snapshot(),
+        "search_cache": (
+            semantic_search.cache.stats() if semantic_search.cache else None
+        ),
+        "db_pool": (
+            alloydb_connect.pool_stats(app.state.engine)
+            if getattr(app.state, "engine", None)
+            else None
+        ),
+    }
+
+
 # Configure logging
 logging.config.fileConfig("logging.conf")  # Make sure you have logging.conf configured
 logger = logging.getLogger(__name__)
@@ -129,95 +169,131 @@ row_count = os.environ.get("ROW_COUNT")  # No of matching products in production
 class Prompt(BaseModel):
     text: Optional[str] = None  # Directly use str for text
     image_uri: Optional[str] = None  # Directly use str for image_uri
+    # Vector search mode and ScaNN parameters, defaulting to the SEARCH_MODE and
+    # SCANN_* environment variables
+    search_mode: Optional[Literal["exact", "ann"]] = None
+    num_leaves_to_search: Optional[int] = Field(default=None, gt=0)
+    pre_reordering_num_neighbors: Optional[int] = Field(default=None, gt=0)
+    # "llm" re-ranks with the instruction tuned model, "products" returns the vector
+    # search top-k as JSON and "cosine" re-ranks it locally, without the model call
+    response_mode: Literal["llm", "products", "cosine"] = "llm"
+    # Structured filters pushed down into the vector search query
+    category: Optional[str] = None  # c1_name, e.g. "Women's Clothing"
+    brand: Optional[str] = None
+    min_price: Optional[float] = Field(default=None, ge=0)
+    max_price: Optional[float] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def check_filters(self):
+        semantic_search.search_filters(
+            self.category, self.brand, self.min_price, self.max_price
+        )
+        return self
+
+    def search_options(self):
+        """
+        Returns the search mode, ScaNN parameters and filters of the request.
+        """
+        return self.model_dump(
+            exclude={"text", "image_uri", "response_mode"},
+            exclude_none=True,
+        )
+
+
+# Dependency to get the AlloyDB engine created by lifespan
+def get_alloydb_engine(request: Request):
+    return request.app.state.engine
+
+
+# Dependency to get the database query thread pool created by lifespan
+def get_db_executor(request: Request):
+    return request.app.state.db_executor
 
 
-# Dependency to get AlloyDB engine
-def get_alloydb_engine():
-    with Connector() as connector:
-        engine = alloydb_connect.create_alloydb_engine(connector, catalog_db)
-        yield engine
+async def find_products(prompt, engine, executor=None):
+    """
+    Searches the products matching a text, image, or image+text prompt.
+    """
+    if prompt.text and prompt.image_uri:
+        logger.info(f"Received text: {prompt.text} and image: {prompt.image_uri}")
+        modality = "multimodal"
+    elif prompt.text:
+        logger.info(f"Received text: {prompt.text}")
+        modality = "text"
+    elif prompt.image_uri:
+        logger.info(f"Received image: {prompt.image_uri}")
+        modality = "image"
+    else:
+        raise ValueError("Please provide at least a text or an image prompt.")
+
+    return await semantic_search.find_matching_product_rows_async(
+        engine=engine,
+        catalog_table=catalog_table,
+        embedding_column=embedding_column[modality],
+        row_count=row_count,
+        **prompt.search_options(),
+        user_query=prompt.text,
+        image_uri=prompt.image_uri,
+        reranker="cosine" if prompt.response_mode == "cosine" else None,
+        executor=executor,
+    )
+
+
+def build_rerank_prompt(prompt, products):
+    """
+    Builds the re-ranking prompt of the instruction tuned model for found products.
+    """
+    product_list = semantic_search.format_product_list(products)
+    logger.info(f"product list received by backend service: {product_list}")
+    # Image only search results will have no user_query
+    prompt_list = prompt_helper.prompt_generation(
+        search_result=product_list, user_query=prompt.text
+    )
+    logger.info(f"Prompt used to re-rank: {prompt_list}")
+    return prompt_list
+
+
+def server_sent_event(data, event=None):
+    """
+    Formats a server-sent event with a JSON data payload.
+    """
+    message = f"event: {event}\n" if event else ""
+    return f"{message}data: {json.dumps(data)}\n\n"
 
 
 @app.post("/generate_product_recommendations/")
 async def generate_product_recommendations(
-    prompt: Prompt, engine=Depends(get_alloydb_engine)
+    prompt: Prompt,
+    engine=Depends(get_alloydb_engine),
+    executor=Depends(get_db_executor),
 ):
     """
     Generates product recommendations based on a text, image, or image+text prompt.
+
+    Model calls use pooled async HTTP connections and the database query runs on a
+    bounded thread pool, so the event loop keeps serving concurrent requests.
+
+    The "llm" response mode returns the recommendations of the instruction tuned
+    model. "products" returns the top products of the vector search as JSON without
+    re-ranking, and "cosine" re-ranks them locally by exact cosine similarity; both
+    skip the model call.
     """
     try:
-        reranked_result = None  # Initialize reranked_result
-
-        if prompt.text and prompt.image_uri:
-            logger.info(f"Received text: {prompt.text} and image: {prompt.image_uri}")
-            product_list = semantic_search.find_matching_products(
-                engine=engine,
-                catalog_table=catalog_table,
-                embedding_column=embedding_column["multimodal"],
-                row_count=row_count,
-                user_query=prompt.text,
-                image_uri=prompt.image_uri,
-            )
-            logger.info(f"product list received by backend service: {product_list}")
-            if not product_list:
-                return JSONResponse(
-                    content={"error": "No matching products found"}, status_code=404
-                )
-            prompt_list = prompt_helper.prompt_generation(
-                search_result=product_list, user_query=prompt.text
-            )
-            logger.info(f"Prompt used to re-rank: {prompt_list}")
-            reranked_result = rerank.query_instruction_tuned_gemma(prompt_list)
-            logger.info(f"Response to front end: {reranked_result}")
-
-        elif prompt.text:
-            logger.info(f"Received text: {prompt.text}")
-            product_list = semantic_search.find_matching_products(
-                engine=engine,
-                catalog_table=catalog_table,
-                embedding_column=embedding_column["text"],
-                row_count=row_count,
-                user_query=prompt.text,
-            )
-            logger.info(f"product list received by backend service: {product_list}")
-            if not product_list:
-                return JSONResponse(
-                    content={"error": "No matching products found"}, status_code=404
-                )
-            prompt_list = prompt_helper.prompt_generation(
-                search_result=product_list, user_query=prompt.text
-            )
-            logger.info(f"Prompt used to re-rank: {prompt_list}")
-            reranked_result = rerank.query_instruction_tuned_gemma(prompt_list)
-            logger.info(f"Response to front end: {reranked_result}")
-
-        elif prompt.image_uri:
-            logger.info(f"Received image: {prompt.image_uri}")
-            product_list = semantic_search.find_matching_products(
-                engine=engine,
-                catalog_table=catalog_table,
-                embedding_column=embedding_column["image"],
-                row_count=row_count,
-                image_uri=prompt.image_uri,
+        products = await find_products(prompt, engine, executor)
+        if not products:
+            return JSONResponse(
+                content={"error": "No matching products found"}, status_code=404
             )
-            logger.info(f"product list received by backend service: {product_list}")
-            if not product_list:
-                return JSONResponse(
-                    content={"error": "No matching products found"}, status_code=404
-                )
 
-            # Image only search results will have no user_query
-            prompt_list = prompt_helper.prompt_generation(
-                search_result=product_list, user_query=None
-            )
-            logger.info(f"Prompt used to re-rank: {prompt_list}")
-            reranked_result = rerank.query_instruction_tuned_gemma(prompt_list)
-            logger.info(f"Response to front end: {reranked_result}")
+        if prompt.response_mode != "llm":
+            return JSONResponse(content={"products": products}, status_code=200)
 
-        else:
-            raise ValueError("Please provide at least a text or an image prompt.")
+        reranked_result = await rerank.query_instruction_tuned_gemma_async(
+            build_rerank_prompt(prompt, products)
+        )
+        logger.info(f"Response to front end: {reranked_result}")
 
-        # Check if reranked_result is still None (no valid prompt was processed)
+        # Check if reranked_result is None (the model returned no recommendations)
         if reranked_result is None:
             return JSONResponse(
                 content={"error": "No valid products found after re-ranking"},
@@ -231,5 +307,52 @@ async def generate_product_recommendations(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/generate_product_recommendations/stream")
+async def stream_product_recommendations(
+    prompt: Prompt,
+    engine=Depends(get_alloydb_engine),
+    executor=Depends(get_db_executor),
+):
+    """
+    Streams the recommendations of the instruction tuned model as server-sent events.
+
+    The products are searched before the response starts, so search errors are
+    returned with an error status like generate_product_recommendations. Then every
+    generated piece of text is sent as soon as the model streams it, as a
+    {"token": ...} event, followed by a "done" event, or an "error" event if the
+    generation fails midway.
+    """
+    if prompt.response_mode != "llm":
+        raise HTTPException(
+            status_code=400, detail="Only the llm response mode can be streamed"
+        )
+    try:
+        products = await find_products(prompt, engine, executor)
+    except Exception as e:
+        logger.error(f"An error occurred: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not products:
+        return JSONResponse(
+            content={"error": "No matching products found"}, status_code=404
+        )
+    rerank_prompt = build_rerank_prompt(prompt, products)
+
+    async def events():
+        try:
+            async for token in rerank.stream_instruction_tuned_gemma(rerank_prompt):
+                yield server_sent_event({"token": token})
+            yield server_sent_event({}, event="done")
+        except Exception as e:
+            logger.error(f"An error occurred while streaming recommendations: {e}")
+            yield server_sent_event({"error": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
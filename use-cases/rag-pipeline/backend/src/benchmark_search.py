@@ -0,0 +1,207 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import json
+import logging
+import logging.config
+import os
+import statistics
+import time
+
+import alloydb_connect
+import semantic_search
+from google.cloud.alloydb.connector import Connector
+from sqlalchemy import text
+
+# Configure logging
+logging.config.fileConfig("logging.conf")
+logger = logging.getLogger(__name__)
+
+if "LOG_LEVEL" in os.environ:
+    new_log_level = os.environ["LOG_LEVEL"].upper()
+    logger.info(
+        f"Log level set to '{new_log_level}' via LOG_LEVEL environment variable"
+    )
+    logger.setLevel(new_log_level)
+
+catalog_db = os.environ.get("CATALOG_DB")
+catalog_table = os.environ.get("CATALOG_TABLE_NAME")
+
+# Exact k-NN with the same distance operator, used as the ground truth of recall@k
+EXACT_SETTINGS = {"enable_indexscan": "off"}
+
+
+def sample_query_embeddings(engine, embedding_column, num_queries):
+    """
+    Returns the embeddings of random catalog products, used as benchmark queries.
+    """
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(
+                f"SELECT CAST({embedding_column} AS text) FROM {catalog_table} "
+                f"WHERE {embedding_column} IS NOT NULL ORDER BY random() LIMIT :n"
+            ),
+            {"n": num_queries},
+        )
+        return [row[0] for row in result.fetchall()]
+
+
+def explain(engine, search_query, embeddings, settings):
+    """
+    Returns the query plan of a search, to check that the ScaNN index is used.
+    """
+    with engine.connect() as conn:
+        search_result = semantic_search.run_search_query(
+            conn, f"EXPLAIN {search_query}", embeddings, settings
+        )
+    return "\n".join(row[0] for row in search_result["rows"])
+
+
+def run_queries(engine, search_query, query_embeddings, settings):
+    """
+    Runs one search per query embedding, after one warm-up search.
+
+    Returns:
+        The product ids returned by each search and the latency of each search.
+    """
+    with engine.connect() as conn:
+        semantic_search.run_search_query(
+            conn, search_query, query_embeddings[0], settings
+        )
+
+    results = []
+    latencies = []
+    for embeddings in query_embeddings:
+        start = time.perf_counter()
+        with engine.connect() as conn:
+            search_result = semantic_search.run_search_query(
+                conn, search_query, embeddings, settings
+            )
+        latencies.append(time.perf_counter() - start)
+        id_index = search_result["columns"].index("product_id")
+        results.append([row[id_index] for row in search_result["rows"]])
+    return results, latencies
+
+
+def summarize(name, settings, results, latencies, exact_results, k):
+    """
+    Returns recall@k against the exact results and the latency percentiles.
+    """
+    recalls = [
+        len(set(result) & set(exact)) / min(k, len(exact)) if exact else 1.0
+        for result, exact in zip(results, exact_results)
+    ]
+    if len(latencies) > 1:
+        p50, p95, p99 = (
+            statistics.quantiles(latencies, n=100, method="inclusive")[i]
+            for i in (49, 94, 98)
+        )
+    else:
+        p50 = p95 = p99 = latencies[0]
+    return {
+        "name": name,
+        "settings": settings,
+        f"recall@{k}": statistics.fmean(recalls),
+        "latency_p50_ms": p50 * 1000,
+        "latency_p95_ms": p95 * 1000,
+        "latency_p99_ms": p99 * 1000,
+        "queries_per_second": len(latencies) / sum(latencies),
+    }
+
+
+def benchmark(
+    engine,
+    embedding_column,
+    k,
+    num_queries,
+    num_leaves_to_search_values,
+    pre_reordering_num_neighbors=None,
+):
+    """
+    Benchmarks recall@k versus latency of "ann" searches against the exact scan.
+
+    Both run the same query, ordered by the raw distance operator, the exact scan
+    with index scans disabled.
+    """
+    search_query = semantic_search.build_search_query(
+        catalog_table, embedding_column, k, search_mode="ann"
+    )
+    query_embeddings = sample_query_embeddings(engine, embedding_column, num_queries)
+    logger.info(
+        "Benchmarking %s queries on %s.%s, k=%s",
+        len(query_embeddings),
+        catalog_table,
+        embedding_column,
+        k,
+    )
+
+    exact_results, latencies = run_queries(
+        engine, search_query, query_embeddings, EXACT_SETTINGS
+    )
+    reports = [
+        summarize("exact", EXACT_SETTINGS, exact_results, latencies, exact_results, k)
+    ]
+
+    for num_leaves_to_search in num_leaves_to_search_values:
+        settings = semantic_search.scann_settings(
+            num_leaves_to_search, pre_reordering_num_neighbors
+        )
+        if len(reports) == 1:
+            logger.info(
+                "Query plan of the ann search:\n%s",
+                explain(engine, search_query, query_embeddings[0], settings),
+            )
+        results, latencies = run_queries(
+            engine, search_query, query_embeddings, settings
+        )
+        reports.append(summarize("ann", settings, results, latencies, exact_results, k))
+
+    for report in reports:
+        logger.info("Search benchmark: %s", json.dumps(report))
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmarks recall@k versus latency of ScaNN index searches"
+    )
+    parser.add_argument(
+        "--embedding-column", default=os.environ.get("EMBEDDING_COLUMN_TEXT")
+    )
+    parser.add_argument("--k", type=int, default=int(os.environ.get("ROW_COUNT", 5)))
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument(
+        "--num-leaves-to-search",
+        default="1,5,10,30,100",
+        help="Comma-separated scann.num_leaves_to_search values to benchmark.",
+    )
+    parser.add_argument("--pre-reordering-num-neighbors", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    args = parser.parse_args()
+
+    with Connector() as connector:
+        engine = alloydb_connect.create_alloydb_engine(connector, catalog_db)
+        reports = benchmark(
+            engine,
+            args.embedding_column,
+            args.k,
+            args.num_queries,
+            [int(value) for value in args.num_leaves_to_search.split(",")],
+            args.pre_reordering_num_neighbors,
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
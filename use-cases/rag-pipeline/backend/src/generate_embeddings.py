@@ -17,13 +17,19 @@ import logging
 import logging.config
 import os
 
-import requests
+import http_client
+import httpx
 
 # Define the API Endpoints for deployment
 TEXT_API_ENDPOINT = os.environ.get("TEXT_EMBEDDING_ENDPOINT")
 IMAGE_API_ENDPOINT = os.environ.get("IMAGE_EMBEDDING_ENDPOINT")
 MULTIMODAL_API_ENDPOINT = os.environ.get("MULTIMODAL_EMBEDDING_ENDPOINT")
 
+# Endpoint names of the shared HTTP client, keying their timeouts and metrics
+TEXT_ENDPOINT_NAME = "text_embedding"
+IMAGE_ENDPOINT_NAME = "image_embedding"
+MULTIMODAL_ENDPOINT_NAME = "multimodal_embedding"
+
 # Configure logging
 logging.config.fileConfig("logging.conf")
 logger = logging.getLogger("get_embeddings")
@@ -51,54 +57,76 @@ if "LOG_LEVEL" in os.environ:
         )
 
 
-def get_image_embeddings(image_uri):
+def _parse_embeddings(response, response_key, kind):
+    try:
+        return response.json()[response_key]
+    except (ValueError, TypeError, KeyError) as e:
+        # Handle potential JSON decoding errors
+        logger.exception(
+            "Not able to decode received json from %s embedding API: %s", kind, e
+        )
+        raise ValueError(f"Invalid response from {kind} embedding API") from e
+
+
+def _post_embeddings(endpoint_name, endpoint, payload, response_key, kind):
     """
-    Fetches image embeddings from an image embedding API.
+    POSTs an embedding request with the pooled HTTP client.
 
     Args:
-        image_uri: The URI of the image.
+        endpoint_name: The shared HTTP client endpoint name.
+        endpoint: The embedding API endpoint.
+        payload: The JSON request body.
+        response_key: The key of the embeddings in the JSON response.
+        kind: The embedding kind, for logging.
 
     Returns:
-        The image embeddings as a JSON object.
+        The embeddings as a JSON object.
 
     Raises:
-        requests.exceptions.HTTPError: If there is an error fetching the image embeddings
-                                       or the API returns an invalid response.
+        httpx.HTTPError: If there is an error fetching the embeddings, after retries.
+        ValueError: If the API returns an invalid response.
     """
     try:
-        response = requests.post(
-            IMAGE_API_ENDPOINT,
-            json={"image_uri": image_uri},
-            headers={"Content-Type": "application/json"},
-            timeout=100,
-        )
-
-        # This will raise an HTTPError for bad responses (4xx or 5xx)
-        response.raise_for_status()
+        response = http_client.post_json_sync(endpoint_name, endpoint, payload)
+    except httpx.HTTPError as e:
+        logger.exception("Error fetching %s embedding: %s", kind, e)
+        raise
+    return _parse_embeddings(response, response_key, kind)
 
-        image_embeddings = response.json()["image_embeds"]
-        return image_embeddings
 
-    except requests.exceptions.HTTPError as e:
-        # Reraise HTTPError for better error handling
-        logger.exception("Error fetching image embedding: %s", e)
+async def _post_embeddings_async(endpoint_name, endpoint, payload, response_key, kind):
+    """
+    Non-blocking version of _post_embeddings, using the pooled async HTTP client.
+    """
+    try:
+        response = await http_client.post_json(endpoint_name, endpoint, payload)
+    except httpx.HTTPError as e:
+        logger.exception("Error fetching %s embedding: %s", kind, e)
         raise
+    return _parse_embeddings(response, response_key, kind)
 
-    except requests.exceptions.RequestException as e:
-        # For other request errors, re-raise as an HTTPError
-        logger.exception("Invalid response from image embedding API: %s", e)
-        raise requests.exceptions.HTTPError(
-            "Error fetching image embedding", response=requests.Response()
-        ) from e
 
-    except (ValueError, TypeError) as e:
-        # Handle potential JSON decoding errors
-        logger.exception(
-            "Not able to decode received json from image embedding API: %s", e
-        )
-        raise requests.exceptions.HTTPError(
-            "Invalid response from image embedding API", response=requests.Response()
-        ) from e
+def get_image_embeddings(image_uri):
+    """
+    Fetches image embeddings from an image embedding API.
+
+    Args:
+        image_uri: The URI of the image.
+
+    Returns:
+        The image embeddings as a JSON object.
+
+    Raises:
+        httpx.HTTPError: If there is an error fetching the image embeddings.
+        ValueError: If the API returns an invalid response.
+    """
+    return _post_embeddings(
+        IMAGE_ENDPOINT_NAME,
+        IMAGE_API_ENDPOINT,
+        {"image_uri": image_uri},
+        "image_embeds",
+        "image",
+    )
 
 
 def get_multimodal_embeddings(image_uri, desc):
@@ -113,38 +141,16 @@ def get_multimodal_embeddings(image_uri, desc):
         The multimodal embeddings as a JSON object.
 
     Raises:
-        requests.exceptions.HTTPError: If there is an error fetching the multimodal embeddings
-                                       or the API returns an invalid response.
+        httpx.HTTPError: If there is an error fetching the multimodal embeddings.
+        ValueError: If the API returns an invalid response.
     """
-    try:
-        response = requests.post(
-            MULTIMODAL_API_ENDPOINT,
-            json={"image_uri": image_uri, "caption": desc},
-            headers={"Content-Type": "application/json"},
-            timeout=100,
-        )
-
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        return response.json()["multimodal_embeds"]
-
-    except requests.exceptions.HTTPError as e:
-        logger.exception("Error fetching multimodal embedding: %s", e)
-        raise
-
-    except requests.exceptions.RequestException as e:
-        logger.exception("Error fetching multimodal embedding: %s", e)
-        raise requests.exceptions.HTTPError(
-            "Error fetching multimodal embedding", response=requests.Response()
-        ) from e
-
-    except (ValueError, TypeError) as e:
-        logger.exception(
-            "Not able to decode received json from multimodal embedding API: %s", e
-        )
-        raise requests.exceptions.HTTPError(
-            "Invalid response from multimodal embedding API",
-            response=requests.Response(),
-        ) from e
+    return _post_embeddings(
+        MULTIMODAL_ENDPOINT_NAME,
+        MULTIMODAL_API_ENDPOINT,
+        {"image_uri": image_uri, "caption": desc},
+        "multimodal_embeds",
+        "multimodal",
+    )
 
 
 def get_text_embeddings(text):
@@ -158,38 +164,12 @@ def get_text_embeddings(text):
         The text embeddings as a JSON object.
 
     Raises:
-        requests.exceptions.HTTPError: If there is an error fetching the text embeddings
-                                       or the API returns an invalid response.
+        httpx.HTTPError: If there is an error fetching the text embeddings.
+        ValueError: If the API returns an invalid response.
     """
-    try:
-        response = requests.post(
-            TEXT_API_ENDPOINT,
-            json={"caption": text},
-            headers={"Content-Type": "application/json"},
-            timeout=100,
-        )
-
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-
-        return response.json()["text_embeds"]
-
-    except requests.exceptions.HTTPError as e:
-        logger.exception("Error fetching text embedding: %s", e)
-        raise
-
-    except requests.exceptions.RequestException as e:
-        logger.exception("Error fetching text embedding: %s", e)
-        raise requests.exceptions.HTTPError(
-            "Error fetching text embedding", response=requests.Response()
-        ) from e
-
-    except (ValueError, TypeError) as e:
-        logger.exception(
-            "Not able to decode received json from text embedding API: %s", e
-        )
-        raise requests.exceptions.HTTPError(
-            "Invalid response from text embedding API", response=requests.Response()
-        ) from e
+    return _post_embeddings(
+        TEXT_ENDPOINT_NAME, TEXT_API_ENDPOINT, {"caption": text}, "text_embeds", "text"
+    )
 
 
 def get_embeddings(image_uri=None, text=None):
@@ -207,7 +187,7 @@ def get_embeddings(image_uri=None, text=None):
         The embeddings as a JSON object, or None if no valid input is provided.
 
     Raises:
-        requests.exceptions.HTTPError: If there is an error fetching the embeddings from the API.
+        httpx.HTTPError: If there is an error fetching the embeddings from the API.
     """
     if image_uri and text:
         logger.info("Generating MULTIMODAL embeddings...")
@@ -223,3 +203,58 @@ def get_embeddings(image_uri=None, text=None):
             "Missing input. Provide a textual product description and/or image_uri to generate embeddings"
         )
         return None
+
+
+async def get_image_embeddings_async(image_uri):
+    """
+    Non-blocking version of get_image_embeddings.
+    """
+    return await _post_embeddings_async(
+        IMAGE_ENDPOINT_NAME,
+        IMAGE_API_ENDPOINT,
+        {"image_uri": image_uri},
+        "image_embeds",
+        "image",
+    )
+
+
+async def get_multimodal_embeddings_async(image_uri, desc):
+    """
+    Non-blocking version of get_multimodal_embeddings.
+    """
+    return await _post_embeddings_async(
+        MULTIMODAL_ENDPOINT_NAME,
+        MULTIMODAL_API_ENDPOINT,
+        {"image_uri": image_uri, "caption": desc},
+        "multimodal_embeds",
+        "multimodal",
+    )
+
+
+async def get_text_embeddings_async(text):
+    """
+    Non-blocking version of get_text_embeddings.
+    """
+    return await _post_embeddings_async(
+        TEXT_ENDPOINT_NAME, TEXT_API_ENDPOINT, {"caption": text}, "text_embeds", "text"
+    )
+
+
+async def get_embeddings_async(image_uri=None, text=None):
+    """
+    Non-blocking version of get_embeddings, sharing pooled connections across requests.
+    """
+    if image_uri and text:
+        logger.info("Generating MULTIMODAL embeddings...")
+        return await get_multimodal_embeddings_async(image_uri, text)
+    elif text:
+        logger.info("Generating TEXT embeddings...")
+        return await get_text_embeddings_async(text)
+    elif image_uri:
+        logger.info("Generating IMAGE embeddings...")
+        return await get_image_embeddings_async(image_uri)
+    else:
+        logger.error(
+            "Missing input. Provide a textual product description and/or image_uri to generate embeddings"
+        )
+        return None
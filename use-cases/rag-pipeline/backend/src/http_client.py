@@ -0,0 +1,366 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import collections
+import logging
+import logging.config
+import os
+import random
+import statistics
+import threading
+import time
+
+import httpx
+from opentelemetry import metrics
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Configure logging
+logging.config.fileConfig("logging.conf")
+logger = logging.getLogger(__name__)
+
+if "LOG_LEVEL" in os.environ:
+    new_log_level = os.environ["LOG_LEVEL"].upper()
+    logger.info(
+        f"Log level set to '{new_log_level}' via LOG_LEVEL environment variable"
+    )
+    logger.setLevel(new_log_level)
+
+# Connection pool shared by all outgoing requests of the process
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+HTTP_CONNECT_TIMEOUT_SECONDS = float(
+    os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", "5")
+)
+# Default read/write/pool timeout, overridden per endpoint by HTTP_TIMEOUT_SECONDS_<ENDPOINT>
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "100"))
+
+# Retries of connection failures and overloaded responses
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE_SECONDS = float(os.environ.get("HTTP_BACKOFF_BASE_SECONDS", "0.1"))
+HTTP_BACKOFF_MAX_SECONDS = float(os.environ.get("HTTP_BACKOFF_MAX_SECONDS", "2"))
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+# Errors raised before the request reached the endpoint, so a retry never repeats work
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Latency samples kept per endpoint for the percentiles of metrics_snapshot()
+LATENCY_SAMPLES = 1024
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+_latency_histogram = metrics.get_meter(__name__).create_histogram(
+    "rag.http.client.duration",
+    unit="s",
+    description="Latency of outgoing model endpoint calls, including retries.",
+)
+
+
+class EndpointMetrics:
+    """
+    Call counts and latencies of one model endpoint.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        if len(latencies) > 1:
+            p50, p95, p99 = (
+                statistics.quantiles(latencies, n=100, method="inclusive")[i]
+                for i in (49, 94, 98)
+            )
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "latency_seconds": {
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                "max": latencies[-1] if latencies else 0.0,
+            },
+        }
+
+
+_metrics = collections.defaultdict(EndpointMetrics)
+_metrics_lock = threading.Lock()
+
+
+def _record(endpoint_name, start, retries, error):
+    seconds = time.perf_counter() - start
+    with _metrics_lock:
+        endpoint_metrics = _metrics[endpoint_name]
+        endpoint_metrics.requests += 1
+        endpoint_metrics.errors += int(error)
+        endpoint_metrics.retries += retries
+        endpoint_metrics.latencies.append(seconds)
+    _latency_histogram.record(
+        seconds, {"endpoint": endpoint_name, "error": bool(error)}
+    )
+
+
+def metrics_snapshot():
+    """
+    Returns the request count, errors, retries and latency percentiles per endpoint.
+    """
+    with _metrics_lock:
+        return {name: m.snapshot() for name, m in sorted(_metrics.items())}
+
+
+def endpoint_timeout(endpoint_name):
+    """
+    Returns the timeout of an endpoint, set by HTTP_TIMEOUT_SECONDS_<ENDPOINT_NAME>.
+    """
+    seconds = float(
+        os.environ.get(
+            f"HTTP_TIMEOUT_SECONDS_{endpoint_name.upper()}", HTTP_TIMEOUT_SECONDS
+        )
+    )
+    return httpx.Timeout(seconds, connect=min(HTTP_CONNECT_TIMEOUT_SECONDS, seconds))
+
+
+def _client_kwargs():
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        "timeout": HTTP_TIMEOUT_SECONDS,
+        # Negotiated through ALPN, so plain http:// endpoints stay on HTTP/1.1
+        "http2": HTTP2_AVAILABLE,
+    }
+
+
+def get_client():
+    """
+    Returns the process-wide pooled HTTP client, creating it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**_client_kwargs())
+            logger.info(
+                "Created pooled HTTP client with %s connections, HTTP/2 %s",
+                HTTP_MAX_CONNECTIONS,
+                HTTP2_AVAILABLE,
+            )
+        return _client
+
+
+def get_async_client():
+    """
+    Returns the process-wide pooled async HTTP client, creating it on first use.
+
+    Connections are kept alive between requests, so concurrent recommendations reuse
+    them instead of paying DNS and TCP setup on every call.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(**_client_kwargs())
+        logger.info(
+            "Created pooled async HTTP client with %s connections, HTTP/2 %s",
+            HTTP_MAX_CONNECTIONS,
+            HTTP2_AVAILABLE,
+        )
+    return _async_client
+
+
+async def aclose():
+    """
+    Closes the pooled HTTP clients, e.g. on application shutdown.
+    """
+    global _client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _should_retry(attempt, response=None, error=None):
+    """
+    Retries connection failures and overloaded endpoints.
+
+    Errors raised after the request was sent, e.g. the ReadTimeout of a stalled
+    generation, are not retried: the endpoint may still be working on the request.
+    """
+    if attempt >= HTTP_MAX_RETRIES:
+        return False
+    if error is not None:
+        return isinstance(error, RETRY_EXCEPTIONS)
+    return response.status_code in RETRY_STATUS_CODES
+
+
+def _backoff_seconds(attempt):
+    """
+    Exponential backoff with full jitter, so retries of concurrent requests spread out.
+    """
+    return random.uniform(
+        0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+class _Attempts:
+    """
+    Retry state of one endpoint call, shared by the sync, async and streaming calls.
+    """
+
+    def __init__(self, endpoint_name):
+        self.endpoint_name = endpoint_name
+        self.start = time.perf_counter()
+        self.retries = 0
+
+    def retry_delay(self, response=None, error=None):
+        """
+        Returns the seconds to wait before retrying the failed attempt, or None when the
+        response or error is final.
+        """
+        if not _should_retry(self.retries, response, error):
+            return None
+        logger.warning(
+            "Retrying %s after %s",
+            self.endpoint_name,
+            (
+                f"error: {error}"
+                if error is not None
+                else f"status {response.status_code}"
+            ),
+        )
+        delay = _backoff_seconds(self.retries)
+        self.retries += 1
+        return delay
+
+    def record(self, error):
+        _record(self.endpoint_name, self.start, self.retries, error)
+
+
+async def post_json(endpoint_name, url, payload):
+    """
+    POSTs a JSON payload with the pooled async client, retrying transient failures.
+
+    Args:
+        endpoint_name: The endpoint name used for its timeout and metrics.
+        url: The endpoint URL.
+        payload: The JSON-serializable request body.
+
+    Returns:
+        The httpx.Response.
+
+    Raises:
+        httpx.HTTPStatusError: If the endpoint returns a 4xx or 5xx response.
+        httpx.TransportError: If the request could not be completed.
+    """
+    client = get_async_client()
+    timeout = endpoint_timeout(endpoint_name)
+    attempts = _Attempts(endpoint_name)
+    while True:
+        try:
+            response = await client.post(url, json=payload, timeout=timeout)
+        except httpx.TransportError as e:
+            delay = attempts.retry_delay(error=e)
+            if delay is None:
+                attempts.record(error=True)
+                raise
+        else:
+            delay = attempts.retry_delay(response=response)
+            if delay is None:
+                break
+        await asyncio.sleep(delay)
+
+    attempts.record(error=response.is_error)
+    response.raise_for_status()
+    return response
+
+
+def post_json_sync(endpoint_name, url, payload):
+    """
+    Blocking version of post_json, using the pooled synchronous client.
+    """
+    client = get_client()
+    timeout = endpoint_timeout(endpoint_name)
+    attempts = _Attempts(endpoint_name)
+    while True:
+        try:
+            response = client.post(url, json=payload, timeout=timeout)
+        except httpx.TransportError as e:
+            delay = attempts.retry_delay(error=e)
+            if delay is None:
+                attempts.record(error=True)
+                raise
+        else:
+            delay = attempts.retry_delay(response=response)
+            if delay is None:
+                break
+        time.sleep(delay)
+
+    attempts.record(error=response.is_error)
+    response.raise_for_status()
+    return response
+
+
+async def stream_lines(endpoint_name, url, payload):
+    """
+    POSTs a JSON payload with the pooled async client and yields the response lines.
+
+    Failures are retried like post_json until the response starts streaming; once
+    lines were yielded, errors are raised, since a retry would repeat them.
+
+    Raises:
+        httpx.HTTPStatusError: If the endpoint returns a 4xx or 5xx response.
+        httpx.TransportError: If the request could not be completed.
+    """
+    client = get_async_client()
+    timeout = endpoint_timeout(endpoint_name)
+    attempts = _Attempts(endpoint_name)
+    started = False
+    while True:
+        try:
+            async with client.stream(
+                "POST", url, json=payload, timeout=timeout
+            ) as response:
+                delay = attempts.retry_delay(response=response)
+                if delay is None:
+                    if response.is_error:
+                        await response.aread()
+                        attempts.record(error=True)
+                        response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        started = True
+                        yield line
+                    attempts.record(error=False)
+                    return
+        except httpx.TransportError as e:
+            delay = None if started else attempts.retry_delay(error=e)
+            if delay is None:
+                attempts.record(error=True)
+                raise
+        await asyncio.sleep(delay)
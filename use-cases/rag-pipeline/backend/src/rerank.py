@@ -12,11 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import logging
 import logging.config
 import os
 
-import requests
+import http_client
+import httpx
+import numpy as np
 
 # Configure logging
 logging.config.fileConfig("logging.conf")
@@ -32,6 +35,25 @@ if "LOG_LEVEL" in os.environ:
 
 # Construct the URL
 URL = os.environ.get("GEMMA_IT_ENDPOINT")
+# Endpoint name of the shared HTTP client, keying its timeout and metrics
+ENDPOINT_NAME = "instruction_tuned_model"
+
+
+def build_request(prompt, stream=False):
+    """
+    Builds the chat completion request body of the instruction tuned model.
+    """
+    request = {
+        "model": "google/gemma-2-2b-it",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": 384,
+        "top_p": 1.0,
+        "top_k": 1.0,
+    }
+    if stream:
+        request["stream"] = True
+    return request
 
 
 def query_instruction_tuned_gemma(prompt):
@@ -45,28 +67,13 @@ def query_instruction_tuned_gemma(prompt):
         The generated text response from the VLLM model.
     """
     try:
-        data = {
-            "model": "google/gemma-2-2b-it",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.7,
-            "max_tokens": 384,
-            "top_p": 1.0,
-            "top_k": 1.0,
-        }
-        response = requests.post(
-            URL,
-            json=data,
-            headers={"Content-Type": "application/json"},
-            timeout=100,
-        )
-        print("Printing response from the instruction tuned model:", response.text)
-        response.raise_for_status()  # Raise an exception for HTTP errors
+        response = http_client.post_json_sync(ENDPOINT_NAME, URL, build_request(prompt))
+        logger.debug("Response from the instruction tuned model: %s", response.text)
 
         return response.json()["choices"][0]["message"]["content"]
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error communicating with instruction model endpoint: {e}")
-        print(e)
         return "Error: Could not generate a response."
     except KeyError as e:
         logger.error(f"Unexpected response format from instruction model endpoint: {e}")
@@ -74,3 +81,96 @@ def query_instruction_tuned_gemma(prompt):
     except Exception as e:
         logger.exception(f"An unexpected error occurred: {e}")
         return "Error: An unexpected error occurred."
+
+
+async def query_instruction_tuned_gemma_async(prompt):
+    """
+    Non-blocking version of query_instruction_tuned_gemma, using the pooled async client.
+
+    Args:
+        prompt: The text prompt for the model.
+
+    Returns:
+        The generated text response from the VLLM model.
+    """
+    try:
+        response = await http_client.post_json(
+            ENDPOINT_NAME, URL, build_request(prompt)
+        )
+        logger.debug("Response from the instruction tuned model: %s", response.text)
+        return response.json()["choices"][0]["message"]["content"]
+
+    except httpx.HTTPError as e:
+        logger.error(f"Error communicating with instruction model endpoint: {e}")
+        return "Error: Could not generate a response."
+    except KeyError as e:
+        logger.error(f"Unexpected response format from instruction model endpoint: {e}")
+        return "Error: Invalid response format."
+    except Exception as e:
+        logger.exception(f"An unexpected error occurred: {e}")
+        return "Error: An unexpected error occurred."
+
+
+async def stream_instruction_tuned_gemma(prompt):
+    """
+    Streams the completion of the instruction tuned model as it is generated.
+
+    The OpenAI-compatible endpoint is called with stream=true and answers with
+    server-sent events, one "data: <chunk>" line per generated token(s), ended by
+    "data: [DONE]".
+
+    Args:
+        prompt: The text prompt for the model.
+
+    Yields:
+        The generated text, piece by piece.
+
+    Raises:
+        httpx.HTTPError: If the endpoint could not be reached or returned an error.
+        KeyError, ValueError: If the endpoint returned an invalid chunk.
+    """
+    async for line in http_client.stream_lines(
+        ENDPOINT_NAME, URL, build_request(prompt, stream=True)
+    ):
+        data = line[len("data:") :].strip()
+        # Read the stream to its end, so the connection returns to the pool
+        if not line.startswith("data:") or data == "[DONE]":
+            continue
+        chunk = json.loads(data)
+        if not chunk["choices"]:
+            continue
+        content = chunk["choices"][0]["delta"].get("content")
+        if content:
+            yield content
+
+
+def cosine_rerank(products, query_embeddings, top_k):
+    """
+    Re-scores products by the exact cosine similarity of their embeddings to the query.
+
+    A local, LLM-free re-ranking: a NumPy matrix-vector product over a few dozen
+    candidates, which corrects the approximate order of an ANN search.
+
+    Args:
+        products: Product dicts with their "embedding" as a pgvector text literal,
+            which is removed.
+        query_embeddings: The query embedding.
+        top_k: Number of products to return.
+
+    Returns:
+        The top_k products by descending "cosine_similarity".
+    """
+    if not products:
+        return products
+    embeddings = np.array(
+        [json.loads(product.pop("embedding")) for product in products],
+        dtype=np.float32,
+    )
+    query = np.asarray(query_embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+    scores = embeddings @ query / np.maximum(norms, np.finfo(np.float32).tiny)
+    ranked = []
+    for index in np.argsort(-scores, kind="stable")[:top_k]:
+        products[index]["cosine_similarity"] = float(scores[index])
+        ranked.append(products[index])
+    return ranked
@@ -0,0 +1,259 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import logging.config
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Configure logging
+logging.config.fileConfig("logging.conf")
+logger = logging.getLogger(__name__)
+
+if "LOG_LEVEL" in os.environ:
+    new_log_level = os.environ["LOG_LEVEL"].upper()
+    logger.info(
+        f"Log level set to '{new_log_level}' via LOG_LEVEL environment variable"
+    )
+    logger.setLevel(new_log_level)
+
+# Search cache configuration
+SEARCH_CACHE_ENABLED = os.environ.get("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "10000"))
+SEARCH_CACHE_EMBEDDING_TTL_SECONDS = int(
+    os.environ.get("SEARCH_CACHE_EMBEDDING_TTL_SECONDS", "86400")
+)
+SEARCH_CACHE_RESULT_TTL_SECONDS = int(
+    os.environ.get("SEARCH_CACHE_RESULT_TTL_SECONDS", "300")
+)
+SEARCH_CACHE_REDIS_URL = os.environ.get("SEARCH_CACHE_REDIS_URL")
+
+
+class InMemoryRedis:
+    """
+    Local stand-in for the subset of the Redis client API used by SearchCache.
+
+    Entries expire after their TTL and the least recently used entries are evicted
+    once max_entries is reached, like a Redis server configured with
+    maxmemory-policy allkeys-lru.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return value
+
+    def set(self, name, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._entries[name] = (expires_at, value)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._entries.pop(name, None) is not None for name in names)
+
+    def flushdb(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+
+class SearchCache:
+    """
+    Two-level cache of the semantic search path.
+
+    - Level 1 maps a query (text and/or image URI) to its embedding, skipping the
+      embedding model call.
+    - Level 2 maps (embedding hash, embedding column, table, row_count, search
+      options) to the rows returned by the vector search, skipping the database
+      round trip.
+
+    Values are stored as JSON in any client exposing the Redis get/set(ex=) API, so a
+    shared Redis instance can back every replica while InMemoryRedis serves a single
+    process (and tests).
+    """
+
+    def __init__(
+        self,
+        client,
+        embedding_ttl_seconds=86400,
+        result_ttl_seconds=300,
+        namespace="rag-search",
+    ):
+        self.client = client
+        self.embedding_ttl_seconds = embedding_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.namespace = namespace
+        self.hits = {"embedding": 0, "result": 0}
+        self.misses = {"embedding": 0, "result": 0}
+        # Counted from the event loop and the database executor threads
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _digest(*parts):
+        return hashlib.sha256(
+            json.dumps(parts, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+    def embedding_key(self, user_query=None, image_uri=None):
+        return f"{self.namespace}:embedding:{self._digest(user_query, image_uri)}"
+
+    def result_key(
+        self,
+        embeddings,
+        embedding_column,
+        catalog_table,
+        row_count,
+        search_options=None,
+    ):
+        digest = self._digest(
+            embeddings,
+            embedding_column,
+            catalog_table,
+            str(row_count),
+            sorted((search_options or {}).items()),
+        )
+        return f"{self.namespace}:result:{digest}"
+
+    def _get(self, level, key):
+        try:
+            value = self.client.get(key)
+        except Exception as e:
+            # The cache is an optimization, never fail the request because of it
+            logger.warning(f"Search cache read failed: {e}")
+            value = None
+        with self._stats_lock:
+            if value is None:
+                self.misses[level] += 1
+            else:
+                self.hits[level] += 1
+        return None if value is None else json.loads(value)
+
+    def _set(self, key, value, ttl_seconds):
+        try:
+            self.client.set(key, json.dumps(value), ex=ttl_seconds or None)
+        except Exception as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    def get_embeddings(self, user_query=None, image_uri=None):
+        return self._get("embedding", self.embedding_key(user_query, image_uri))
+
+    def put_embeddings(self, embeddings, user_query=None, image_uri=None):
+        self._set(
+            self.embedding_key(user_query, image_uri),
+            embeddings,
+            self.embedding_ttl_seconds,
+        )
+
+    def get_rows(
+        self,
+        embeddings,
+        embedding_column,
+        catalog_table,
+        row_count,
+        search_options=None,
+    ):
+        return self._get(
+            "result",
+            self.result_key(
+                embeddings, embedding_column, catalog_table, row_count, search_options
+            ),
+        )
+
+    def put_rows(
+        self,
+        rows,
+        embeddings,
+        embedding_column,
+        catalog_table,
+        row_count,
+        search_options=None,
+    ):
+        self._set(
+            self.result_key(
+                embeddings, embedding_column, catalog_table, row_count, search_options
+            ),
+            rows,
+            self.result_ttl_seconds,
+        )
+
+    def stats(self):
+        with self._stats_lock:
+            hits = dict(self.hits)
+            misses = dict(self.misses)
+        return {
+            level: {
+                "hits": hits[level],
+                "misses": misses[level],
+                "hit_rate": (
+                    hits[level] / (hits[level] + misses[level])
+                    if hits[level] + misses[level]
+                    else 0.0
+                ),
+            }
+            for level in hits
+        }
+
+
+def create_search_cache():
+    """
+    Creates the search cache configured by the SEARCH_CACHE_* environment variables.
+
+    Returns:
+        A SearchCache backed by Redis when SEARCH_CACHE_REDIS_URL is set, otherwise by
+        an in-process InMemoryRedis, or None when SEARCH_CACHE_ENABLED is false.
+    """
+    if not SEARCH_CACHE_ENABLED:
+        logger.info("Search cache disabled")
+        return None
+
+    if SEARCH_CACHE_REDIS_URL:
+        import redis
+
+        client = redis.Redis.from_url(SEARCH_CACHE_REDIS_URL)
+        logger.info("Search cache backed by Redis at %s", SEARCH_CACHE_REDIS_URL)
+    else:
+        client = InMemoryRedis(max_entries=SEARCH_CACHE_MAX_ENTRIES)
+        logger.info(
+            "Search cache backed by process memory with %s entries",
+            SEARCH_CACHE_MAX_ENTRIES,
+        )
+
+    return SearchCache(
+        client,
+        embedding_ttl_seconds=SEARCH_CACHE_EMBEDDING_TTL_SECONDS,
+        result_ttl_seconds=SEARCH_CACHE_RESULT_TTL_SECONDS,
+    )
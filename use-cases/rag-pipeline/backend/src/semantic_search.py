@@ -12,13 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import functools
 import json
 import logging
 import logging.config
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import generate_embeddings
-import pandas as pd
+import rerank
+import search_cache
 from google.cloud.alloydb.connector import Connector
 from sqlalchemy import text
 
@@ -33,76 +37,461 @@ if "LOG_LEVEL" in os.environ:
     )
     logger.setLevel(new_log_level)
 
+# Shared by all requests of the process; None when disabled
+cache = search_cache.create_search_cache()
 
-def find_matching_products(
+# Size of the bounded pool running the blocking database queries of async requests
+DB_THREADPOOL_SIZE = int(os.environ.get("DB_THREADPOOL_SIZE", "8"))
+
+# Vector search mode, "exact" (sequential scan) or "ann" (ScaNN index scan)
+SEARCH_MODES = ("exact", "ann")
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "exact")
+# Distance function the ScaNN indexes were created with
+SEARCH_DISTANCE_FUNCTION = os.environ.get("SEARCH_DISTANCE_FUNCTION", "cosine")
+DISTANCE_OPERATORS = {"cosine": "<=>", "l2": "<->", "dot_product": "<#>"}
+SIMILARITY_EXPRESSIONS = {
+    "cosine": "(1-({distance}))",
+    "l2": "(1-({distance}))",
+    "dot_product": "(-({distance}))",
+}
+# Default ScaNN search parameters of "ann" searches, unset keeps the index defaults
+SCANN_NUM_LEAVES_TO_SEARCH = os.environ.get("SCANN_NUM_LEAVES_TO_SEARCH")
+SCANN_PRE_REORDERING_NUM_NEIGHBORS = os.environ.get(
+    "SCANN_PRE_REORDERING_NUM_NEIGHBORS"
+)
+# Set to "on" to filter while traversing the ScaNN index (AlloyDB inline filtering)
+SCANN_ENABLE_INLINE_FILTERING = os.environ.get("SCANN_ENABLE_INLINE_FILTERING")
+
+# Product columns selected by the vector search, returned as is by the JSON response
+# modes, next to the similarity score. The long Description is left out.
+SEARCH_COLUMNS = (
+    '"Name", "c1_name" as Category, "Specifications", "Id" as Product_Id, "Brand", '
+    '"image_uri"'
+)
+# Result columns written to the re-ranking prompt, with their labels
+PROMPT_COLUMNS = {
+    "Name": "Name",
+    "category": "Category",
+    "Specifications": "Specifications",
+}
+
+# Candidates re-scored per returned product by the "cosine" re-ranker
+COSINE_RERANK_CANDIDATE_FACTOR = int(
+    os.environ.get("COSINE_RERANK_CANDIDATE_FACTOR", "4")
+)
+
+# Catalog column of the price range filters, unset when the catalog has no prices
+CATALOG_PRICE_COLUMN = os.environ.get("CATALOG_PRICE_COLUMN")
+# SQL predicates of the structured search filters, bound to parameters of their name
+FILTER_PREDICATES = {
+    "category": '"c1_name" = :category',
+    "brand": '"Brand" = :brand',
+    "min_price": '"{price_column}" >= :min_price',
+    "max_price": '"{price_column}" <= :max_price',
+}
+
+
+def create_db_executor():
+    """
+    Returns a thread pool of DB_THREADPOOL_SIZE threads for the database queries of
+    find_matching_product_rows_async. The owner shuts it down when done with it.
+    """
+    return ThreadPoolExecutor(
+        max_workers=DB_THREADPOOL_SIZE, thread_name_prefix="semantic-search-db"
+    )
+
+
+def get_query_embeddings(user_query=None, image_uri=None):
+    """
+    Returns the embeddings of a query, generating them only on a cache miss.
+    """
+    if cache is not None:
+        embeddings = cache.get_embeddings(user_query=user_query, image_uri=image_uri)
+        if embeddings is not None:
+            return embeddings
+
+    embeddings = generate_embeddings.get_embeddings(
+        text=user_query, image_uri=image_uri
+    )
+    if cache is not None and embeddings is not None:
+        cache.put_embeddings(embeddings, user_query=user_query, image_uri=image_uri)
+    return embeddings
+
+
+async def get_query_embeddings_async(user_query=None, image_uri=None):
+    """
+    Non-blocking version of get_query_embeddings.
+    """
+    if cache is not None:
+        embeddings = cache.get_embeddings(user_query=user_query, image_uri=image_uri)
+        if embeddings is not None:
+            return embeddings
+
+    embeddings = await generate_embeddings.get_embeddings_async(
+        text=user_query, image_uri=image_uri
+    )
+    if cache is not None and embeddings is not None:
+        cache.put_embeddings(embeddings, user_query=user_query, image_uri=image_uri)
+    return embeddings
+
+
+def scann_settings(num_leaves_to_search=None, pre_reordering_num_neighbors=None):
+    """
+    Returns the ScaNN search parameters of a request, defaulting to SCANN_* settings.
+    """
+    values = {
+        "scann.num_leaves_to_search": num_leaves_to_search
+        or SCANN_NUM_LEAVES_TO_SEARCH,
+        "scann.pre_reordering_num_neighbors": pre_reordering_num_neighbors
+        or SCANN_PRE_REORDERING_NUM_NEIGHBORS,
+    }
+    return {name: str(value) for name, value in values.items() if value}
+
+
+def search_filters(category=None, brand=None, min_price=None, max_price=None):
+    """
+    Returns the structured filters of a request, without the unset ones.
+
+    Raises:
+        ValueError: If a price filter is set without CATALOG_PRICE_COLUMN, or min_price
+            is greater than max_price.
+    """
+    filters = {
+        "category": category,
+        "brand": brand,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+    filters = {name: value for name, value in filters.items() if value is not None}
+    if not CATALOG_PRICE_COLUMN and filters.keys() & {"min_price", "max_price"}:
+        raise ValueError("Price filters require CATALOG_PRICE_COLUMN to be set")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError("min_price must not be greater than max_price")
+    return filters
+
+
+def build_where_clause(filters):
+    """
+    Returns the WHERE clause of structured filters, binding their values by name.
+    """
+    if not filters:
+        return ""
+    return " WHERE " + " AND ".join(
+        FILTER_PREDICATES[name].format(price_column=CATALOG_PRICE_COLUMN)
+        for name in filters
+    )
+
+
+def build_search_query(
+    catalog_table,
+    embedding_column,
+    row_count,
+    search_mode="exact",
+    filters=None,
+    include_embeddings=False,
+):
+    """
+    Builds the vector search query of a search mode.
+
+    "exact" orders by a similarity expression, which the planner can only evaluate
+    with a sequential scan. "ann" orders by the raw distance operator of the index
+    distance function, so the ScaNN index serves the ORDER BY ... LIMIT.
+
+    Filters are pushed down into the WHERE clause. The planner then either pre-filters
+    selective predicates through the B-tree indexes of the filter columns and ranks the
+    remaining rows exactly, or filters the ScaNN index scan for broad ones.
+
+    With include_embeddings, the stored embedding of every row is returned too, as the
+    "embedding" column.
+    """
+    where = build_where_clause(filters)
+    columns = SEARCH_COLUMNS
+    if include_embeddings:
+        columns += f", CAST({embedding_column} AS text) AS embedding"
+    if search_mode == "exact":
+        return f"""SELECT {columns}, (1-({embedding_column} <-> :emb)) AS cosine_similarity FROM {catalog_table}{where} ORDER BY cosine_similarity DESC LIMIT {row_count};"""
+    if search_mode == "ann":
+        distance = f"{embedding_column} {DISTANCE_OPERATORS[SEARCH_DISTANCE_FUNCTION]} CAST(:emb AS vector)"
+        similarity = SIMILARITY_EXPRESSIONS[SEARCH_DISTANCE_FUNCTION].format(
+            distance=distance
+        )
+        return f"""SELECT {columns}, {similarity} AS cosine_similarity FROM {catalog_table}{where} ORDER BY {distance} LIMIT {row_count};"""
+    raise ValueError(
+        f"Unsupported search_mode '{search_mode}', expected one of {SEARCH_MODES}"
+    )
+
+
+def run_search_query(conn, search_query, embeddings, settings=None, filters=None):
+    """
+    Executes a search query, applying settings (e.g. ScaNN parameters) to its
+    transaction only and binding the values of its filters.
+
+    Returns:
+        A dict with the result "columns" and "rows".
+    """
+    for name, value in (settings or {}).items():
+        conn.execute(
+            text("SELECT set_config(:name, :value, true)"),
+            {"name": name, "value": value},
+        )
+    result = conn.execute(text(search_query), {"emb": embeddings, **(filters or {})})
+    return {
+        "columns": list(result.keys()),
+        "rows": [list(row) for row in result.fetchall()],
+    }
+
+
+def search_products(
+    engine,
+    catalog_table,
+    embedding_column,
+    row_count,
+    query_embeddings,
+    search_mode=None,
+    settings=None,
+    filters=None,
+    include_embeddings=False,
+):
+    """
+    Runs the vector search for query embeddings, serving repeated searches from cache.
+
+    Args:
+        search_mode: "exact" or "ann", defaults to SEARCH_MODE.
+        settings: Parameters of the "ann" search, see scann_settings().
+        filters: Structured filters of the search, see search_filters().
+        include_embeddings: Whether to return the embedding of every row.
+
+    Returns:
+        A dict with the result "columns" and "rows".
+    """
+    search_mode = search_mode or SEARCH_MODE
+    settings = (settings or {}) if search_mode == "ann" else {}
+    filters = filters or {}
+    if filters and search_mode == "ann" and SCANN_ENABLE_INLINE_FILTERING:
+        settings = {
+            **settings,
+            "scann.enable_inline_filtering": SCANN_ENABLE_INLINE_FILTERING,
+        }
+    embeddings = json.dumps(query_embeddings)
+    logger.debug("Searching products for embeddings %s", embeddings)
+
+    # Parameterized query
+    search_query = build_search_query(
+        catalog_table,
+        embedding_column,
+        row_count,
+        search_mode,
+        filters,
+        include_embeddings,
+    )
+    logger.info(
+        "Semantic Search Query (%s, %s, %s) to get product recommendations: %s ",
+        search_mode,
+        settings,
+        filters,
+        search_query,
+    )
+
+    search_options = {
+        "search_mode": search_mode,
+        "include_embeddings": include_embeddings,
+        **settings,
+        **filters,
+    }
+    if cache is not None:
+        search_result = cache.get_rows(
+            query_embeddings,
+            embedding_column,
+            catalog_table,
+            row_count,
+            search_options=search_options,
+        )
+        if search_result is not None:
+            logger.info("Semantic Search results served from cache")
+            return search_result
+
+    # Execute the query with the embedding as a parameter
+    with engine.connect() as conn:
+        search_result = run_search_query(
+            conn, search_query, embeddings, settings, filters
+        )
+    if cache is not None:
+        cache.put_rows(
+            search_result,
+            query_embeddings,
+            embedding_column,
+            catalog_table,
+            row_count,
+            search_options=search_options,
+        )
+        logger.debug("Search cache stats: %s", cache.stats())
+    return search_result
+
+
+def product_rows(search_result):
+    """
+    Returns the rows of a search result as dicts keyed by column name.
+    """
+    columns = search_result["columns"]
+    return [dict(zip(columns, row)) for row in search_result["rows"]]
+
+
+def format_product_list(products):
+    """
+    Formats products as the product list of the re-ranking prompt, one line each.
+    """
+    return "\n".join(
+        " | ".join(
+            f"{label}: {product[column]}" for column, label in PROMPT_COLUMNS.items()
+        )
+        for product in products
+    )
+
+
+def candidate_count(row_count, reranker=None):
+    """
+    Returns the number of products to search for, more than row_count to re-rank them.
+    """
+    if reranker == "cosine":
+        return int(row_count) * COSINE_RERANK_CANDIDATE_FACTOR
+    return row_count
+
+
+def rerank_products(products, query_embeddings, row_count, reranker=None):
+    """
+    Re-ranks search candidates with a local re-ranker, or returns them as they are.
+    """
+    if reranker is None:
+        return products
+    if reranker == "cosine":
+        return rerank.cosine_rerank(products, query_embeddings, int(row_count))
+    raise ValueError(f"Unsupported reranker '{reranker}', expected 'cosine'")
+
+
+def find_matching_product_rows(
     engine,
     catalog_table,
     embedding_column,
     row_count,
     user_query=None,
     image_uri=None,
+    search_mode=None,
+    num_leaves_to_search=None,
+    pre_reordering_num_neighbors=None,
+    category=None,
+    brand=None,
+    min_price=None,
+    max_price=None,
+    reranker=None,
 ):
+    """
+    Returns the products matching a query as dicts, or None if the search failed.
+
+    With reranker="cosine", COSINE_RERANK_CANDIDATE_FACTOR times more candidates are
+    searched and re-scored locally by rerank.cosine_rerank.
+    """
     try:
-        embeddings = json.dumps(
-            generate_embeddings.get_embeddings(text=user_query, image_uri=image_uri)
+        query_embeddings = get_query_embeddings(
+            user_query=user_query, image_uri=image_uri
         )
         logger.info(
-            "Generated embeddings for %s text and %s image_uri %s embeddings",
+            "Generated embeddings for %s text and %s image_uri",
             user_query,
             image_uri,
-            embeddings,
         )
-
-        # Parameterized query
-        search_query = f"""SELECT "Name", "Description", "c1_name" as Category, "Specifications", "Id" as Product_Id, "Brand" , "image_uri" , (1-({embedding_column} <-> :emb)) AS cosine_similarity FROM {catalog_table} ORDER BY cosine_similarity DESC LIMIT {row_count};"""
-        logger.info(
-            "Semantic Search Query to get product recommendations sorted by Cosine distance: %s ",
-            search_query,
+        search_result = search_products(
+            engine,
+            catalog_table,
+            embedding_column,
+            candidate_count(row_count, reranker),
+            query_embeddings,
+            search_mode=search_mode,
+            settings=scann_settings(num_leaves_to_search, pre_reordering_num_neighbors),
+            filters=search_filters(category, brand, min_price, max_price),
+            include_embeddings=reranker == "cosine",
+        )
+        products = rerank_products(
+            product_rows(search_result), query_embeddings, row_count, reranker
         )
+        logger.info("Semantic Search returned %s products", len(products))
+        return products
+
+    except Exception as e:
+        logger.error(f"An error occurred while finding matching products: {e}")
 
-        # Execute the query with the embedding as a parameter
-        with engine.connect() as conn:
-            # Perform a cosine similarity search
-            result = conn.execute(
-                text(search_query),
-                {"emb": embeddings},
-            )
-
-            df = pd.DataFrame(result.fetchall())
-            df.columns = result.keys()  # Set column names
-
-        logger.info("Semantic Search results received from DB %s: ")
-
-        # Print all columns with keys and values
-        for index, row in df.iterrows():
-            print(f"Row {index + 1}:")
-            for key, value in row.items():
-                print(f"  {key}: {value}")
-            print("-" * 20)  # Add a separator between rows
-
-        # Drop specified columns to remove cosine bias and re-ranking results later in path
-        columns_to_drop = [
-            "Description",
-            "cosine_similarity",
-            "Brand",
-            "product_id",
-            "image_uri",
-        ]  # List the columns to drop
-        df = df.drop(columns=columns_to_drop)
-
-        logger.info("Semantic Search results received from DB: %s", df)
-        # Convert the DataFrame to a string and dropped row Index
-        retrieved_information = df.to_string(index=False)
 
+async def find_matching_product_rows_async(
+    engine,
+    catalog_table,
+    embedding_column,
+    row_count,
+    user_query=None,
+    image_uri=None,
+    search_mode=None,
+    num_leaves_to_search=None,
+    pre_reordering_num_neighbors=None,
+    category=None,
+    brand=None,
+    min_price=None,
+    max_price=None,
+    reranker=None,
+    executor=None,
+):
+    """
+    Non-blocking version of find_matching_product_rows.
+
+    Embeddings are fetched with the pooled async HTTP client. The synchronous database
+    query runs on executor, e.g. the bounded pool of create_db_executor, so it never
+    blocks the event loop and at most DB_THREADPOOL_SIZE queries wait on database
+    connections at once. None uses the default executor of the event loop.
+    """
+    try:
+        query_embeddings = await get_query_embeddings_async(
+            user_query=user_query, image_uri=image_uri
+        )
         logger.info(
-            "Formatted response for the Semantic Search Query from DB: "
-            + retrieved_information
+            "Generated embeddings for %s text and %s image_uri",
+            user_query,
+            image_uri,
         )
-        return retrieved_information
+        search_result = await asyncio.get_running_loop().run_in_executor(
+            executor,
+            functools.partial(
+                search_products,
+                engine,
+                catalog_table,
+                embedding_column,
+                candidate_count(row_count, reranker),
+                query_embeddings,
+                search_mode=search_mode,
+                settings=scann_settings(
+                    num_leaves_to_search, pre_reordering_num_neighbors
+                ),
+                filters=search_filters(category, brand, min_price, max_price),
+                include_embeddings=reranker == "cosine",
+            ),
+        )
+        products = rerank_products(
+            product_rows(search_result), query_embeddings, row_count, reranker
+        )
+        logger.info("Semantic Search returned %s products", len(products))
+        return products
 
     except Exception as e:
         logger.error(f"An error occurred while finding matching products: {e}")
 
-    finally:
-        if conn:
-            conn.close()
+
+def find_matching_products(*args, **kwargs):
+    """
+    Returns the product list text of the products matching a query, or None.
+    """
+    products = find_matching_product_rows(*args, **kwargs)
+    return format_product_list(products) if products else None
+
+
+async def find_matching_products_async(*args, **kwargs):
+    """
+    Non-blocking version of find_matching_products.
+    """
+    products = await find_matching_product_rows_async(*args, **kwargs)
+    return format_product_list(products) if products else None
@@ -0,0 +1,331 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the endpoints and lifespan of the backend_service module."""
+
+import json
+import os
+import threading
+import unittest
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+# Keep the Cloud Trace exporter from sending the spans of the tests
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+# alloydb_connect loads the application default credentials on import
+with patch("google.auth.default", return_value=(MagicMock(), "project")):
+    import alloydb_connect
+    import backend_service
+
+TEXT_EMBEDDING_URL = "http://text-embedding/embeddings"
+GEMMA_URL = "http://gemma/v1/chat/completions"
+QUERY_EMBEDDINGS = [0.6, 0.8]
+COLUMNS = ["Name", "category", "Specifications", "Product_Id", "Brand", "image_uri"]
+ROWS = [
+    ["Slim Shirt", "Clothing", "Cotton", "p1", "Alisha", "gs://images/p1.jpg"],
+    ["Blue Jeans", "Clothing", "Denim", "p2", "Denim Co", "gs://images/p2.jpg"],
+]
+
+
+def model_server(*gemma_responses):
+    """
+    Returns a MockTransport handler serving the text embedding model and answering
+    the instruction tuned model with gemma_responses in order, and its requests.
+    """
+    gemma_responses = list(gemma_responses)
+    requests = []
+
+    def handle(request):
+        requests.append(request)
+        if request.url == TEXT_EMBEDDING_URL:
+            return httpx.Response(200, json={"text_embeds": QUERY_EMBEDDINGS})
+        return gemma_responses.pop(0)
+
+    return handle, requests
+
+
+def completion(content):
+    """Returns a chat completion response of the instruction tuned model."""
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def mock_engine(rows=ROWS):
+    """
+    Returns an engine mock whose searches return rows and record their thread names.
+    """
+    engine = MagicMock()
+    engine.query_threads = []
+    conn = engine.connect.return_value.__enter__.return_value
+
+    def execute(*args, **kwargs):
+        engine.query_threads.append(threading.current_thread().name)
+        result = MagicMock()
+        result.keys.return_value = COLUMNS
+        result.fetchall.return_value = rows
+        return result
+
+    conn.execute.side_effect = execute
+    return engine
+
+
+def stream_completion(*lines):
+    """Returns a streamed chat completion response with the server-sent event lines."""
+    return httpx.Response(200, content="".join(f"{line}\n\n" for line in lines))
+
+
+def stream_chunk(content):
+    """Returns the server-sent event line of a streamed chat completion chunk."""
+    return "data: " + json.dumps({"choices": [{"delta": {"content": content}}]})
+
+
+def server_sent_events(text):
+    """Returns the (event, data) pairs of a server-sent events response body."""
+    events = []
+    for message in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.split("\n"))
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+class BackendServiceTestCase(unittest.IsolatedAsyncioTestCase):
+    @asynccontextmanager
+    async def serve(self, handle, engine):
+        """
+        Runs the application lifespan with engine and the model server handle, and
+        yields a client sending requests to the application.
+        """
+        model_client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+        with (
+            patch("semantic_search.cache", None),
+            patch("backend_service.row_count", "2"),
+            patch.dict(backend_service.embedding_column, {"text": "text_embeddings"}),
+            patch("generate_embeddings.TEXT_API_ENDPOINT", TEXT_EMBEDDING_URL),
+            patch("rerank.URL", GEMMA_URL),
+            patch("backend_service.Connector") as self.connector_class,
+            patch(
+                "alloydb_connect.create_alloydb_engine", return_value=engine
+            ) as self.create_engine,
+            patch("http_client._async_client", model_client),
+        ):
+            async with backend_service.lifespan(backend_service.app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=backend_service.app),
+                    base_url="http://backend",
+                ) as client:
+                    yield client
+
+
+class TestGenerateProductRecommendations(BackendServiceTestCase):
+    async def test_recommendations(self):
+        """Test that the products found are re-ranked by the instruction tuned model."""
+        handle, requests = model_server(completion("1. Slim Shirt"))
+        engine = mock_engine()
+
+        async with self.serve(handle, engine) as client:
+            response = await client.post(
+                "/generate_product_recommendations/", json={"text": "shirt"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), "1. Slim Shirt")
+        self.assertEqual(
+            [str(r.url) for r in requests], [TEXT_EMBEDDING_URL, GEMMA_URL]
+        )
+        rerank_prompt = json.loads(requests[1].content)["messages"][0]["content"]
+        self.assertIn("Name: Slim Shirt", rerank_prompt)
+        self.assertIn("Name: Blue Jeans", rerank_prompt)
+        (search_call,) = (
+            engine.connect.return_value.__enter__.return_value.execute.call_args_list
+        )
+        self.assertEqual(search_call.args[1]["emb"], json.dumps(QUERY_EMBEDDINGS))
+
+    async def test_search_runs_on_db_executor(self):
+        """Test that the database query runs on the thread pool of the lifespan."""
+        handle, _ = model_server()
+        engine = mock_engine()
+
+        async with self.serve(handle, engine) as client:
+            response = await client.post(
+                "/generate_product_recommendations/",
+                json={"text": "shirt", "response_mode": "products"},
+            )
+            db_executor = backend_service.app.state.db_executor
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product["Name"] for product in response.json()["products"]],
+            ["Slim Shirt", "Blue Jeans"],
+        )
+        self.assertEqual(len(engine.query_threads), 1)
+        self.assertTrue(engine.query_threads[0].startswith("semantic-search-db"))
+        self.assertTrue(db_executor._shutdown)
+
+    async def test_lifespan_restarts(self):
+        """Test that a second lifespan in the same process serves requests again."""
+        for attempt in range(2):
+            handle, _ = model_server(completion(f"recommendation {attempt}"))
+
+            async with self.serve(handle, mock_engine()) as client:
+                response = await client.post(
+                    "/generate_product_recommendations/", json={"text": "shirt"}
+                )
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), f"recommendation {attempt}")
+
+    async def test_no_matching_products(self):
+        """Test that an empty search result is answered with a 404."""
+        handle, requests = model_server()
+
+        async with self.serve(handle, mock_engine(rows=[])) as client:
+            response = await client.post(
+                "/generate_product_recommendations/", json={"text": "shirt"}
+            )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"error": "No matching products found"})
+        self.assertEqual([str(r.url) for r in requests], [TEXT_EMBEDDING_URL])
+
+    async def test_missing_prompt(self):
+        """Test that a request without text or image is answered with a 500."""
+        handle, requests = model_server()
+
+        async with self.serve(handle, mock_engine()) as client:
+            response = await client.post("/generate_product_recommendations/", json={})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(requests, [])
+
+
+class TestStreamProductRecommendations(BackendServiceTestCase):
+    async def stream(self, *gemma_responses, **prompt):
+        """Streams the recommendations of prompt and returns the response."""
+        handle, requests = model_server(*gemma_responses)
+        self.requests = requests
+
+        async with self.serve(handle, mock_engine()) as client:
+            return await client.post(
+                "/generate_product_recommendations/stream",
+                json={"text": "shirt", **prompt},
+            )
+
+    async def test_streams_tokens(self):
+        """Test that every streamed chunk is sent as a token event, then done."""
+        response = await self.stream(
+            stream_completion(
+                stream_chunk("Slim"),
+                'data: {"choices": []}',
+                stream_chunk(" Shirt"),
+                "data: [DONE]",
+            )
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.headers["content-type"], "text/event-stream; charset=utf-8"
+        )
+        self.assertEqual(response.headers["x-accel-buffering"], "no")
+        self.assertEqual(
+            server_sent_events(response.text),
+            [
+                ("message", {"token": "Slim"}),
+                ("message", {"token": " Shirt"}),
+                ("done", {}),
+            ],
+        )
+        self.assertTrue(json.loads(self.requests[1].content)["stream"])
+
+    async def test_invalid_chunk_sends_error_event(self):
+        """Test that a generation failing midway ends with an error event."""
+        response = await self.stream(
+            stream_completion(stream_chunk("Slim"), "data: {not json")
+        )
+
+        self.assertEqual(response.status_code, 200)
+        events = server_sent_events(response.text)
+        self.assertEqual(events[0], ("message", {"token": "Slim"}))
+        self.assertEqual([event for event, _ in events[1:]], ["error"])
+        self.assertIn("error", events[1][1])
+
+    async def test_endpoint_error_sends_error_event(self):
+        """Test that an error status of the model endpoint is sent as an error event."""
+        response = await self.stream(httpx.Response(400, text="bad request"))
+
+        self.assertEqual(response.status_code, 200)
+        ((event, data),) = server_sent_events(response.text)
+        self.assertEqual(event, "error")
+        self.assertIn("400 Bad Request", data["error"])
+
+    async def test_only_llm_mode_streams(self):
+        """Test that the JSON response modes are rejected before searching."""
+        response = await self.stream(response_mode="products")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.requests, [])
+
+
+class TestLifespan(BackendServiceTestCase):
+    async def test_engine_is_shared_by_requests(self):
+        """Test that one connector and engine serve all the requests of a lifespan."""
+        handle, _ = model_server()
+        engine = mock_engine()
+
+        async with self.serve(handle, engine) as client:
+            for _ in range(3):
+                response = await client.post(
+                    "/generate_product_recommendations/",
+                    json={"text": "shirt", "response_mode": "products"},
+                )
+                self.assertEqual(response.status_code, 200)
+            engine.dispose.assert_not_called()
+
+        connector = self.connector_class.return_value
+        self.connector_class.assert_called_once_with()
+        self.create_engine.assert_called_once_with(
+            connector, backend_service.catalog_db
+        )
+        self.assertEqual(engine.connect.call_count, 3)
+        engine.dispose.assert_called_once_with()
+        connector.close.assert_called_once_with()
+
+    async def test_metrics_report_db_pool(self):
+        """Test that /metrics reports the connection pool of the engine."""
+        handle, _ = model_server()
+        engine = mock_engine()
+        engine.pool.size.return_value = 8
+        engine.pool.checkedin.return_value = 6
+        engine.pool.checkedout.return_value = 2
+        engine.pool.overflow.return_value = -6
+
+        async with self.serve(handle, engine) as client:
+            response = await client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["db_pool"],
+            {
+                "size": 8,
+                "checked_in": 6,
+                "checked_out": 2,
+                "overflow": -6,
+                "max_overflow": alloydb_connect.DB_MAX_OVERFLOW,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
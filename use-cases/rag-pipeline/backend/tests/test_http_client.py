@@ -0,0 +1,172 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the retries of the http_client module."""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import http_client
+import httpx
+
+URL = "http://model/v1/chat/completions"
+
+
+def responder(*outcomes):
+    """
+    Returns a MockTransport handler answering with outcomes in order, where an
+    exception is raised and anything else is returned, and the list of its requests.
+    """
+    outcomes = list(outcomes)
+    requests = []
+
+    def handle(request):
+        requests.append(request)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return handle, requests
+
+
+class TestBackoff(unittest.TestCase):
+    @patch("http_client.HTTP_BACKOFF_MAX_SECONDS", 2)
+    @patch("http_client.HTTP_BACKOFF_BASE_SECONDS", 0.1)
+    def test_backoff_is_capped_full_jitter(self):
+        """Test that backoffs are drawn below the exponential cap."""
+        with patch("http_client.random.uniform") as mock_uniform:
+            for attempt in range(6):
+                http_client._backoff_seconds(attempt)
+
+        self.assertEqual(
+            [call.args[1] for call in mock_uniform.call_args_list],
+            [0.1, 0.2, 0.4, 0.8, 1.6, 2],
+        )
+
+
+@patch("http_client.HTTP_BACKOFF_BASE_SECONDS", 0)
+@patch("http_client.HTTP_MAX_RETRIES", 2)
+class TestRetries(unittest.TestCase):
+    def post_sync(self, *outcomes):
+        handle, requests = responder(*outcomes)
+        client = httpx.Client(transport=httpx.MockTransport(handle))
+        with patch("http_client._client", client):
+            try:
+                return http_client.post_json_sync("test", URL, {}), requests
+            except httpx.HTTPError as e:
+                return e, requests
+
+    def post_async(self, *outcomes):
+        handle, requests = responder(*outcomes)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+        with patch("http_client._async_client", client):
+            try:
+                return asyncio.run(http_client.post_json("test", URL, {})), requests
+            except httpx.HTTPError as e:
+                return e, requests
+
+    def test_should_retry(self):
+        """Test that only connection failures and overload statuses are retried."""
+        for error in (
+            httpx.ConnectError("refused"),
+            httpx.ConnectTimeout("timeout"),
+            httpx.PoolTimeout("pool"),
+        ):
+            self.assertTrue(http_client._should_retry(0, error=error))
+        for error in (
+            httpx.ReadTimeout("stalled"),
+            httpx.WriteTimeout("stalled"),
+            httpx.RemoteProtocolError("closed"),
+        ):
+            self.assertFalse(http_client._should_retry(0, error=error))
+        for status_code in (429, 502, 503, 504):
+            self.assertTrue(http_client._should_retry(0, httpx.Response(status_code)))
+        for status_code in (200, 400, 500):
+            self.assertFalse(http_client._should_retry(0, httpx.Response(status_code)))
+        self.assertFalse(http_client._should_retry(2, httpx.Response(503)))
+
+    def test_retries_connection_errors_and_overload(self):
+        """Test that a refused connection and a 503 are retried until success."""
+        for post in (self.post_sync, self.post_async):
+            with self.subTest(post=post.__name__):
+                response, requests = post(
+                    httpx.ConnectError("refused"),
+                    httpx.Response(503),
+                    httpx.Response(200, json={"ok": True}),
+                )
+
+                self.assertEqual(response.json(), {"ok": True})
+                self.assertEqual(len(requests), 3)
+
+    def test_read_timeout_is_not_resubmitted(self):
+        """Test that a request that reached the endpoint is never sent again."""
+        for post in (self.post_sync, self.post_async):
+            with self.subTest(post=post.__name__):
+                error, requests = post(httpx.ReadTimeout("stalled"))
+
+                self.assertIsInstance(error, httpx.ReadTimeout)
+                self.assertEqual(len(requests), 1)
+
+    def test_gives_up_after_max_retries(self):
+        """Test that the last overloaded response is raised after the retries."""
+        error, requests = self.post_sync(*[httpx.Response(503)] * 3)
+
+        self.assertIsInstance(error, httpx.HTTPStatusError)
+        self.assertEqual(len(requests), 3)
+
+    def test_client_errors_are_not_retried(self):
+        """Test that 4xx responses are raised at once."""
+        error, requests = self.post_async(httpx.Response(400))
+
+        self.assertIsInstance(error, httpx.HTTPStatusError)
+        self.assertEqual(len(requests), 1)
+
+    def test_stream_lines_retries_before_streaming(self):
+        """Test that streams are retried until their response starts."""
+        handle, requests = responder(
+            httpx.ConnectError("refused"),
+            httpx.Response(503),
+            httpx.Response(200, text="data: a\n\ndata: b\n"),
+        )
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+        async def read():
+            return [line async for line in http_client.stream_lines("test", URL, {})]
+
+        with patch("http_client._async_client", client):
+            lines = asyncio.run(read())
+
+        self.assertEqual(lines, ["data: a", "", "data: b"])
+        self.assertEqual(len(requests), 3)
+
+    def test_metrics_count_retries_and_errors(self):
+        """Test that every call records its retries and outcome."""
+        with patch(
+            "http_client._metrics",
+            http_client.collections.defaultdict(http_client.EndpointMetrics),
+        ):
+            self.post_sync(httpx.ConnectError("refused"), httpx.Response(200))
+            self.post_sync(httpx.ReadTimeout("stalled"))
+
+            snapshot = http_client.metrics_snapshot()["test"]
+
+        self.assertEqual(
+            (snapshot["requests"], snapshot["retries"], snapshot["errors"]), (2, 1, 1)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
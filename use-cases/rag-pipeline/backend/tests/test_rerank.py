@@ -0,0 +1,73 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the local cosine re-ranking of the rerank module."""
+
+import unittest
+
+from rerank import cosine_rerank
+
+
+def product(product_id, embedding):
+    return {"product_id": product_id, "embedding": embedding}
+
+
+class TestCosineRerank(unittest.TestCase):
+    def test_ranks_by_cosine_similarity(self):
+        """Test that products are re-scored against the query and the top_k kept."""
+        products = [
+            product("orthogonal", "[0,1]"),
+            product("opposite", "[-1,0]"),
+            # Scaled copies of the query are exact matches whatever their norm
+            product("same", "[3,0]"),
+            product("close", "[1,1]"),
+        ]
+
+        ranked = cosine_rerank(products, [2.0, 0.0], top_k=3)
+
+        self.assertEqual(
+            [p["product_id"] for p in ranked], ["same", "close", "orthogonal"]
+        )
+        self.assertAlmostEqual(ranked[0]["cosine_similarity"], 1.0, places=6)
+        self.assertAlmostEqual(ranked[1]["cosine_similarity"], 0.5**0.5, places=6)
+        self.assertAlmostEqual(ranked[2]["cosine_similarity"], 0.0, places=6)
+        self.assertIsInstance(ranked[0]["cosine_similarity"], float)
+
+    def test_removes_embeddings(self):
+        """Test that the embedding literals are not returned to clients."""
+        ranked = cosine_rerank([product("a", "[1,0]")], [1.0, 0.0], top_k=5)
+
+        self.assertEqual(list(ranked[0]), ["product_id", "cosine_similarity"])
+
+    def test_ties_keep_search_order(self):
+        """Test that equally similar products keep their vector search order."""
+        products = [product(i, "[1,1]") for i in range(4)]
+
+        ranked = cosine_rerank(products, [1.0, 1.0], top_k=4)
+
+        self.assertEqual([p["product_id"] for p in ranked], [0, 1, 2, 3])
+
+    def test_zero_vectors_score_zero(self):
+        """Test that a zero embedding does not divide by zero."""
+        ranked = cosine_rerank([product("zero", "[0,0]")], [1.0, 0.0], top_k=1)
+
+        self.assertEqual(ranked[0]["cosine_similarity"], 0.0)
+
+    def test_no_products(self):
+        """Test that an empty search result is returned as is."""
+        self.assertEqual(cosine_rerank([], [1.0, 0.0], top_k=3), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the search_cache module."""
+
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import search_cache
+from search_cache import InMemoryRedis, SearchCache
+
+EMBEDDINGS = [0.1, 0.2, 0.3]
+ROWS = {"columns": ["name"], "rows": [["Shirt"]]}
+
+
+class TestInMemoryRedis(unittest.TestCase):
+    @patch("search_cache.time.monotonic")
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        """Test that entries are dropped once their TTL elapsed."""
+        mock_monotonic.return_value = 100.0
+        client = InMemoryRedis()
+        client.set("key", "value", ex=10)
+        client.set("forever", "value")
+
+        mock_monotonic.return_value = 109.0
+        self.assertEqual(client.get("key"), b"value")
+        mock_monotonic.return_value = 110.0
+        self.assertIsNone(client.get("key"))
+        self.assertEqual(client.get("forever"), b"value")
+
+    def test_evicts_least_recently_used(self):
+        """Test that reads refresh entries and the least recently used is evicted."""
+        client = InMemoryRedis(max_entries=2)
+        client.set("a", "1")
+        client.set("b", "2")
+        client.get("a")
+        client.set("c", "3")
+
+        self.assertIsNone(client.get("b"))
+        self.assertEqual(client.get("a"), b"1")
+        self.assertEqual(client.get("c"), b"3")
+
+    def test_delete_and_flushdb(self):
+        """Test that delete counts the removed keys and flushdb clears everything."""
+        client = InMemoryRedis()
+        client.set("a", "1")
+        client.set("b", "2")
+
+        self.assertEqual(client.delete("a", "missing"), 1)
+        client.flushdb()
+        self.assertIsNone(client.get("b"))
+
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SearchCache(InMemoryRedis())
+
+    def test_embeddings_round_trip(self):
+        """Test that embeddings are cached per text and image query."""
+        self.cache.put_embeddings(EMBEDDINGS, user_query="shirt")
+
+        self.assertEqual(self.cache.get_embeddings(user_query="shirt"), EMBEDDINGS)
+        self.assertIsNone(
+            self.cache.get_embeddings(user_query="shirt", image_uri="gs://b/i.jpg")
+        )
+
+    def test_result_keys_separate_searches(self):
+        """Test that rows are cached per column, table, row count and search options."""
+        key = self.cache.result_key(
+            EMBEDDINGS, "text_embeddings", "catalog", 5, {"search_mode": "ann"}
+        )
+        other_keys = [
+            self.cache.result_key(EMBEDDINGS, "image_embeddings", "catalog", 5),
+            self.cache.result_key(
+                EMBEDDINGS, "text_embeddings", "other", 5, {"search_mode": "ann"}
+            ),
+            self.cache.result_key(
+                EMBEDDINGS, "text_embeddings", "catalog", 10, {"search_mode": "ann"}
+            ),
+            self.cache.result_key(
+                EMBEDDINGS, "text_embeddings", "catalog", 5, {"search_mode": "exact"}
+            ),
+            self.cache.result_key(
+                EMBEDDINGS,
+                "text_embeddings",
+                "catalog",
+                5,
+                {"search_mode": "ann", "brand": "Alisha"},
+            ),
+        ]
+
+        self.assertEqual(len({key, *other_keys}), len(other_keys) + 1)
+        # Row counts from the environment are strings, from requests integers
+        self.assertEqual(
+            key,
+            self.cache.result_key(
+                EMBEDDINGS, "text_embeddings", "catalog", "5", {"search_mode": "ann"}
+            ),
+        )
+
+    def test_rows_round_trip_with_search_options(self):
+        """Test that cached rows are only returned for the same search options."""
+        options = {"search_mode": "ann", "category": "Men's Clothing"}
+        self.cache.put_rows(ROWS, EMBEDDINGS, "text_embeddings", "catalog", 5, options)
+
+        self.assertEqual(
+            self.cache.get_rows(
+                EMBEDDINGS,
+                "text_embeddings",
+                "catalog",
+                5,
+                dict(reversed(options.items())),
+            ),
+            ROWS,
+        )
+        self.assertIsNone(
+            self.cache.get_rows(EMBEDDINGS, "text_embeddings", "catalog", 5)
+        )
+
+    def test_client_failures_fall_back_to_misses(self):
+        """Test that a failing cache client never fails the search."""
+        client = MagicMock()
+        client.get.side_effect = ConnectionError("redis down")
+        client.set.side_effect = ConnectionError("redis down")
+        cache = SearchCache(client)
+
+        cache.put_rows(ROWS, EMBEDDINGS, "text_embeddings", "catalog", 5)
+
+        self.assertIsNone(cache.get_rows(EMBEDDINGS, "text_embeddings", "catalog", 5))
+        self.assertEqual(cache.stats()["result"]["misses"], 1)
+
+    def test_stats(self):
+        """Test the hit and miss counts and hit rate of each cache level."""
+        self.cache.put_embeddings(EMBEDDINGS, user_query="shirt")
+        self.cache.get_embeddings(user_query="shirt")
+        self.cache.get_embeddings(user_query="shirt")
+        self.cache.get_embeddings(user_query="dress")
+
+        stats = self.cache.stats()
+
+        self.assertEqual(
+            stats["embedding"], {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+        )
+        self.assertEqual(stats["result"], {"hits": 0, "misses": 0, "hit_rate": 0.0})
+
+    def test_stats_count_concurrent_lookups(self):
+        """Test that lookups from several threads are all counted."""
+        self.cache.put_embeddings(EMBEDDINGS, user_query="shirt")
+
+        def lookup():
+            for _ in range(1000):
+                self.cache.get_embeddings(user_query="shirt")
+                self.cache.get_embeddings(user_query="dress")
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = self.cache.stats()["embedding"]
+        self.assertEqual((stats["hits"], stats["misses"]), (8000, 8000))
+
+    @patch("search_cache.SEARCH_CACHE_ENABLED", False)
+    def test_create_search_cache_disabled(self):
+        """Test that no cache is created when SEARCH_CACHE_ENABLED is false."""
+        self.assertIsNone(search_cache.create_search_cache())
+
+    @patch("search_cache.SEARCH_CACHE_REDIS_URL", None)
+    @patch("search_cache.SEARCH_CACHE_ENABLED", True)
+    def test_create_search_cache_in_memory(self):
+        """Test that the cache defaults to process memory without a Redis URL."""
+        cache = search_cache.create_search_cache()
+
+        self.assertIsInstance(cache.client, InMemoryRedis)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the query building helpers of the semantic_search module."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from semantic_search import (
+    build_search_query,
+    build_where_clause,
+    run_search_query,
+    scann_settings,
+    search_filters,
+)
+
+
+class TestBuildSearchQuery(unittest.TestCase):
+    def test_exact_orders_by_similarity(self):
+        """Test that exact searches rank every row by the similarity expression."""
+        query = build_search_query("catalog", "text_embeddings", 5, "exact")
+
+        self.assertIn("(1-(text_embeddings <-> :emb)) AS cosine_similarity", query)
+        self.assertIn("FROM catalog ORDER BY cosine_similarity DESC LIMIT 5;", query)
+
+    @patch("semantic_search.SEARCH_DISTANCE_FUNCTION", "cosine")
+    def test_ann_orders_by_distance_operator(self):
+        """Test that ann searches order by the raw operator the ScaNN index serves."""
+        query = build_search_query("catalog", "text_embeddings", 5, "ann")
+
+        distance = "text_embeddings <=> CAST(:emb AS vector)"
+        self.assertIn(f"(1-({distance})) AS cosine_similarity", query)
+        self.assertTrue(query.endswith(f"FROM catalog ORDER BY {distance} LIMIT 5;"))
+
+    @patch("semantic_search.SEARCH_DISTANCE_FUNCTION", "dot_product")
+    def test_ann_uses_index_distance_function(self):
+        """Test that the operator and similarity follow SEARCH_DISTANCE_FUNCTION."""
+        query = build_search_query("catalog", "text_embeddings", 5, "ann")
+
+        self.assertIn(
+            "(-(text_embeddings <#> CAST(:emb AS vector))) AS cosine_similarity", query
+        )
+
+    def test_include_embeddings(self):
+        """Test that the stored embeddings are selected as text on request."""
+        query = build_search_query(
+            "catalog", "text_embeddings", 5, "ann", include_embeddings=True
+        )
+
+        self.assertIn("CAST(text_embeddings AS text) AS embedding", query)
+        self.assertNotIn(
+            "AS embedding", build_search_query("catalog", "text_embeddings", 5, "ann")
+        )
+
+    def test_rejects_unknown_search_mode(self):
+        """Test that an unsupported search mode raises a ValueError."""
+        with self.assertRaises(ValueError):
+            build_search_query("catalog", "text_embeddings", 5, "hnsw")
+
+    @patch("semantic_search.CATALOG_PRICE_COLUMN", "price")
+    def test_filters_are_pushed_down(self):
+        """Test that both search modes apply the filters before ORDER BY ... LIMIT."""
+        filters = search_filters(category="Men's Clothing", max_price=50)
+
+        for search_mode in ("exact", "ann"):
+            with self.subTest(search_mode=search_mode):
+                query = build_search_query(
+                    "catalog", "text_embeddings", 5, search_mode, filters=filters
+                )
+                self.assertIn(
+                    'FROM catalog WHERE "c1_name" = :category AND "price" <= :max_price '
+                    "ORDER BY",
+                    query,
+                )
+
+
+class TestSearchFilters(unittest.TestCase):
+    def test_drops_unset_filters(self):
+        """Test that only the set filters are returned."""
+        self.assertEqual(search_filters(), {})
+        self.assertEqual(search_filters(brand="Alisha"), {"brand": "Alisha"})
+
+    @patch("semantic_search.CATALOG_PRICE_COLUMN", None)
+    def test_price_filters_require_price_column(self):
+        """Test that price filters are rejected when the catalog has no prices."""
+        with self.assertRaises(ValueError):
+            search_filters(min_price=10)
+
+    @patch("semantic_search.CATALOG_PRICE_COLUMN", "price")
+    def test_rejects_inverted_price_range(self):
+        """Test that min_price greater than max_price is rejected."""
+        self.assertEqual(
+            search_filters(min_price=10, max_price=10),
+            {"min_price": 10, "max_price": 10},
+        )
+        with self.assertRaises(ValueError):
+            search_filters(min_price=20, max_price=10)
+
+    @patch("semantic_search.CATALOG_PRICE_COLUMN", "price")
+    def test_build_where_clause_binds_values(self):
+        """Test that filter values are bound by name, never formatted into the SQL."""
+        where = build_where_clause(
+            {"category": "Men's Clothing", "brand": "x' OR '1'='1", "min_price": 10}
+        )
+
+        self.assertEqual(
+            where,
+            ' WHERE "c1_name" = :category AND "Brand" = :brand'
+            ' AND "price" >= :min_price',
+        )
+        self.assertEqual(build_where_clause({}), "")
+
+
+class TestScannSettings(unittest.TestCase):
+    @patch("semantic_search.SCANN_PRE_REORDERING_NUM_NEIGHBORS", None)
+    @patch("semantic_search.SCANN_NUM_LEAVES_TO_SEARCH", "30")
+    def test_request_values_override_defaults(self):
+        """Test that request parameters override the SCANN_* defaults."""
+        self.assertEqual(scann_settings(), {"scann.num_leaves_to_search": "30"})
+        self.assertEqual(
+            scann_settings(10, 50),
+            {
+                "scann.num_leaves_to_search": "10",
+                "scann.pre_reordering_num_neighbors": "50",
+            },
+        )
+
+
+class TestRunSearchQuery(unittest.TestCase):
+    def test_applies_settings_to_transaction(self):
+        """Test that settings are set locally to the transaction before the search."""
+        conn = MagicMock()
+        result = conn.execute.return_value
+        result.keys.return_value = ["name", "cosine_similarity"]
+        result.fetchall.return_value = [("Shirt", 0.9)]
+
+        search_result = run_search_query(
+            conn,
+            "SELECT ...",
+            "[0.1,0.2]",
+            settings={"scann.num_leaves_to_search": "10"},
+            filters={"brand": "Alisha"},
+        )
+
+        set_config, search = conn.execute.call_args_list
+        self.assertEqual(
+            str(set_config.args[0]), "SELECT set_config(:name, :value, true)"
+        )
+        self.assertEqual(
+            set_config.args[1], {"name": "scann.num_leaves_to_search", "value": "10"}
+        )
+        self.assertEqual(search.args[1], {"emb": "[0.1,0.2]", "brand": "Alisha"})
+        self.assertEqual(
+            search_result,
+            {"columns": ["name", "cosine_similarity"], "rows": [["Shirt", 0.9]]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,6 +28,9 @@ IMAGE_BUCKET = os.environ["PROCESSING_BUCKET"]
 RAY_CLUSTER_HOST = os.environ["RAY_CLUSTER_HOST"]
 # Check if this can be passed an env to the container like IMAGE_BUCKET
 GCS_IMAGE_FOLDER = "flipkart_images"
+# 'csv' (default) or 'parquet', which alloy-db-setup reads without re-parsing CSV
+RAG_OUTPUT_FORMAT = os.environ.get("RAG_OUTPUT_FORMAT", "csv")
+PARQUET_ROW_GROUP_SIZE = int(os.environ.get("PARQUET_ROW_GROUP_SIZE", "10000"))
 
 # Configure logging at the module level
 logging.config.fileConfig("logging.conf")
@@ -136,10 +139,18 @@ def preprocess_rag():
     rag_preprocessing = DataPrepForRag()
     rag_df = rag_preprocessing.process_rag_input(result_df)
     # Store the rag preprocessed data into GCS
-    rag_df.to_csv(
-        "gs://" + IMAGE_BUCKET + rag_output_file,
-        index=False,
-    )
+    if RAG_OUTPUT_FORMAT == "parquet":
+        rag_df.to_parquet(
+            "gs://" + IMAGE_BUCKET + rag_output_file.replace(".csv", ".parquet"),
+            index=False,
+            compression="snappy",
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+        )
+    else:
+        rag_df.to_csv(
+            "gs://" + IMAGE_BUCKET + rag_output_file,
+            index=False,
+        )
     logger.info("Finished")
 
 
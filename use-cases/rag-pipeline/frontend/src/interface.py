@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import logging
 import logging.config
 import os
@@ -33,6 +34,11 @@ if "LOG_LEVEL" in os.environ:
 
 # RAG BACKEND_SERVICE_URL
 BACKEND_SERVICE_URL = os.environ.get("BACKEND_SERVICE_ENDPOINT")
+# Server-sent events endpoint streaming the response as it is generated
+BACKEND_STREAM_URL = os.environ.get(
+    "BACKEND_STREAM_ENDPOINT",
+    f"{(BACKEND_SERVICE_URL or '').rstrip('/')}/stream",
+)
 
 
 # Function to validate GCS URI
@@ -66,23 +72,46 @@ def validate_text(text):
     return bool(text.strip())
 
 
+def read_server_sent_events(response):
+    """
+    Parses the server-sent events of a streaming response.
+
+    Args:
+      response: The streaming requests.Response.
+
+    Yields:
+      (event, data) tuples, with the event name ("message" by default) and the JSON
+      decoded data.
+    """
+    event = "message"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            event = "message"
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            yield event, json.loads(line[len("data:") :])
+
+
 # Function to process the input and send to backend
 def process_input(text=None, image_uri=None):
     """
-    Processes the input (text, image_uri or both) and sends a POST request to the backend.
+    Processes the input (text, image_uri or both) and streams the backend response.
 
     Args:
       text: The input text(optional).
       image_uri: The GCS URI of the image (optional).
 
-    Returns:
-      The response from the backend.
+    Yields:
+      The response from the backend received so far, so it renders as it is generated.
     """
     if text and not validate_text(text):
-        return "Invalid text input provided."
+        yield "Invalid text input provided."
+        return
 
     if image_uri and not validate_gcs_uri(image_uri):
-        return "Invalid GCS URI provided."
+        yield "Invalid GCS URI provided."
+        return
 
     data = {}
     if text:
@@ -91,13 +120,33 @@ def process_input(text=None, image_uri=None):
         data["image_uri"] = image_uri
 
     if not data:  # Check if data is empty
-        return "Please provide either text or image URI."
+        yield "Please provide either text or image URI."
+        return
+
+    with requests.post(
+        BACKEND_STREAM_URL, json=data, stream=True, timeout=100
+    ) as response:
+        response.raise_for_status()  # Raise an exception for bad status codes
+        result = ""
+        for event, payload in read_server_sent_events(response):
+            if event == "error":
+                logger.error("Error streaming from backend service:%s", payload)
+                yield f"{result}\nError: {payload['error']}"
+                return
+            if event == "done":
+                break
+            result += payload["token"]
+            yield result
+
+    logger.info("Received response from backend service:%s", result)
+
+
+def process_text(text):
+    yield from process_input(text=text)
 
-    response = requests.post(BACKEND_SERVICE_URL, json=data, timeout=100)
 
-    response.raise_for_status()  # Raise an exception for bad status codes
-    logger.info("Received response from backend service:%s", response.text)
-    return response.json()
+def process_image(image_uri):
+    yield from process_input(image_uri=image_uri)
 
 
 # Create the Gradio interface
@@ -109,7 +158,7 @@ with gr.Blocks() as demo:
         text_output = gr.Textbox(label="Response")
         text_button = gr.Button("Generate Response")
         text_button.click(
-            fn=lambda text: process_input(text=text),
+            fn=process_text,
             inputs=text_input,
             outputs=text_output,
         )
@@ -129,7 +178,7 @@ with gr.Blocks() as demo:
         image_output = gr.Textbox(label="Response")
         image_button = gr.Button("Generate Response")
         image_button.click(
-            fn=lambda image_uri: process_input(image_uri=image_uri),
+            fn=process_image,
             inputs=[image_uri_input_2],
             outputs=image_output,
         )
@@ -0,0 +1,113 @@
+# Copyright 2026 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the server-sent events handling of the interface module."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from interface import process_input, read_server_sent_events
+
+
+def streaming_response(body):
+    """Returns a streaming requests.Response mock with the lines of body."""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_lines.return_value = iter(body.split("\n"))
+    return response
+
+
+class TestReadServerSentEvents(unittest.TestCase):
+    def test_events(self):
+        """Test that data lines are decoded with the event name preceding them."""
+        response = streaming_response(
+            'data: {"token": "Slim"}\n\n'
+            'data: {"token": " Shirt"}\n\n'
+            "event: done\ndata: {}\n\n"
+        )
+
+        self.assertEqual(
+            list(read_server_sent_events(response)),
+            [
+                ("message", {"token": "Slim"}),
+                ("message", {"token": " Shirt"}),
+                ("done", {}),
+            ],
+        )
+        response.iter_lines.assert_called_once_with(decode_unicode=True)
+
+    def test_blank_line_resets_event(self):
+        """Test that the event name only applies until the end of its event."""
+        response = streaming_response(
+            'event: error\ndata: {"error": "timeout"}\n\ndata: {"token": "a"}\n\n'
+        )
+
+        self.assertEqual(
+            list(read_server_sent_events(response)),
+            [("error", {"error": "timeout"}), ("message", {"token": "a"})],
+        )
+
+    def test_ignores_comments_and_other_fields(self):
+        """Test that comment, id and retry lines are skipped."""
+        response = streaming_response(
+            ': keep-alive\nid: 1\nretry: 1000\ndata: {"token": "a"}\n\n'
+        )
+
+        self.assertEqual(
+            list(read_server_sent_events(response)), [("message", {"token": "a"})]
+        )
+
+
+@patch("interface.BACKEND_STREAM_URL", "http://backend/stream")
+class TestProcessInput(unittest.TestCase):
+    def process(self, body, **prompt):
+        with patch(
+            "interface.requests.post", return_value=streaming_response(body)
+        ) as mock_post:
+            return list(process_input(**prompt)), mock_post
+
+    def test_streams_tokens(self):
+        """Test that the response is yielded as it grows, until the done event."""
+        outputs, mock_post = self.process(
+            'data: {"token": "Slim"}\n\ndata: {"token": " Shirt"}\n\n'
+            "event: done\ndata: {}\n\n"
+            'data: {"token": "ignored"}\n\n',
+            text="shirt",
+        )
+
+        self.assertEqual(outputs, ["Slim", "Slim Shirt"])
+        mock_post.assert_called_once_with(
+            "http://backend/stream", json={"text": "shirt"}, stream=True, timeout=100
+        )
+
+    def test_error_event(self):
+        """Test that an error event ends the response with its error message."""
+        outputs, _ = self.process(
+            'data: {"token": "Slim"}\n\n'
+            'event: error\ndata: {"error": "model unavailable"}\n\n',
+            image_uri="gs://bucket/images/shirt.jpg",
+        )
+
+        self.assertEqual(outputs, ["Slim", "Slim\nError: model unavailable"])
+
+    def test_invalid_image_uri(self):
+        """Test that invalid image URIs are rejected without calling the backend."""
+        outputs, mock_post = self.process("", image_uri="http://images/shirt.jpg")
+
+        self.assertEqual(outputs, ["Invalid GCS URI provided."])
+        mock_post.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()